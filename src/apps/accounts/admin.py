@@ -1,3 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import TokenAPI
+
+
+@admin.register(TokenAPI)
+class TokenAPIAdmin(admin.ModelAdmin):
+    list_display = ("nome", "user", "prefixo", "ativo", "criado_em", "ultimo_uso_em")
+    list_filter = ("ativo",)
+    search_fields = ("nome", "user__username", "prefixo")
+    readonly_fields = ("prefixo", "criado_em", "ultimo_uso_em")
+
+    def has_add_permission(self, request):
+        # a chave só é exibida uma vez: crie com "manage.py criar_token_api"
+        return False
@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import TokenAPI
+
+
+class Command(BaseCommand):
+    help = "Cria um token para a API /api/v1/ (o papel é o do Perfil do usuário)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="Usuário dono do token.")
+        parser.add_argument("--nome", required=True, help="Sistema/integração que vai usar o token.")
+
+    def handle(self, *args, **opts):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=opts["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário não encontrado: {opts['username']}")
+
+        _token, chave = TokenAPI.gerar(user=user, nome=opts["nome"])
+        self.stdout.write(self.style.SUCCESS("Token criado. Guarde agora, ele não será exibido de novo:"))
+        self.stdout.write(chave)
@@ -1,3 +1,6 @@
+import hashlib
+import secrets
+
 from django.conf import settings
 from django.db import models
 
@@ -25,3 +28,37 @@ class Perfil(models.Model):
 
     def __str__(self) -> str:
         return f"{self.user.username} ({self.papel})"
+
+
+class TokenAPI(models.Model):
+    """
+    Token de acesso à API (/api/v1/). O papel vem do Perfil do usuário dono do token.
+    Só o hash SHA-256 fica no banco; o token em texto aparece uma única vez, na criação.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="tokens_api")
+    nome = models.CharField(max_length=100, help_text="Sistema/integração que usa o token.")
+    prefixo = models.CharField(max_length=8, editable=False)
+    chave_hash = models.CharField(max_length=64, unique=True, editable=False)
+    ativo = models.BooleanField(default=True)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    ultimo_uso_em = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = "Token de API"
+        verbose_name_plural = "Tokens de API"
+
+    def __str__(self) -> str:
+        return f"{self.nome} ({self.prefixo}…)"
+
+    @staticmethod
+    def calcular_hash(chave: str) -> str:
+        return hashlib.sha256(chave.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def gerar(cls, *, user, nome: str) -> tuple["TokenAPI", str]:
+        """Cria o token e devolve (objeto, chave em texto) — a chave não é recuperável depois."""
+        chave = secrets.token_urlsafe(32)
+        token = cls.objects.create(user=user, nome=nome, prefixo=chave[:8], chave_hash=cls.calcular_hash(chave))
+        return token, chave
@@ -1,3 +1,23 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "tarefa", "status", "prioridade", "tentativas", "max_tentativas", "executar_apos", "worker", "criado_em")
+    list_filter = ("status", "tarefa")
+    search_fields = ("tarefa", "chave", "erro")
+    ordering = ("-criado_em",)
+    readonly_fields = ("criado_em", "iniciado_em", "batimento_em", "concluido_em", "worker", "resultado", "erro")
+    actions = ["reenfileirar"]
+
+    @admin.action(description="Reenfileirar selecionados")
+    def reenfileirar(self, request, queryset):
+        n = queryset.exclude(status=Job.Status.EXECUTANDO).update(
+            status=Job.Status.PENDENTE,
+            tentativas=0,
+            executar_apos=timezone.now(),
+        )
+        self.message_user(request, f"{n} job(s) reenfileirado(s).")
@@ -0,0 +1,12 @@
+"""
+Backup do banco (usado pelos comandos backup_db / restore_db / backup_deposito).
+
+- compressao: gzip em blocos paralelos (ou zstd multi-thread, se instalado)
+- pipeline: dump em streaming -> compressão -> arquivo temporário -> rename, com
+  SHA-256 calculado durante a gravação e manifesto JSON ao lado do arquivo
+- mysql: dump por tabela em paralelo (mesmo snapshot) e restauração em paralelo
+  com índices/FKs recriados depois da carga
+- deposito: pedaços deduplicados por conteúdo entre backups, retenção
+  avô-pai-filho e coleta de lixo
+- limites: teto de leitura/escrita (MB/s), nice/ionice e duração máxima
+"""
@@ -0,0 +1,114 @@
+"""
+Compressão em streaming para os backups.
+
+- "zst": zstandard com threads (se o pacote `zstandard` estiver instalado)
+- "gz": gzip em blocos independentes comprimidos em paralelo (estilo pigz). Cada
+  bloco vira um membro gzip completo; membros concatenados são um .gz válido
+  (gzip -d, zcat e gzip.open leem normalmente).
+- "plain": sem compressão
+"""
+from __future__ import annotations
+
+import gzip
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - opcional
+    zstandard = None
+
+TAMANHO_BLOCO = 4 * 1024 * 1024  # bytes por membro gzip / por leitura do dump
+
+EXTENSOES = {"zst": ".zst", "gz": ".gz", "plain": ""}
+
+
+def formato_padrao() -> str:
+    return "zst" if zstandard is not None else "gz"
+
+
+def formato_do_arquivo(nome: str) -> str:
+    for formato, extensao in EXTENSOES.items():
+        if extensao and nome.endswith(extensao):
+            return formato
+    return "plain"
+
+
+class GzipParalelo:
+    """
+    write() acumula blocos de TAMANHO_BLOCO e comprime cada um numa thread
+    (zlib libera o GIL). Os blocos são gravados no destino na ordem de chegada;
+    no máximo 2 * threads blocos em memória.
+    """
+
+    def __init__(self, destino, *, threads: int, nivel: int = 6, bloco: int = TAMANHO_BLOCO):
+        self._destino = destino
+        self._nivel = nivel
+        self._bloco = bloco
+        self._buffer = bytearray()
+        self._pendentes = deque()
+        self._max_pendentes = max(threads, 1) * 2
+        self._executor = ThreadPoolExecutor(max_workers=max(threads, 1), thread_name_prefix="gzip")
+
+    def write(self, dados) -> int:
+        if not self._buffer and len(dados) == self._bloco:
+            self._enviar(bytes(dados))
+            return len(dados)
+
+        self._buffer += dados
+        while len(self._buffer) >= self._bloco:
+            self._enviar(bytes(self._buffer[: self._bloco]))
+            del self._buffer[: self._bloco]
+        return len(dados)
+
+    def _enviar(self, bloco: bytes) -> None:
+        self._pendentes.append(self._executor.submit(gzip.compress, bloco, self._nivel, mtime=0))
+        while len(self._pendentes) >= self._max_pendentes:
+            self._destino.write(self._pendentes.popleft().result())
+
+    def close(self) -> None:
+        try:
+            if self._buffer:
+                self._enviar(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pendentes:
+                self._destino.write(self._pendentes.popleft().result())
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+class _SemCompressao:
+    def __init__(self, destino):
+        self._destino = destino
+
+    def write(self, dados) -> int:
+        return self._destino.write(dados)
+
+    def close(self) -> None:
+        pass
+
+
+def abrir_compressor(formato: str, destino, *, threads: int, nivel: int | None = None):
+    """Objeto com write()/close() que grava `formato` em `destino` (que continua aberto)."""
+    if formato == "zst":
+        if zstandard is None:
+            raise ValueError("Formato zst requer o pacote 'zstandard' (pip install zstandard).")
+        compressor = zstandard.ZstdCompressor(level=nivel or 3, threads=max(threads, 1))
+        return compressor.stream_writer(destino, closefd=False)
+    if formato == "gz":
+        return GzipParalelo(destino, threads=threads, nivel=nivel or 6)
+    if formato == "plain":
+        return _SemCompressao(destino)
+    raise ValueError(f"Formato de compressão desconhecido: {formato}")
+
+
+def abrir_leitura(caminho):
+    """Arquivo binário descomprimido conforme a extensão (.zst, .gz ou texto puro)."""
+    formato = formato_do_arquivo(str(caminho))
+    if formato == "zst":
+        if zstandard is None:
+            raise ValueError("Ler .zst requer o pacote 'zstandard' (pip install zstandard).")
+        return zstandard.ZstdDecompressor().stream_reader(open(caminho, "rb"), closefd=True)
+    if formato == "gz":
+        return gzip.open(caminho, "rb")
+    return open(caminho, "rb")
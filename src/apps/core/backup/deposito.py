@@ -0,0 +1,330 @@
+"""
+Depósito de backups com deduplicação.
+
+O SQL de cada backup é fatiado por conteúdo (content-defined chunking): os cortes
+caem em fronteiras de linha/registro ("\\n" ou "),(") escolhidas pelo hash dos
+bytes que as antecedem, e não por posição. Uma linha alterada muda só o pedaço
+em que está; os cortes seguintes se realinham e os pedaços se repetem entre
+backups consecutivos. Cada pedaço é gravado uma única vez, comprimido, em
+chunks/ab/<sha256>; o manifesto do backup (backups/<nome>.json) lista os pedaços
+em ordem.
+
+Retenção avô-pai-filho (diários/semanais/mensais) remove manifestos; a coleta de
+lixo apaga os pedaços que nenhum manifesto referencia. Pedaços gravados (ou
+reaproveitados) há menos de `carencia` não são apagados: protegem um backup em
+andamento, cujo manifesto ainda não existe.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .compressao import EXTENSOES, formato_padrao, zstandard
+from .pipeline import ArquivoGerado, ErroBackup, gravacao_atomica, gravar_manifesto, ler_manifesto
+
+CHUNK_MIN = 256 * 1024
+CHUNK_MAX = 4 * 1024 * 1024
+CHUNK_DIVISOR = 2048  # 1 em N fronteiras (depois do mínimo) vira corte
+JANELA = 48  # bytes antes da fronteira que decidem o corte
+
+_FRONTEIRA = re.compile(rb"\n|\),\(")
+
+VERSAO_DEPOSITO = 1
+
+
+# =============================================================================
+# Fatiamento por conteúdo
+# =============================================================================
+
+def _procurar_corte(buffer: bytes, inicio: int, fim: int, divisor: int) -> int | None:
+    for m in _FRONTEIRA.finditer(buffer, inicio, fim):
+        pos = m.end()
+        if zlib.crc32(buffer[pos - JANELA:pos]) % divisor == 0:
+            return pos
+    return None
+
+
+def _ultima_fronteira(buffer: bytes, inicio: int, fim: int) -> int:
+    """Corte forçado (pedaço chegou ao máximo): na última fronteira antes de `fim`, se houver."""
+    candidatas = [pos + len(sep) for sep in (b"\n", b"),(") if (pos := buffer.rfind(sep, inicio, fim)) >= 0]
+    return max(candidatas, default=fim)
+
+
+def fatiar(blocos, *, minimo: int = CHUNK_MIN, maximo: int = CHUNK_MAX, divisor: int = CHUNK_DIVISOR):
+    """Pedaços (bytes) de `minimo` a `maximo` bytes, cortados em fronteiras definidas pelo conteúdo."""
+    buffer = b""
+    inicio = minimo
+    for bloco in blocos:
+        buffer += bloco
+        while len(buffer) >= minimo:
+            corte = _procurar_corte(buffer, inicio, min(len(buffer), maximo), divisor)
+            if corte is None:
+                if len(buffer) < maximo:
+                    inicio = max(minimo, len(buffer) - 2)  # "),(" pode estar dividido entre blocos
+                    break
+                corte = _ultima_fronteira(buffer, minimo, maximo)
+            yield buffer[:corte]
+            buffer = buffer[corte:]
+            inicio = minimo
+    if buffer:
+        yield buffer
+
+
+# =============================================================================
+# Retenção
+# =============================================================================
+
+def selecionar_retidos(backups: list[tuple[str, datetime]], *, diarios: int, semanais: int, mensais: int) -> set[str]:
+    """
+    Avô-pai-filho: o mais recente de cada um dos últimos `diarios` dias, `semanais`
+    semanas (ISO) e `mensais` meses que têm backup. O mais recente sempre fica.
+    """
+    ordenados = sorted(backups, key=lambda b: b[1], reverse=True)
+    retidos = {ordenados[0][0]} if ordenados else set()
+    periodos = (
+        (lambda d: d.date(), diarios),
+        (lambda d: d.isocalendar()[:2], semanais),
+        (lambda d: (d.year, d.month), mensais),
+    )
+    for chave, limite in periodos:
+        vistos = set()
+        for nome, data in ordenados:
+            periodo = chave(data)
+            if periodo in vistos:
+                continue
+            if len(vistos) >= limite:
+                break
+            vistos.add(periodo)
+            retidos.add(nome)
+    return retidos
+
+
+# =============================================================================
+# Depósito
+# =============================================================================
+
+class Deposito:
+    def __init__(self, raiz, *, formato: str | None = None, threads: int = 1, nivel: int | None = None,
+                 controle=None):
+        self.raiz = Path(raiz)
+        self.threads = max(threads, 1)
+        self.nivel = nivel
+        self.controle = controle  # limites.Controle: teto de escrita e prazo
+        self.formato = self._configurar(formato)
+
+    def _configurar(self, formato: str | None) -> str:
+        config = self.raiz / "deposito.json"
+        if config.exists():
+            dados = json.loads(config.read_text(encoding="utf-8"))
+            if formato and formato != dados["formato"]:
+                raise ErroBackup(f"O depósito {self.raiz} usa o formato {dados['formato']}, não {formato}.")
+            formato = dados["formato"]
+        else:
+            formato = formato or formato_padrao()
+            (self.raiz / "backups").mkdir(parents=True, exist_ok=True)
+            (self.raiz / "chunks").mkdir(exist_ok=True)
+            with gravacao_atomica(config) as arquivo:
+                arquivo.write(json.dumps({"versao": VERSAO_DEPOSITO, "formato": formato}).encode())
+        if formato == "zst" and zstandard is None:
+            raise ErroBackup("O depósito usa zst: instale o pacote 'zstandard'.")
+        return formato
+
+    # -------------------------------------------------------------------------
+    # Pedaços
+    # -------------------------------------------------------------------------
+
+    def _caminho(self, sha: str) -> Path:
+        return self.raiz / "chunks" / sha[:2] / f"{sha}{EXTENSOES[self.formato]}"
+
+    def _comprimir(self, dados: bytes) -> bytes:
+        if self.formato == "zst":
+            return zstandard.ZstdCompressor(level=self.nivel or 3).compress(dados)
+        if self.formato == "gz":
+            return gzip.compress(dados, self.nivel or 6, mtime=0)
+        return dados
+
+    def _descomprimir(self, dados: bytes) -> bytes:
+        if self.formato == "zst":
+            return zstandard.ZstdDecompressor().decompress(dados)
+        if self.formato == "gz":
+            return gzip.decompress(dados)
+        return dados
+
+    def _gravar_chunk(self, caminho: Path, dados: bytes) -> int:
+        comprimido = self._comprimir(dados)
+        if self.controle:
+            self.controle.gravou(len(comprimido))
+        caminho.parent.mkdir(exist_ok=True)
+        # nome temporário único: duas threads podem gravar o mesmo pedaço ao mesmo tempo
+        temporario = caminho.with_name(f".{uuid.uuid4().hex}.parcial")
+        try:
+            with temporario.open("wb") as arquivo:
+                arquivo.write(comprimido)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            os.replace(temporario, caminho)
+        except BaseException:
+            temporario.unlink(missing_ok=True)
+            raise
+        return len(comprimido)
+
+    def ler_chunk(self, sha: str, tamanho: int) -> bytes:
+        try:
+            dados = self._descomprimir(self._caminho(sha).read_bytes())
+        except FileNotFoundError:
+            raise ErroBackup(f"Pedaço ausente no depósito: {sha}")
+        except Exception as e:  # zlib.error, EOFError, zstandard.ZstdError...
+            raise ErroBackup(f"Pedaço ilegível: {sha} ({e})")
+        if len(dados) != tamanho or hashlib.sha256(dados).hexdigest() != sha:
+            raise ErroBackup(f"Pedaço corrompido: {sha}")
+        return dados
+
+    # -------------------------------------------------------------------------
+    # Gravação
+    # -------------------------------------------------------------------------
+
+    def gravar_arquivo(self, nome: str, blocos) -> ArquivoGerado:
+        """
+        Fatia e grava os blocos; só os pedaços novos vão para o disco (comprimidos
+        em paralelo). `bytes` do resultado = bytes efetivamente acrescentados ao depósito.
+        """
+        gerado = ArquivoGerado(nome=nome)
+        hash_sql = hashlib.sha256()
+        chunks, pendentes = [], deque()
+        novos = 0
+
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="deposito") as executor:
+            for pedaco in fatiar(blocos):
+                hash_sql.update(pedaco)
+                gerado.bytes_sql += len(pedaco)
+                sha = hashlib.sha256(pedaco).hexdigest()
+                chunks.append([sha, len(pedaco)])
+
+                caminho = self._caminho(sha)
+                try:
+                    os.utime(caminho)  # reaproveitado: renova a carência da coleta de lixo
+                    continue
+                except FileNotFoundError:
+                    pass
+                pendentes.append(executor.submit(self._gravar_chunk, caminho, pedaco))
+                while len(pendentes) >= self.threads * 2:
+                    gerado.bytes += pendentes.popleft().result()
+                    novos += 1
+            while pendentes:
+                gerado.bytes += pendentes.popleft().result()
+                novos += 1
+
+        gerado.sha256_sql = hash_sql.hexdigest()
+        gerado.extra = {"chunks_novos": novos, "chunks": chunks}
+        return gerado
+
+    def salvar_backup(self, nome: str, *, banco: str, modo: str, arquivos: list[ArquivoGerado], inicio: float,
+                      **extra) -> dict:
+        """Grava o manifesto: a partir daqui o backup existe (e protege seus pedaços)."""
+        return gravar_manifesto(
+            self.raiz / "backups" / f"{nome}.json",
+            banco=banco,
+            modo=modo,
+            formato=self.formato,
+            arquivos=arquivos,
+            inicio=inicio,
+            nome=nome,
+            **extra,
+        )
+
+    # -------------------------------------------------------------------------
+    # Leitura
+    # -------------------------------------------------------------------------
+
+    def backups(self) -> list[dict]:
+        """Manifestos do mais antigo para o mais recente."""
+        manifestos = [ler_manifesto(p) for p in (self.raiz / "backups").glob("*.json")]
+        return sorted(manifestos, key=lambda m: m["criado_em"])
+
+    def backup(self, nome: str) -> dict:
+        caminho = self.raiz / "backups" / f"{nome}.json"
+        if not caminho.exists():
+            raise ErroBackup(f"Backup não encontrado no depósito: {nome}")
+        return ler_manifesto(caminho)
+
+    def blocos(self, arquivo: dict):
+        """Remonta o arquivo pedaço a pedaço (memória: um pedaço) conferindo os hashes."""
+        hash_sql = hashlib.sha256()
+        for sha, tamanho in arquivo["chunks"]:
+            dados = self.ler_chunk(sha, tamanho)
+            hash_sql.update(dados)
+            yield dados
+        if hash_sql.hexdigest() != arquivo["sha256_sql"]:
+            raise ErroBackup(f"{arquivo['nome']}: SHA-256 remontado não confere com o manifesto.")
+
+    def verificar(self, manifestos: list[dict]) -> list[str]:
+        """Problemas encontrados (vazio = íntegro). Cada pedaço é lido uma vez, mesmo se compartilhado."""
+        problemas, conferidos = [], set()
+        for manifesto in manifestos:
+            for arquivo in manifesto["arquivos"]:
+                if sum(tamanho for _, tamanho in arquivo["chunks"]) != arquivo["bytes_sql"]:
+                    problemas.append(f"{manifesto['nome']}/{arquivo['nome']}: tamanho não confere com os pedaços")
+                for sha, tamanho in arquivo["chunks"]:
+                    if sha in conferidos:
+                        continue
+                    conferidos.add(sha)
+                    try:
+                        self.ler_chunk(sha, tamanho)
+                    except ErroBackup as e:
+                        problemas.append(f"{manifesto['nome']}/{arquivo['nome']}: {e}")
+        return problemas
+
+    # -------------------------------------------------------------------------
+    # Retenção e coleta de lixo
+    # -------------------------------------------------------------------------
+
+    def remover_backups(self, nomes) -> None:
+        for nome in nomes:
+            (self.raiz / "backups" / f"{nome}.json").unlink(missing_ok=True)
+
+    def coletar_lixo(self, *, carencia: timedelta, simular: bool = False) -> tuple[int, int]:
+        """Apaga pedaços não referenciados e mais antigos que `carencia`. Devolve (quantidade, bytes)."""
+        referenciados = {
+            sha for manifesto in self.backups() for arquivo in manifesto["arquivos"] for sha, _ in arquivo["chunks"]
+        }
+        limite = time.time() - carencia.total_seconds()
+        removidos = liberados = 0
+        for caminho in (self.raiz / "chunks").glob("*/*"):
+            sha = caminho.name.split(".")[0]  # temporários (".<uuid>.parcial") dão "" e caem fora
+            if sha in referenciados:
+                continue
+            info = caminho.stat()
+            if info.st_mtime > limite:
+                continue
+            if not simular:
+                caminho.unlink(missing_ok=True)
+            removidos += 1
+            liberados += info.st_size
+        return removidos, liberados
+
+    def uso(self) -> tuple[int, int]:
+        """(quantidade de pedaços, bytes em disco)."""
+        quantidade = tamanho = 0
+        for caminho in (self.raiz / "chunks").glob("*/*"):
+            if not caminho.name.startswith("."):
+                quantidade += 1
+                tamanho += caminho.stat().st_size
+        return quantidade, tamanho
+
+
+def nome_backup(banco: str, quando: datetime | None = None) -> str:
+    return f"{banco}_{(quando or datetime.now()).strftime('%Y-%m-%d_%H-%M-%S')}"
+
+
+def data_do_backup(manifesto: dict) -> datetime:
+    return datetime.fromisoformat(manifesto["criado_em"])
@@ -0,0 +1,178 @@
+"""
+Limites de recursos do backup (para rodar em horário de expediente sem pesar nas
+views):
+
+- teto de bytes/s lidos do dump (o que o MySQL/mysqldump produz) e gravados no
+  disco, por balde de fichas (token bucket) compartilhado entre as threads;
+- prioridade baixa de CPU (nice) e de disco (ionice) para o mysqldump e para o
+  próprio processo (threads de compressão);
+- duração máxima: passado o prazo, o mysqldump é morto, o parcial é apagado e o
+  comando termina com erro.
+
+No Windows nice/ionice não existem e são ignorados; os tetos e o prazo funcionam.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from .pipeline import ErroBackup
+
+FATIA_LEITURA = 256 * 1024  # com teto de leitura, o dump é consumido nesse passo
+
+CLASSES_IONICE = {"best-effort": ["-c2", "-n7"], "idle": ["-c3"]}
+
+
+class TempoEsgotado(ErroBackup):
+    pass
+
+
+class Balde:
+    """Token bucket: até `taxa` bytes/s, com rajada de no máximo 1 s de fichas (começa vazio)."""
+
+    def __init__(self, taxa: float):
+        self.taxa = taxa
+        self._fichas = 0.0
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self, n: int) -> float:
+        """Consome n fichas (pode ficar negativo) e devolve quantos segundos esperar."""
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.taxa, self._fichas + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            self._fichas -= n
+            return max(0.0, -self._fichas / self.taxa)
+
+
+class Controle:
+    def __init__(self, *, leitura_mb: float = 0, escrita_mb: float = 0, nice: int = 0, ionice: str = "",
+                 duracao_maxima: float = 0):
+        self.inicio = time.monotonic()
+        self.prazo = self.inicio + duracao_maxima if duracao_maxima else None
+        self.duracao_maxima = duracao_maxima
+        self.nice = nice if shutil.which("nice") or hasattr(os, "setpriority") else 0
+        self.ionice = ionice if shutil.which("ionice") else ""
+        self._reduzido = False  # nice/ionice do processo são herdados pelos filhos
+        self._leitura = Balde(leitura_mb * 1024 * 1024) if leitura_mb else None
+        self._escrita = Balde(escrita_mb * 1024 * 1024) if escrita_mb else None
+        self._lock = threading.Lock()
+        self.espera = 0.0  # segundos parados pelos tetos (somado entre threads)
+        self.bytes_lidos = 0
+        self.bytes_gravados = 0
+
+    # -------------------------------------------------------------------------
+    # Prazo
+    # -------------------------------------------------------------------------
+
+    def restante(self) -> float | None:
+        return None if self.prazo is None else self.prazo - time.monotonic()
+
+    def verificar(self) -> None:
+        if self.prazo is not None and time.monotonic() >= self.prazo:
+            raise TempoEsgotado(f"Duração máxima de {self.duracao_maxima:.0f}s excedida; backup interrompido.")
+
+    def _esperar(self, balde: Balde, n: int) -> None:
+        segundos = balde.reservar(n)
+        if segundos <= 0:
+            return
+        restante = self.restante()
+        if restante is not None and segundos > restante:
+            time.sleep(max(restante, 0))
+            self.verificar()
+        time.sleep(segundos)
+        with self._lock:
+            self.espera += segundos
+
+    # -------------------------------------------------------------------------
+    # Leitura / escrita
+    # -------------------------------------------------------------------------
+
+    def ler(self, blocos):
+        """Repassa os blocos do dump respeitando o teto de leitura (em fatias) e o prazo."""
+        for bloco in blocos:
+            fatias = [bloco] if self._leitura is None else [
+                bloco[i:i + FATIA_LEITURA] for i in range(0, len(bloco), FATIA_LEITURA)
+            ]
+            for fatia in fatias:
+                self.verificar()
+                if self._leitura is not None:
+                    self._esperar(self._leitura, len(fatia))
+                with self._lock:
+                    self.bytes_lidos += len(fatia)
+                yield fatia
+
+    def gravou(self, n: int) -> None:
+        """Chamado antes de gravar n bytes no disco (thread-safe)."""
+        self.verificar()
+        if self._escrita is not None:
+            self._esperar(self._escrita, n)
+        with self._lock:
+            self.bytes_gravados += n
+
+    def saida(self, arquivo):
+        return _SaidaLimitada(arquivo, self)
+
+    # -------------------------------------------------------------------------
+    # Prioridade
+    # -------------------------------------------------------------------------
+
+    def prefixo_comando(self) -> list[str]:
+        """
+        ionice/nice na frente do processo filho (mysqldump). Prefixo de comando, e não
+        preexec_fn: código Python entre o fork e o exec não é seguro com threads rodando.
+        """
+        if self._reduzido:
+            return []  # o filho herda a prioridade já reduzida do processo
+        prefixo = ["ionice", *CLASSES_IONICE[self.ionice]] if self.ionice else []
+        if self.nice and shutil.which("nice"):
+            prefixo += ["nice", "-n", str(self.nice)]
+        return prefixo
+
+    def reduzir_prioridade(self) -> None:
+        """
+        nice/ionice no próprio processo: as threads de compressão também cedem a vez.
+        Chame antes de criar as threads (no Linux a prioridade é por thread e é herdada
+        por quem ela cria). setpriority fixa o valor (nunca aumenta a prioridade).
+        """
+        if self.nice and hasattr(os, "setpriority"):
+            atual = os.getpriority(os.PRIO_PROCESS, 0)
+            os.setpriority(os.PRIO_PROCESS, 0, max(atual, self.nice))
+        if self.ionice:
+            subprocess.run(
+                ["ionice", *CLASSES_IONICE[self.ionice], "-p", str(os.getpid())],
+                check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        self._reduzido = True
+
+    # -------------------------------------------------------------------------
+    # Relatório
+    # -------------------------------------------------------------------------
+
+    def resumo(self) -> str:
+        duracao = max(time.monotonic() - self.inicio, 1e-6)
+        mb = 1024 * 1024
+        return (
+            f"lido {self.bytes_lidos / mb / duracao:.1f} MB/s, gravado {self.bytes_gravados / mb / duracao:.1f} MB/s; "
+            f"em espera pelos limites: {self.espera:.1f}s"
+        )
+
+
+class _SaidaLimitada:
+    def __init__(self, arquivo, controle: Controle):
+        self._arquivo = arquivo
+        self._controle = controle
+
+    def write(self, dados) -> int:
+        self._controle.gravou(len(dados))
+        return self._arquivo.write(dados)
+
+    def flush(self) -> None:
+        self._arquivo.flush()
+
+    def fileno(self) -> int:
+        return self._arquivo.fileno()
@@ -0,0 +1,361 @@
+"""
+Dump por tabela em paralelo (consistente) e restauração em paralelo, direto pelo
+driver (mysqlclient), sem mysqldump.
+
+Consistência (mesma técnica do mydumper): com FLUSH TABLES WITH READ LOCK
+(exige o privilégio RELOAD) abrimos N sessões com START TRANSACTION WITH
+CONSISTENT SNAPSHOT, anotamos a posição do binlog/GTID e liberamos a trava.
+A trava dura só a abertura das sessões; todas leem o mesmo instante do banco.
+
+Formato: um arquivo por tabela só com INSERTs, um comando por linha (os literais
+vêm escapados pelo driver, sem quebras de linha). O CREATE TABLE e a contagem de
+linhas ficam no manifesto; na restauração, índices secundários e FKs são
+criados depois da carga.
+
+Só tabelas (BASE TABLE): procedures, triggers, events e views ficam no modo
+padrão do backup_db (mysqldump).
+"""
+from __future__ import annotations
+
+import hashlib
+import queue
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .compressao import EXTENSOES, TAMANHO_BLOCO, abrir_leitura
+from .pipeline import ArquivoGerado, ErroBackup, gravar_blocos
+
+LINHAS_POR_LEITURA = 1000
+BYTES_POR_INSERT = 1024 * 1024  # bem abaixo do max_allowed_packet padrão (64 MB)
+# Depois de BYTES_POR_INSERT // 4, o INSERT termina na linha cujo hash % N == 0: a quebra
+# depende do conteúdo, não da posição, e dumps seguidos deduplicam no depósito.
+DIVISOR_INSERT = 1024
+
+
+def conectar(db: dict, *, banco: str | None = None):
+    """Conexão mysqlclient a partir de settings.DATABASES[...]."""
+    import MySQLdb
+
+    conexao = MySQLdb.connect(
+        host=db.get("HOST") or "localhost",
+        port=int(db.get("PORT") or 3306),
+        user=db.get("USER"),
+        passwd=db.get("PASSWORD") or "",
+        db=banco or db.get("NAME"),
+        charset="utf8mb4",
+    )
+    with conexao.cursor() as cur:
+        # DATETIME não muda com o fuso; TIMESTAMP sim: dump e restauração sempre em UTC
+        cur.execute("SET time_zone = '+00:00'")
+    return conexao
+
+
+def _nome(tabela: str) -> str:
+    return "`" + tabela.replace("`", "``") + "`"
+
+
+# =============================================================================
+# Snapshot consistente
+# =============================================================================
+
+def _posicao_binlog(cur) -> dict:
+    posicao = {}
+    for sql in ("SHOW BINARY LOG STATUS", "SHOW MASTER STATUS"):  # MySQL 8.4+ / anteriores e MariaDB
+        try:
+            cur.execute(sql)
+        except Exception:
+            continue
+        row = cur.fetchone()
+        if row:
+            posicao.update(arquivo=row[0], posicao=int(row[1]))
+        break
+    for sql in ("SELECT @@GLOBAL.gtid_executed", "SELECT @@GLOBAL.gtid_current_pos"):  # MySQL / MariaDB
+        try:
+            cur.execute(sql)
+        except Exception:
+            continue
+        gtid = (cur.fetchone() or [""])[0]
+        if gtid:
+            posicao["gtid"] = gtid
+        break
+    return posicao
+
+
+def abrir_sessoes_consistentes(db: dict, quantidade: int) -> tuple[list, dict]:
+    """N conexões no mesmo snapshot + a posição do binlog/GTID desse instante."""
+    principal = conectar(db)
+    sessoes = []
+    try:
+        with principal.cursor() as cur:
+            try:
+                cur.execute("FLUSH TABLES WITH READ LOCK")
+            except Exception as e:
+                raise ErroBackup(
+                    f"Não foi possível obter a trava global ({e}). O modo por tabela exige o privilégio RELOAD."
+                )
+            try:
+                for _ in range(quantidade):
+                    sessao = conectar(db)
+                    with sessao.cursor() as scur:
+                        scur.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                        scur.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+                    sessoes.append(sessao)
+                snapshot = _posicao_binlog(cur)
+            finally:
+                cur.execute("UNLOCK TABLES")
+    except BaseException:
+        for sessao in sessoes:
+            sessao.close()
+        raise
+    finally:
+        principal.close()
+    return sessoes, snapshot
+
+
+def listar_tabelas(sessao) -> list[str]:
+    """Tabelas do banco, da maior para a menor (as grandes começam primeiro)."""
+    with sessao.cursor() as cur:
+        cur.execute(
+            """
+            SELECT TABLE_NAME FROM information_schema.TABLES
+             WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+             ORDER BY DATA_LENGTH + INDEX_LENGTH DESC, TABLE_NAME
+            """
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+# =============================================================================
+# Dump
+# =============================================================================
+
+def _linhas_insert(sessao, tabela: str, contador: list):
+    """INSERTs de até BYTES_POR_INSERT, um por linha, lendo a tabela em streaming (SSCursor)."""
+    import MySQLdb.cursors
+
+    prefixo = b"INSERT INTO " + _nome(tabela).encode() + b" VALUES "
+    cur = MySQLdb.cursors.SSCursor(sessao)
+    try:
+        cur.execute(f"SELECT * FROM {_nome(tabela)}")
+        valores, tamanho = [], 0
+        while True:
+            rows = cur.fetchmany(LINHAS_POR_LEITURA)
+            if not rows:
+                break
+            for row in rows:
+                literal = sessao.literal(row)
+                valores.append(literal)
+                tamanho += len(literal) + 1
+                if tamanho >= BYTES_POR_INSERT or (
+                    tamanho >= BYTES_POR_INSERT // 4 and zlib.crc32(literal) % DIVISOR_INSERT == 0
+                ):
+                    contador[0] += len(valores)
+                    yield prefixo + b",".join(valores) + b";\n"
+                    valores, tamanho = [], 0
+        if valores:
+            contador[0] += len(valores)
+            yield prefixo + b",".join(valores) + b";\n"
+    finally:
+        cur.close()
+
+
+def gravar_em_diretorio(diretorio: Path, *, formato: str, threads: int, nivel: int | None = None, controle=None):
+    """Destino padrão do dump_paralelo: <diretorio>/<tabela>.sql[.zst|.gz]."""
+    def gravar(tabela: str, blocos) -> ArquivoGerado:
+        destino = diretorio / f"{tabela}.sql{EXTENSOES[formato]}"
+        return gravar_blocos(blocos, destino, formato=formato, threads=threads, nivel=nivel, controle=controle)
+    return gravar
+
+
+def dump_tabela(sessao, tabela: str, gravar, controle=None) -> ArquivoGerado:
+    with sessao.cursor() as cur:
+        cur.execute(f"SHOW CREATE TABLE {_nome(tabela)}")
+        ddl = cur.fetchone()[1]
+
+    contador = [0]
+    blocos = _linhas_insert(sessao, tabela, contador)
+    gerado = gravar(tabela, controle.ler(blocos) if controle else blocos)
+    gerado.extra.update(tabela=tabela, linhas=contador[0], ddl=ddl)
+    return gerado
+
+
+def dump_paralelo(db: dict, gravar, *, paralelo: int, progresso=None,
+                  controle=None) -> tuple[list[ArquivoGerado], dict]:
+    """
+    Um arquivo por tabela, `paralelo` tabelas ao mesmo tempo, todas no mesmo snapshot.
+    `gravar(tabela, blocos) -> ArquivoGerado` decide o destino (diretório ou depósito);
+    `controle` (limites.Controle) aplica o teto de leitura e o prazo.
+    """
+    sessoes, snapshot = abrir_sessoes_consistentes(db, paralelo)
+    livres: queue.Queue = queue.Queue()
+    for sessao in sessoes:
+        livres.put(sessao)
+
+    def _tarefa(tabela):
+        sessao = livres.get()
+        try:
+            gerado = dump_tabela(sessao, tabela, gravar, controle)
+        finally:
+            livres.put(sessao)
+        if progresso:
+            progresso(gerado)
+        return gerado
+
+    try:
+        tabelas = listar_tabelas(sessoes[0])
+        with ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix="dump") as executor:
+            gerados = list(executor.map(_tarefa, tabelas))
+    finally:
+        for sessao in sessoes:
+            sessao.close()
+    return gerados, snapshot
+
+
+# =============================================================================
+# Restauração
+# =============================================================================
+
+_INDICE = re.compile(r"^(UNIQUE |FULLTEXT |SPATIAL )?KEY ")
+_AUTO_INCREMENT = re.compile(r"^`((?:[^`]|``)+)` .*AUTO_INCREMENT")
+_PRIMEIRA_COLUNA = re.compile(r"\(`((?:[^`]|``)+)`")
+
+
+@dataclass
+class DDLSeparada:
+    create: str
+    indices: list[str] = field(default_factory=list)
+    fks: list[str] = field(default_factory=list)
+
+
+def separar_ddl(ddl: str) -> DDLSeparada:
+    """
+    CREATE TABLE só com colunas, PK e CHECKs; índices secundários e FKs à parte,
+    para criar depois da carga (carregar sem eles é bem mais rápido).
+    """
+    linhas = ddl.split("\n")
+    fim = next(i for i in range(1, len(linhas)) if linhas[i].startswith(")"))
+    corpo = [linha.strip().rstrip(",") for linha in linhas[1:fim]]
+
+    auto_increment = None
+    for definicao in corpo:
+        m = _AUTO_INCREMENT.match(definicao)
+        if m:
+            auto_increment = m.group(1)
+
+    mantidas, separada = [], DDLSeparada(create="")
+    for definicao in corpo:
+        if _INDICE.match(definicao):
+            primeira = _PRIMEIRA_COLUNA.search(definicao)
+            # coluna AUTO_INCREMENT precisa de índice já no CREATE
+            if auto_increment and primeira and primeira.group(1) == auto_increment:
+                mantidas.append(definicao)
+            else:
+                separada.indices.append(definicao)
+        elif definicao.startswith("CONSTRAINT ") and " FOREIGN KEY " in definicao:
+            separada.fks.append(definicao)
+        else:
+            mantidas.append(definicao)
+
+    separada.create = "\n".join([linhas[0], ",\n".join("  " + d for d in mantidas), *linhas[fim:]])
+    return separada
+
+
+def _preparar_sessao(conexao) -> None:
+    with conexao.cursor() as cur:
+        cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cur.execute("SET UNIQUE_CHECKS = 0")
+        cur.execute("SET SESSION sql_mode = 'NO_AUTO_VALUE_ON_ZERO'")
+
+
+def _linhas(entrada):
+    """Linhas (com o \\n) lendo em blocos: o leitor zstd não é iterável por linha."""
+    resto = b""
+    for bloco in iter(lambda: entrada.read(TAMANHO_BLOCO), b""):
+        partes = (resto + bloco).split(b"\n")
+        resto = partes.pop()
+        for parte in partes:
+            yield parte + b"\n"
+    if resto:
+        yield resto
+
+
+def carregar_tabela(db: dict, banco: str, diretorio: Path, arquivo: dict) -> int:
+    """Executa os INSERTs do arquivo (streaming) e confere o SHA-256 do SQL lido."""
+    conexao = conectar(db, banco=banco)
+    hash_sql = hashlib.sha256()
+    try:
+        _preparar_sessao(conexao)
+        with abrir_leitura(diretorio / arquivo["nome"]) as entrada, conexao.cursor() as cur:
+            for linha in _linhas(entrada):
+                hash_sql.update(linha)
+                cur.execute(linha.rstrip(b";\n"))
+        conexao.commit()
+    finally:
+        conexao.close()
+
+    if hash_sql.hexdigest() != arquivo["sha256_sql"]:
+        raise ErroBackup(f"{arquivo['nome']}: SHA-256 do conteúdo não confere com o manifesto.")
+    return arquivo["linhas"]
+
+
+def restaurar_paralelo(db: dict, banco: str, diretorio: Path, manifesto: dict, *, paralelo: int,
+                       progresso=None) -> dict[str, tuple[int, int]]:
+    """
+    1) recria as tabelas sem índices secundários/FKs; 2) carrega em paralelo;
+    3) recria os índices (em paralelo, por tabela); 4) recria as FKs; 5) confere as contagens.
+    Devolve {tabela: (esperado, encontrado)}.
+    """
+    arquivos = manifesto["arquivos"]
+    ddls = {a["tabela"]: separar_ddl(a["ddl"]) for a in arquivos}
+
+    conexao = conectar(db, banco=banco)
+    try:
+        _preparar_sessao(conexao)
+        with conexao.cursor() as cur:
+            for tabela, ddl in ddls.items():
+                cur.execute(f"DROP TABLE IF EXISTS {_nome(tabela)}")
+                cur.execute(ddl.create)
+    finally:
+        conexao.close()
+
+    def _carregar(arquivo):
+        linhas = carregar_tabela(db, banco, diretorio, arquivo)
+        if progresso:
+            progresso(f"{arquivo['tabela']}: {linhas} linha(s) carregadas")
+
+    def _indices(tabela):
+        ddl = ddls[tabela]
+        if not ddl.indices:
+            return
+        conexao = conectar(db, banco=banco)
+        try:
+            _preparar_sessao(conexao)
+            with conexao.cursor() as cur:
+                cur.execute(f"ALTER TABLE {_nome(tabela)} " + ", ".join(f"ADD {i}" for i in ddl.indices))
+        finally:
+            conexao.close()
+        if progresso:
+            progresso(f"{tabela}: {len(ddl.indices)} índice(s) recriados")
+
+    with ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix="restore") as executor:
+        list(executor.map(_carregar, arquivos))
+        list(executor.map(_indices, ddls))
+
+    conexao = conectar(db, banco=banco)
+    try:
+        _preparar_sessao(conexao)
+        with conexao.cursor() as cur:
+            for tabela, ddl in ddls.items():
+                if ddl.fks:
+                    cur.execute(f"ALTER TABLE {_nome(tabela)} " + ", ".join(f"ADD {fk}" for fk in ddl.fks))
+
+            contagens = {}
+            for arquivo in arquivos:
+                cur.execute(f"SELECT COUNT(*) FROM {_nome(arquivo['tabela'])}")
+                contagens[arquivo["tabela"]] = (arquivo["linhas"], cur.fetchone()[0])
+    finally:
+        conexao.close()
+    return contagens
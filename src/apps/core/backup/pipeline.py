@@ -0,0 +1,191 @@
+"""
+Dump em streaming: stdout do mysqldump -> compressão -> arquivo temporário -> rename.
+
+O SHA-256 do SQL e do arquivo final são calculados durante a gravação (nada é
+relido do disco) e vão para o manifesto JSON gravado ao lado do backup.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from .compressao import TAMANHO_BLOCO, abrir_compressor
+
+VERSAO_MANIFESTO = 1
+
+
+class ErroBackup(Exception):
+    pass
+
+
+@dataclass
+class ArquivoGerado:
+    nome: str
+    bytes: int = 0
+    sha256: str = ""
+    bytes_sql: int = 0
+    sha256_sql: str = ""
+    extra: dict = field(default_factory=dict)
+
+    def como_dict(self) -> dict:
+        dados = asdict(self)
+        dados.update(dados.pop("extra"))
+        return dados
+
+
+class SaidaComHash:
+    """Repassa write() para o arquivo contando bytes e atualizando o SHA-256."""
+
+    def __init__(self, arquivo):
+        self._arquivo = arquivo
+        self._hash = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, dados) -> int:
+        self._hash.update(dados)
+        self.bytes += len(dados)
+        return self._arquivo.write(dados)
+
+    def flush(self) -> None:
+        self._arquivo.flush()
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+@contextmanager
+def gravacao_atomica(destino: Path):
+    """
+    Grava em ".<nome>.parcial" no mesmo diretório e só renomeia no final (após fsync).
+    Em erro/interrupção o parcial é apagado: nunca fica um backup truncado com nome válido.
+    """
+    parcial = destino.with_name(f".{destino.name}.parcial")
+    try:
+        with parcial.open("wb") as arquivo:
+            yield arquivo
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(parcial, destino)
+    except BaseException:
+        parcial.unlink(missing_ok=True)
+        raise
+
+
+def gravar_blocos(blocos, destino: Path, *, formato: str, threads: int, nivel: int | None = None,
+                  controle=None) -> ArquivoGerado:
+    """
+    Grava os blocos (bytes) comprimidos em `destino`, atomicamente.
+    `controle` (limites.Controle) aplica o teto de escrita e o prazo.
+    """
+    gerado = ArquivoGerado(nome=destino.name)
+    hash_sql = hashlib.sha256()
+
+    with gravacao_atomica(destino) as arquivo:
+        saida = SaidaComHash(controle.saida(arquivo) if controle else arquivo)
+        compressor = abrir_compressor(formato, saida, threads=threads, nivel=nivel)
+        try:
+            for bloco in blocos:
+                hash_sql.update(bloco)
+                gerado.bytes_sql += len(bloco)
+                compressor.write(bloco)
+        finally:
+            compressor.close()
+
+    gerado.bytes = saida.bytes
+    gerado.sha256 = saida.hexdigest()
+    gerado.sha256_sql = hash_sql.hexdigest()
+    return gerado
+
+
+@contextmanager
+def saida_do_comando(cmd: list[str], *, env: dict, controle=None):
+    """
+    Blocos (TAMANHO_BLOCO) do stdout de `cmd`. Se o processo terminar com erro,
+    ErroBackup com o stderr dele ao sair do bloco `with`.
+
+    Com `controle` (limites.Controle): nice/ionice no processo, leitura com teto
+    e, se houver prazo, o processo é morto quando ele vence (TempoEsgotado).
+    """
+    if controle:
+        cmd = controle.prefixo_comando() + cmd
+    with tempfile.TemporaryFile() as erros:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=erros, env=env)
+        # mata o dump parado (sem bytes, ninguém confere o prazo no laço de leitura)
+        restante = controle.restante() if controle else None
+        cronometro = threading.Timer(max(restante, 0), proc.kill) if restante is not None else None
+        if cronometro:
+            cronometro.daemon = True
+            cronometro.start()
+        blocos = iter(lambda: proc.stdout.read(TAMANHO_BLOCO), b"")
+        try:
+            yield controle.ler(blocos) if controle else blocos
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            proc.stdout.close()
+            if cronometro:
+                cronometro.cancel()
+
+        if proc.wait() != 0:
+            if controle:
+                controle.verificar()
+            erros.seek(0)
+            raise ErroBackup(erros.read().decode(errors="ignore").strip() or f"Falha em {Path(cmd[0]).name}.")
+
+
+def executar_dump(cmd: list[str], destino: Path, *, env: dict, formato: str, threads: int,
+                  nivel: int | None = None, controle=None) -> ArquivoGerado:
+    """Roda `cmd` (mysqldump) e grava o stdout em `destino` pelo pipeline."""
+    try:
+        with saida_do_comando(cmd, env=env, controle=controle) as blocos:
+            gerado = gravar_blocos(blocos, destino, formato=formato, threads=threads, nivel=nivel, controle=controle)
+    except ErroBackup:
+        destino.unlink(missing_ok=True)
+        raise
+    return gerado
+
+
+# =============================================================================
+# Manifesto
+# =============================================================================
+
+def caminho_manifesto(diretorio: Path, base: str) -> Path:
+    return diretorio / f"{base}.json"
+
+
+def gravar_manifesto(caminho: Path, *, banco: str, modo: str, formato: str, arquivos: list[ArquivoGerado],
+                     inicio: float, **extra) -> dict:
+    manifesto = {
+        "versao": VERSAO_MANIFESTO,
+        "banco": banco,
+        "modo": modo,
+        "formato": formato,
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+        "duracao_s": round(time.monotonic() - inicio, 3),
+        **extra,
+        "arquivos": [a.como_dict() for a in arquivos],
+    }
+    with gravacao_atomica(caminho) as arquivo:
+        arquivo.write(json.dumps(manifesto, ensure_ascii=False, indent=2).encode("utf-8"))
+    return manifesto
+
+
+def ler_manifesto(caminho: Path) -> dict:
+    try:
+        manifesto = json.loads(Path(caminho).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        raise ErroBackup(f"Manifesto ilegível: {caminho} ({e})")
+    if manifesto.get("versao") != VERSAO_MANIFESTO:
+        raise ErroBackup(f"Versão de manifesto não suportada: {manifesto.get('versao')}")
+    return manifesto
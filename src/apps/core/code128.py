@@ -0,0 +1,81 @@
+"""
+Código de barras Code 128 (subconjunto B) em SVG, sem dependências.
+
+Cobre ASCII 32..126, o suficiente para "0123/26". Leitores comuns (teclado/USB)
+devolvem o texto lido seguido de Enter.
+
+    from core.code128 import svg_code128
+    svg = svg_code128("0123/26", altura=40)
+"""
+from __future__ import annotations
+
+from xml.sax.saxutils import escape
+
+# Larguras barra/espaço/barra/espaço/barra/espaço de cada símbolo (0..105) e do STOP (106)
+PADROES = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312", "132212", "221213",
+    "221312", "231212", "112232", "122132", "122231", "113222", "123122", "123221", "223211", "221132",
+    "221231", "213212", "223112", "312131", "311222", "321122", "321221", "312212", "322112", "322211",
+    "212123", "212321", "232121", "111323", "131123", "131321", "112313", "132113", "132311", "211313",
+    "231113", "231311", "112133", "112331", "132131", "113123", "113321", "133121", "313121", "211331",
+    "231131", "213113", "213311", "213131", "311123", "311321", "331121", "312113", "312311", "332111",
+    "314111", "221411", "431111", "111224", "111422", "121124", "121421", "141122", "141221", "112214",
+    "112412", "122114", "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111",
+    "111242", "121142", "121241", "114212", "124112", "124211", "411212", "421112", "421211", "212141",
+    "214121", "412121", "111143", "111341", "131141", "114113", "114311", "411113", "411311", "113141",
+    "114131", "311141", "411131", "211412", "211214", "211232", "2331112",
+)
+START_B = 104
+STOP = 106
+ZONA_QUIETA = 10  # módulos de margem em cada lado (exigido pelos leitores)
+
+
+def codificar(texto: str) -> list[int]:
+    """Símbolos Code 128-B (start + dados + checksum + stop)."""
+    simbolos = [START_B]
+    for ch in texto:
+        codigo = ord(ch)
+        if not 32 <= codigo <= 126:
+            raise ValueError(f"Caractere não suportado no Code 128-B: {ch!r}")
+        simbolos.append(codigo - 32)
+
+    checksum = simbolos[0] + sum(pos * valor for pos, valor in enumerate(simbolos[1:], start=1))
+    simbolos.append(checksum % 103)
+    simbolos.append(STOP)
+    return simbolos
+
+
+def modulos(texto: str) -> list[tuple[int, int]]:
+    """Barras como (início, largura) em módulos, já com a zona quieta à esquerda."""
+    barras = []
+    x = ZONA_QUIETA
+    for simbolo in codificar(texto):
+        for i, largura in enumerate(PADROES[simbolo]):
+            largura = int(largura)
+            if i % 2 == 0:  # posições pares são barras; ímpares, espaços
+                barras.append((x, largura))
+            x += largura
+    return barras
+
+
+def svg_code128(texto: str, *, altura: int = 40, modulo: float = 1.5, legenda: bool = True) -> str:
+    """SVG inline (sem cabeçalho XML) pronto para colocar no HTML."""
+    barras = modulos(texto)
+    fim = barras[-1][0] + barras[-1][1]
+    largura_total = (fim + ZONA_QUIETA) * modulo
+    altura_total = altura + (14 if legenda else 0)
+
+    rects = "".join(
+        f'<rect x="{x * modulo:g}" y="0" width="{w * modulo:g}" height="{altura}"/>'
+        for x, w in barras
+    )
+    texto_svg = (
+        f'<text x="{largura_total / 2:g}" y="{altura_total - 2}" font-family="monospace" '
+        f'font-size="12" text-anchor="middle">{escape(texto)}</text>'
+        if legenda else ""
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{largura_total:g}" height="{altura_total}" '
+        f'viewBox="0 0 {largura_total:g} {altura_total}" role="img" aria-label="{escape(texto)}">'
+        f'<g fill="#000">{rects}</g>{texto_svg}</svg>'
+    )
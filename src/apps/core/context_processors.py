@@ -1,9 +1,7 @@
 import time
 from django.conf import settings
-from django.db.models import Q
 
-from protocolos.models import Processo, Departamento
-from protocolos.utils import setor_esta_pendente_de_recebimento
+from protocolos.services import caixa_service
 
 
 def session_time_left(request):
@@ -32,7 +30,8 @@ def session_time_left(request):
 def caixa_entrada_counter(request):
     """
     Contador de processos pendentes de recebimento para mostrar no layout.
-    Atenção: esta abordagem ainda faz loop, mas reduz carga quando possível.
+    Uma consulta de contagem (mesmo recorte da Caixa de Entrada), em cache
+    até a próxima mudança da caixa (versoes.versao_caixa).
     """
     if not request.user.is_authenticated:
         return {"caixa_entrada_qtd": 0}
@@ -41,34 +40,9 @@ def caixa_entrada_counter(request):
     papel = getattr(perfil, "papel", "CONSULTA")
     eh_admin = (papel == "ADMIN")
 
-    # Usuário não-admin: pega setores onde é responsável/substituto
-    setores_ids = []
-    if not eh_admin:
-        setores_ids = list(
-            Departamento.objects.filter(
-                Q(responsavel_id=request.user.id) | Q(substituto_id=request.user.id)
-            ).values_list("id", flat=True)
-        )
-        if not setores_ids:
-            return {"caixa_entrada_qtd": 0}
+    return {"caixa_entrada_qtd": caixa_service.total_pendentes_do_menu(request.user, eh_admin=eh_admin)}
 
-    # Carrega processos com o mínimo de dados (evita peso de objetos grandes)
-    # Obs: setor_esta_pendente_de_recebimento provavelmente consulta movimentações,
-    # então aqui a redução é modesta, mas já ajuda.
-    qs = Processo.objects.all().only("id", "status", "recebido_em", "recebido_por_id")
 
-    qtd = 0
-    for p in qs:
-        pendente, setor_atual = setor_esta_pendente_de_recebimento(p)
-
-        if not pendente:
-            continue
-
-        if eh_admin:
-            qtd += 1
-            continue
-
-        if setor_atual and setor_atual.id in setores_ids:
-            qtd += 1
-
-    return {"caixa_entrada_qtd": qtd}
+def caixa_entrada_sse(request):
+    """Liga o feed ao vivo (SSE) da caixa de entrada nos templates (só faz sentido sob ASGI)."""
+    return {"caixa_entrada_sse": request.user.is_authenticated and getattr(settings, "CAIXA_ENTRADA_SSE", False)}
@@ -0,0 +1,122 @@
+"""
+Réplica de leitura opcional (DATABASES["replica"]).
+
+Só vão para a réplica as LEITURAS das views marcadas com @leitura_na_replica
+(listas, dashboards, caixa de entrada, API de consulta). Todo o resto, inclusive
+worker e comandos, continua no primário.
+
+Ler o que acabou de escrever: quando uma requisição grava algo (tramitação,
+recebimento, cadastro...), o ReplicaMiddleware fixa a sessão no primário por
+REPLICA_JANELA_PRIMARIO segundos; dentro da própria requisição, depois da
+primeira escrita, as leituras também voltam para o primário.
+
+    from core.db_router import leitura_na_replica
+
+    @leitura_na_replica
+    @login_required
+    def processos_list(request): ...
+"""
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+REPLICA = "replica"
+CHAVE_SESSAO = "primario_ate"
+
+# sessão, usuário, perfil e token: tabelas pequenas que precisam estar sempre atuais
+# (login, permissão, revogação). Leem do primário e não fixam a sessão ao gravar.
+APPS_SO_PRIMARIO = frozenset({"sessions", "auth", "accounts", "contenttypes"})
+
+
+class EstadoRequisicao:
+    __slots__ = ("usar_replica", "escreveu")
+
+    def __init__(self):
+        self.usar_replica = False
+        self.escreveu = False
+
+
+_estado: ContextVar[EstadoRequisicao | None] = ContextVar("estado_replica", default=None)
+
+
+def replica_configurada() -> bool:
+    return REPLICA in connections.settings
+
+
+def leitura_na_replica(view):
+    """Marca a view como só-leitura: suas consultas podem ir para a réplica."""
+    view.leitura_na_replica = True  # os decorators de fora (wraps) copiam o atributo
+    return view
+
+
+# =============================================================================
+# Router
+# =============================================================================
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if (
+            estado is not None
+            and estado.usar_replica
+            and not estado.escreveu
+            and model._meta.app_label not in APPS_SO_PRIMARIO
+        ):
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None and model._meta.app_label not in APPS_SO_PRIMARIO:
+            estado.escreveu = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # mesma base de dados (a réplica é cópia do primário)
+        return True
+
+
+# =============================================================================
+# Middleware
+# =============================================================================
+
+class ReplicaMiddleware:
+    """
+    Depois de SessionMiddleware/AuthenticationMiddleware.
+    Sem DATABASES["replica"], não faz nada.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.ativo = replica_configurada()
+        self.janela = getattr(settings, "REPLICA_JANELA_PRIMARIO", 15)
+
+    def __call__(self, request):
+        if not self.ativo:
+            return self.get_response(request)
+
+        estado = EstadoRequisicao()
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+
+        session = getattr(request, "session", None)
+        if estado.escreveu and session is not None:
+            session[CHAVE_SESSAO] = int(time.time()) + self.janela
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        estado = _estado.get()
+        if estado is None or not getattr(view_func, "leitura_na_replica", False):
+            return None
+
+        session = getattr(request, "session", None)
+        fixado_ate = session.get(CHAVE_SESSAO) if session is not None else None
+        estado.usar_replica = not fixado_ate or int(fixado_ate) < time.time()
+        return None
@@ -0,0 +1,246 @@
+"""
+Fila de jobs no banco.
+
+Registro de tarefas:
+
+    # apps/<app>/tarefas.py (descoberto automaticamente pelo worker)
+    from core.jobs import tarefa
+
+    @tarefa("protocolos.enviar_notificacoes")
+    def enviar_notificacoes(**payload):
+        ...
+
+Enfileirar (views, signals, services):
+
+    from core.jobs import enfileirar
+    enfileirar("protocolos.enviar_notificacoes", {"ids": [1, 2]})
+
+O job é gravado na transação corrente: se a request der rollback, o job some junto.
+"""
+from __future__ import annotations
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import NullIf
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Backoff exponencial: BASE * 2^(tentativa-1), limitado a MAX (segundos)
+BACKOFF_BASE = getattr(settings, "JOBS_BACKOFF_BASE", 30)
+BACKOFF_MAX = getattr(settings, "JOBS_BACKOFF_MAX", 60 * 60)
+
+# Job EXECUTANDO sem batimento do worker há mais que isso é órfão (worker morreu) e volta
+# para a fila. O worker renova a cada LEASE/4, então job longo vivo nunca é devolvido.
+LEASE = getattr(settings, "JOBS_LEASE", 2 * 60)
+INTERVALO_BATIMENTO = max(LEASE / 4, 1)
+
+_tarefas: dict[str, dict] = {}
+
+
+class TarefaDesconhecida(Exception):
+    pass
+
+
+# =============================================================================
+# Registro
+# =============================================================================
+
+def tarefa(nome: str, *, max_tentativas: int = 5):
+    """Decorator que registra uma função como tarefa de job (recebe o payload como kwargs)."""
+    def decorator(func):
+        _tarefas[nome] = {"func": func, "max_tentativas": max_tentativas}
+        return func
+    return decorator
+
+
+def descobrir_tarefas() -> None:
+    """Importa <app>.tarefas de cada app instalado (como o admin faz com admin.py)."""
+    autodiscover_modules("tarefas")
+
+
+def tarefas_registradas() -> list[str]:
+    return sorted(_tarefas)
+
+
+# =============================================================================
+# Enfileirar
+# =============================================================================
+
+def enfileirar(
+    nome: str,
+    payload: dict | None = None,
+    *,
+    prioridade: int = 0,
+    atraso: int | timedelta | None = None,
+    chave: str = "",
+    max_tentativas: int | None = None,
+) -> Job:
+    """
+    Cria um Job PENDENTE. `atraso` em segundos (ou timedelta) adia a execução.
+    Com `chave`, reaproveita um job PENDENTE igual em vez de duplicar: o UNIQUE de
+    chave_pendente decide (sem SELECT-then-INSERT), também entre requests simultâneas.
+    """
+    if isinstance(atraso, int):
+        atraso = timedelta(seconds=atraso)
+
+    if max_tentativas is None:
+        max_tentativas = _tarefas.get(nome, {}).get("max_tentativas", 5)
+
+    job = Job(
+        tarefa=nome,
+        payload=payload or {},
+        prioridade=prioridade,
+        executar_apos=timezone.now() + (atraso or timedelta()),
+        chave=chave,
+        chave_pendente=chave or None,
+        max_tentativas=max_tentativas,
+    )
+    if not chave:
+        job.save(force_insert=True)
+        return job
+
+    while True:
+        try:
+            with transaction.atomic():
+                job.save(force_insert=True)
+            return job
+        except IntegrityError:
+            job.pk = None
+            job._state.adding = True
+            existente = Job.objects.filter(chave_pendente=chave).first()
+            if existente:
+                return existente
+            # o PENDENTE foi reivindicado entre o INSERT e a leitura: a chave está livre de novo
+
+
+# =============================================================================
+# Worker
+# =============================================================================
+
+def reivindicar(worker: str, limite: int = 1) -> list[Job]:
+    """
+    Pega até `limite` jobs prontos. SKIP LOCKED faz cada worker pular as linhas
+    já travadas por outro, então vários processos consomem a fila sem se bloquear.
+    """
+    agora = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.PENDENTE, executar_apos__lte=agora)
+            .order_by("-prioridade", "executar_apos", "id")[:limite]
+        )
+        if not jobs:
+            return []
+
+        Job.objects.filter(pk__in=[j.pk for j in jobs]).update(
+            status=Job.Status.EXECUTANDO,
+            iniciado_em=agora,
+            batimento_em=agora,
+            worker=worker,
+            tentativas=F("tentativas") + 1,
+            chave_pendente=None,
+        )
+
+    for job in jobs:
+        job.status = Job.Status.EXECUTANDO
+        job.iniciado_em = agora
+        job.batimento_em = agora
+        job.worker = worker
+        job.tentativas += 1
+        job.chave_pendente = None
+    return jobs
+
+
+def renovar(workers: list[str]) -> int:
+    """Batimento: renova o lease dos jobs EXECUTANDO destes workers (chamado a cada INTERVALO_BATIMENTO)."""
+    return Job.objects.filter(status=Job.Status.EXECUTANDO, worker__in=workers).update(batimento_em=timezone.now())
+
+
+def _devolver_para_fila(qs, **campos) -> bool:
+    """
+    Volta o job (qs de uma linha) para PENDENTE retomando a chave de deduplicação.
+    Se enquanto ele rodava entrou outro PENDENTE com a mesma chave, esse já cobre o
+    trabalho: este encerra como FALHOU em vez de duplicar. Devolve se voltou para a fila.
+    """
+    try:
+        with transaction.atomic():
+            return bool(qs.update(status=Job.Status.PENDENTE, chave_pendente=NullIf(F("chave"), Value("")), **campos))
+    except IntegrityError:
+        motivo = campos.get("erro") or "Worker interrompido durante a execução."
+        qs.update(
+            status=Job.Status.FALHOU,
+            concluido_em=timezone.now(),
+            erro=f"{motivo}\nNão voltou para a fila: já há um job pendente com a mesma chave.",
+        )
+        return False
+
+
+def _backoff(tentativa: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_BASE * 2 ** (tentativa - 1), BACKOFF_MAX))
+
+
+def executar(job: Job) -> bool:
+    """Roda um job já reivindicado. Falha com tentativas sobrando volta para a fila com backoff."""
+    try:
+        registro = _tarefas.get(job.tarefa)
+        if not registro:
+            raise TarefaDesconhecida(f"Tarefa não registrada: {job.tarefa}")
+
+        resultado = registro["func"](**(job.payload or {}))
+    except Exception:
+        erro = traceback.format_exc()
+        logger.exception("Job %s (%s) falhou na tentativa %s", job.pk, job.tarefa, job.tentativas)
+
+        if job.tentativas < job.max_tentativas:
+            _devolver_para_fila(
+                Job.objects.filter(pk=job.pk),
+                executar_apos=timezone.now() + _backoff(job.tentativas),
+                erro=erro,
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.FALHOU,
+                concluido_em=timezone.now(),
+                erro=erro,
+            )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.Status.CONCLUIDO,
+        concluido_em=timezone.now(),
+        resultado=resultado if isinstance(resultado, (dict, list, str, int, float, bool)) else None,
+        erro="",
+    )
+    return True
+
+
+def recuperar_orfaos(lease: int = LEASE) -> int:
+    """
+    Devolve para a fila jobs EXECUTANDO cujo worker parou de renovar o lease (morreu no
+    meio). Pode rodar a qualquer momento, de qualquer worker: job vivo tem batimento recente.
+    """
+    limite = timezone.now() - timedelta(seconds=lease)
+    orfaos = Job.objects.filter(status=Job.Status.EXECUTANDO).filter(
+        Q(batimento_em__lt=limite) | Q(batimento_em__isnull=True, iniciado_em__lt=limite)
+    )
+
+    # sem tentativas sobrando (ex.: o próprio job derruba o worker) -> FALHOU
+    orfaos.filter(tentativas__gte=F("max_tentativas")).update(
+        status=Job.Status.FALHOU,
+        concluido_em=timezone.now(),
+        erro="Worker interrompido durante a execução.",
+    )
+    # um a um: a chave de cada um volta a valer e pode já ter um PENDENTE novo
+    return sum(
+        _devolver_para_fila(orfaos.filter(pk=pk), executar_apos=timezone.now())
+        for pk in orfaos.values_list("pk", flat=True)
+    )
@@ -1,18 +1,47 @@
 from __future__ import annotations
 
-import gzip
+import argparse
 import os
-import subprocess
 import shutil
+import time
 from datetime import datetime
 from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
+from core.backup.compressao import EXTENSOES, formato_padrao
+from core.backup.deposito import Deposito
+from core.backup.limites import CLASSES_IONICE, Controle
+from core.backup.pipeline import (
+    ErroBackup,
+    caminho_manifesto,
+    executar_dump,
+    gravar_manifesto,
+    saida_do_comando,
+)
+
+
+def _mb_s(bytes_: int, segundos: float) -> str:
+    return f"{bytes_ / (1024 * 1024) / max(segundos, 1e-6):.1f} MB/s"
+
+
+def _duracao(valor: str) -> float:
+    """Segundos a partir de "3600", "90m" ou "2h"."""
+    multiplicadores = {"s": 1, "m": 60, "h": 3600}
+    try:
+        if valor and valor[-1].lower() in multiplicadores:
+            return float(valor[:-1]) * multiplicadores[valor[-1].lower()]
+        return float(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"duração inválida: {valor} (use 3600, 90m ou 2h)")
+
 
 class Command(BaseCommand):
-    help = "Faz backup do banco (MySQL/MariaDB) usando mysqldump e salva em .sql.gz"
+    help = (
+        "Faz backup do banco (MySQL/MariaDB) usando mysqldump, comprimindo em streaming "
+        "(zstd ou gzip em blocos paralelos) com manifesto SHA-256."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -23,7 +52,84 @@ class Command(BaseCommand):
         parser.add_argument(
             "--plain",
             action="store_true",
-            help="Salva .sql sem gzip (default é .sql.gz)",
+            help="Salva .sql sem compressão (o mesmo que --formato plain)",
+        )
+        parser.add_argument(
+            "--formato",
+            choices=["auto", *EXTENSOES],
+            default="auto",
+            help="Compressão: zst (se o pacote zstandard estiver instalado), gz ou plain (default: auto).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Threads de compressão (default: número de CPUs).",
+        )
+        parser.add_argument(
+            "--nivel",
+            type=int,
+            default=None,
+            help="Nível de compressão (default: 3 no zst, 6 no gz).",
+        )
+        parser.add_argument(
+            "--por-tabela",
+            action="store_true",
+            help=(
+                "Dump em paralelo, um arquivo por tabela (mesmo snapshot; exige o privilégio RELOAD). "
+                "Gera um diretório com manifesto para o restore_db. Não inclui procedures/triggers/events/views."
+            ),
+        )
+        parser.add_argument(
+            "--paralelo",
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help="Tabelas exportadas ao mesmo tempo no --por-tabela (default: min(4, CPUs)).",
+        )
+        parser.add_argument(
+            "--deposito",
+            nargs="?",
+            const="",
+            default=None,
+            metavar="DIR",
+            help=(
+                "Grava no depósito com deduplicação (default: settings.BACKUP_DEPOSITO) em vez de --outdir. "
+                "Retenção e coleta de lixo: manage.py backup_deposito prune."
+            ),
+        )
+        parser.add_argument(
+            "--limite-leitura",
+            type=float,
+            default=settings.BACKUP_LIMITE_LEITURA_MB,
+            metavar="MB/s",
+            help="Teto de leitura do dump em MB/s; 0 = sem teto (default: settings.BACKUP_LIMITE_LEITURA_MB).",
+        )
+        parser.add_argument(
+            "--limite-escrita",
+            type=float,
+            default=settings.BACKUP_LIMITE_ESCRITA_MB,
+            metavar="MB/s",
+            help="Teto de gravação no disco em MB/s; 0 = sem teto (default: settings.BACKUP_LIMITE_ESCRITA_MB).",
+        )
+        parser.add_argument(
+            "--nice",
+            type=int,
+            default=settings.BACKUP_NICE,
+            help="Incremento de nice do mysqldump e da compressão; 0 = não altera (default: settings.BACKUP_NICE).",
+        )
+        parser.add_argument(
+            "--ionice",
+            choices=[*CLASSES_IONICE, "off"],
+            default=settings.BACKUP_IONICE,
+            help="Classe de I/O (Linux): best-effort (prioridade 7) ou idle (default: settings.BACKUP_IONICE).",
+        )
+        parser.add_argument(
+            "--duracao-maxima",
+            "--max-duration",
+            type=_duracao,
+            default=0,
+            metavar="DURACAO",
+            help="Interrompe o backup (apagando o parcial) se passar disso: 3600, 90m, 2h. Default: sem limite.",
         )
         parser.add_argument(
             "--mysqldump",
@@ -88,15 +194,45 @@ class Command(BaseCommand):
         if not all([name, user]):
             raise CommandError("DATABASES['default'] precisa de NAME e USER.")
 
-        mysqldump_bin = self._find_mysqldump(opts.get("mysqldump") or "")
-
         outdir = Path(opts["outdir"])
         outdir.mkdir(parents=True, exist_ok=True)
 
+        formato = "plain" if opts["plain"] else opts["formato"]
+        if formato == "auto":
+            formato = formato_padrao()
+
         ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        base = f"{name}_{ts}.sql"
-        out_sql = outdir / base
-        out_gz = outdir / (base + ".gz")
+        base = f"{name}_{ts}"
+
+        controle = Controle(
+            leitura_mb=opts["limite_leitura"],
+            escrita_mb=opts["limite_escrita"],
+            nice=opts["nice"],
+            ionice="" if opts["ionice"] == "off" else opts["ionice"],
+            duracao_maxima=opts["duracao_maxima"],
+        )
+        controle.reduzir_prioridade()
+
+        deposito = None
+        if opts["deposito"] is not None:
+            paralelo = max(1, opts["paralelo"]) if opts["por_tabela"] else 1
+            try:
+                deposito = Deposito(
+                    opts["deposito"] or settings.BACKUP_DEPOSITO,
+                    formato=None if opts["formato"] == "auto" and not opts["plain"] else formato,
+                    threads=max(1, opts["threads"] // paralelo),
+                    nivel=opts["nivel"],
+                    controle=controle,
+                )
+            except ErroBackup as e:
+                raise CommandError(str(e))
+            formato = deposito.formato
+
+        if opts["por_tabela"]:
+            return self._por_tabela(db, outdir, base, formato, opts, deposito, controle)
+
+        mysqldump_bin = self._find_mysqldump(opts.get("mysqldump") or "")
+        destino = outdir / f"{base}.sql{EXTENSOES[formato]}"
 
         # Usa env var para não expor senha no comando (melhor que --password=...)
         env = os.environ.copy()
@@ -108,6 +244,7 @@ class Command(BaseCommand):
         cmd = [
             mysqldump_bin,
             "--single-transaction",
+            "--quick",
             "--routines",
             "--triggers",
             "--events",
@@ -120,21 +257,121 @@ class Command(BaseCommand):
             name,
         ]
 
-        self.stdout.write(self.style.NOTICE(f"Gerando backup de '{name}'..."))
+        self.stdout.write(self.style.NOTICE(f"Gerando backup de '{name}' ({formato}, {opts['threads']} thread(s))..."))
         self.stdout.write(self.style.NOTICE(f"Usando mysqldump: {mysqldump_bin}"))
 
+        inicio = time.monotonic()
         try:
-            if opts["plain"]:
-                with out_sql.open("wb") as f:
-                    p = subprocess.run(cmd, stdout=f, stderr=subprocess.PIPE, env=env)
-                if p.returncode != 0:
-                    raise CommandError(p.stderr.decode(errors="ignore") or "Falha no mysqldump.")
-                self.stdout.write(self.style.SUCCESS(f"Backup criado: {out_sql}"))
+            if deposito:
+                with saida_do_comando(cmd, env=env, controle=controle) as blocos:
+                    gerado = deposito.gravar_arquivo(f"{name}.sql", blocos)
+                deposito.salvar_backup(base, banco=name, modo="unico", arquivos=[gerado], inicio=inicio)
             else:
-                with gzip.open(out_gz, "wb") as gz:
-                    p = subprocess.run(cmd, stdout=gz, stderr=subprocess.PIPE, env=env)
-                if p.returncode != 0:
-                    raise CommandError(p.stderr.decode(errors="ignore") or "Falha no mysqldump.")
-                self.stdout.write(self.style.SUCCESS(f"Backup criado: {out_gz}"))
+                gerado = executar_dump(
+                    cmd, destino, env=env, formato=formato, threads=opts["threads"], nivel=opts["nivel"],
+                    controle=controle,
+                )
+        except ErroBackup as e:
+            raise CommandError(str(e))
         finally:
             env.pop("MYSQL_PWD", None)
+
+        if deposito:
+            return self._resumo_deposito(deposito, base, [gerado], inicio, controle)
+
+        gravar_manifesto(
+            caminho_manifesto(outdir, base),
+            banco=name,
+            modo="unico",
+            formato=formato,
+            arquivos=[gerado],
+            inicio=inicio,
+        )
+        duracao = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(f"Backup criado: {destino}"))
+        self.stdout.write(
+            f"SQL: {gerado.bytes_sql} bytes em {duracao:.1f}s ({_mb_s(gerado.bytes_sql, duracao)}); "
+            f"arquivo: {gerado.bytes} bytes; sha256 {gerado.sha256}"
+        )
+        self._resumo_limites(controle)
+
+    def _resumo_limites(self, controle: Controle) -> None:
+        self.stdout.write(f"Vazão: {controle.resumo()}")
+
+    def _resumo_deposito(self, deposito: Deposito, base: str, gerados: list, inicio: float,
+                         controle: Controle) -> None:
+        duracao = time.monotonic() - inicio
+        bytes_sql = sum(g.bytes_sql for g in gerados)
+        chunks = sum(len(g.extra["chunks"]) for g in gerados)
+        novos = sum(g.extra["chunks_novos"] for g in gerados)
+        self.stdout.write(self.style.SUCCESS(f"Backup gravado no depósito {deposito.raiz}: {base}"))
+        self.stdout.write(
+            f"SQL: {bytes_sql} bytes em {duracao:.1f}s ({_mb_s(bytes_sql, duracao)}); "
+            f"pedaços: {chunks} ({novos} novos, {sum(g.bytes for g in gerados)} bytes acrescentados)"
+        )
+        self._resumo_limites(controle)
+
+    def _por_tabela(self, db: dict, outdir: Path, base: str, formato: str, opts: dict,
+                    deposito: Deposito | None, controle: Controle) -> None:
+        from core.backup import mysql
+
+        paralelo = max(1, opts["paralelo"])
+        # as threads de compressão são divididas entre as tabelas em andamento
+        threads = max(1, opts["threads"] // paralelo)
+        destino = outdir / base
+        parcial = outdir / f".{base}.parcial"
+
+        self.stdout.write(self.style.NOTICE(
+            f"Gerando backup por tabela de '{db['NAME']}' ({formato}, {paralelo} tabela(s) em paralelo)..."
+        ))
+
+        def _progresso(gerado):
+            self.stdout.write(f"  {gerado.extra['tabela']}: {gerado.extra['linhas']} linha(s), {gerado.bytes} bytes")
+
+        inicio = time.monotonic()
+        if deposito:
+            try:
+                gerados, snapshot = mysql.dump_paralelo(
+                    db, lambda tabela, blocos: deposito.gravar_arquivo(f"{tabela}.sql", blocos),
+                    paralelo=paralelo, progresso=_progresso, controle=controle,
+                )
+                deposito.salvar_backup(
+                    base, banco=db["NAME"], modo="por_tabela", arquivos=gerados, inicio=inicio, snapshot=snapshot,
+                )
+            except ErroBackup as e:
+                raise CommandError(str(e))
+            return self._resumo_deposito(deposito, base, gerados, inicio, controle)
+
+        parcial.mkdir()
+        try:
+            gerados, snapshot = mysql.dump_paralelo(
+                db,
+                mysql.gravar_em_diretorio(parcial, formato=formato, threads=threads, nivel=opts["nivel"], controle=controle),
+                paralelo=paralelo, progresso=_progresso, controle=controle,
+            )
+            gravar_manifesto(
+                parcial / "manifesto.json",
+                banco=db["NAME"],
+                modo="por_tabela",
+                formato=formato,
+                arquivos=gerados,
+                inicio=inicio,
+                snapshot=snapshot,
+            )
+            os.replace(parcial, destino)
+        except BaseException as e:
+            shutil.rmtree(parcial, ignore_errors=True)
+            if isinstance(e, ErroBackup):
+                raise CommandError(str(e))
+            raise
+
+        duracao = time.monotonic() - inicio
+        bytes_sql = sum(g.bytes_sql for g in gerados)
+        self.stdout.write(self.style.SUCCESS(f"Backup criado: {destino} ({len(gerados)} tabela(s))"))
+        self.stdout.write(
+            f"SQL: {bytes_sql} bytes em {duracao:.1f}s ({_mb_s(bytes_sql, duracao)}); "
+            f"arquivos: {sum(g.bytes for g in gerados)} bytes"
+        )
+        self._resumo_limites(controle)
+        if snapshot:
+            self.stdout.write(f"Posição do snapshot: {snapshot}")
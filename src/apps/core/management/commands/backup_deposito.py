@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backup.compressao import EXTENSOES, formato_do_arquivo, formato_padrao
+from core.backup.deposito import Deposito, data_do_backup, selecionar_retidos
+from core.backup.pipeline import ErroBackup, gravar_blocos, gravar_manifesto
+
+
+def _tamanho(bytes_: int) -> str:
+    for unidade in ("B", "KB", "MB", "GB"):
+        if bytes_ < 1024 or unidade == "GB":
+            return f"{bytes_:.0f} {unidade}" if unidade == "B" else f"{bytes_:.1f} {unidade}"
+        bytes_ /= 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Depósito de backups com deduplicação (backup_db --deposito): list, verify, "
+        "restore (remonta em streaming) e prune (retenção avô-pai-filho + coleta de lixo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--deposito",
+            default="",
+            metavar="DIR",
+            help="Diretório do depósito (default: settings.BACKUP_DEPOSITO).",
+        )
+        acoes = parser.add_subparsers(dest="acao", required=True)
+
+        acoes.add_parser("list", help="Lista os backups e o uso de disco do depósito.")
+
+        verify = acoes.add_parser("verify", help="Confere hash e tamanho de todos os pedaços referenciados.")
+        verify.add_argument("nomes", nargs="*", help="Backups a conferir (default: todos).")
+
+        restore = acoes.add_parser("restore", help="Remonta um backup sem materializá-lo inteiro em memória/disco.")
+        restore.add_argument("nome")
+        restore.add_argument(
+            "--saida",
+            default="-",
+            help=(
+                "Arquivo de saída (.sql, .sql.gz ou .sql.zst) ou '-' para stdout (default), "
+                "ex.: backup_deposito restore NOME | mysql banco. Backup por tabela sem --tabela: "
+                "diretório que o restore_db aceita."
+            ),
+        )
+        restore.add_argument("--tabela", default="", help="Só esta tabela (backups por tabela).")
+        restore.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Threads de compressão.")
+
+        prune = acoes.add_parser("prune", help="Aplica a retenção e apaga os pedaços sem referência.")
+        prune.add_argument("--diarios", type=int, default=settings.BACKUP_RETER_DIARIOS)
+        prune.add_argument("--semanais", type=int, default=settings.BACKUP_RETER_SEMANAIS)
+        prune.add_argument("--mensais", type=int, default=settings.BACKUP_RETER_MENSAIS)
+        prune.add_argument(
+            "--carencia-horas",
+            type=float,
+            default=6,
+            help="Pedaços gravados/reaproveitados há menos que isso não são apagados (backup em andamento). Default: 6.",
+        )
+        prune.add_argument("--simular", action="store_true", help="Só mostra o que seria removido.")
+
+    def handle(self, *args, **opts):
+        raiz = Path(opts["deposito"] or settings.BACKUP_DEPOSITO)
+        if not (raiz / "deposito.json").exists():
+            raise CommandError(f"Depósito não encontrado: {raiz}")
+
+        try:
+            deposito = Deposito(raiz, threads=opts.get("threads") or 1)
+            getattr(self, f"_{opts['acao']}")(deposito, opts)
+        except ErroBackup as e:
+            raise CommandError(str(e))
+
+    # =========================================================================
+    # list
+    # =========================================================================
+
+    def _list(self, deposito: Deposito, opts) -> None:
+        backups = deposito.backups()
+        logico = 0
+        for m in backups:
+            bytes_sql = sum(a["bytes_sql"] for a in m["arquivos"])
+            novos = sum(a["bytes"] for a in m["arquivos"])
+            pedacos = sum(len(a["chunks"]) for a in m["arquivos"])
+            logico += bytes_sql
+            self.stdout.write(
+                f"{m['nome']:<40} {m['criado_em']}  {m['modo']:<10} SQL {_tamanho(bytes_sql):>10}  "
+                f"{pedacos:>6} pedaços  +{_tamanho(novos)}"
+            )
+
+        quantidade, em_disco = deposito.uso()
+        razao = f" (deduplicação {logico / em_disco:.1f}x)" if em_disco else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(backups)} backup(s), {_tamanho(logico)} de SQL em {quantidade} pedaços / {_tamanho(em_disco)} "
+            f"no disco ({deposito.formato}){razao}"
+        ))
+
+    # =========================================================================
+    # verify
+    # =========================================================================
+
+    def _verify(self, deposito: Deposito, opts) -> None:
+        manifestos = [deposito.backup(n) for n in opts["nomes"]] if opts["nomes"] else deposito.backups()
+        problemas = deposito.verificar(manifestos)
+        for problema in problemas:
+            self.stdout.write(self.style.ERROR(problema))
+        if problemas:
+            raise CommandError(f"{len(problemas)} problema(s) no depósito.")
+        self.stdout.write(self.style.SUCCESS(f"{len(manifestos)} backup(s) íntegro(s)."))
+
+    # =========================================================================
+    # restore
+    # =========================================================================
+
+    def _restore(self, deposito: Deposito, opts) -> None:
+        manifesto = deposito.backup(opts["nome"])
+        arquivos = manifesto["arquivos"]
+        if opts["tabela"]:
+            arquivos = [a for a in arquivos if a.get("tabela") == opts["tabela"]]
+            if not arquivos:
+                raise CommandError(f"Tabela não encontrada no backup: {opts['tabela']}")
+
+        if manifesto["modo"] == "por_tabela" and not opts["tabela"]:
+            return self._restore_diretorio(deposito, manifesto, Path(opts["saida"]), opts["threads"])
+
+        arquivo = arquivos[0]
+        if opts["saida"] == "-":
+            for bloco in deposito.blocos(arquivo):
+                sys.stdout.buffer.write(bloco)
+            sys.stdout.buffer.flush()
+            return
+
+        destino = Path(opts["saida"])
+        gravar_blocos(deposito.blocos(arquivo), destino, formato=formato_do_arquivo(destino.name), threads=opts["threads"])
+        self.stderr.write(self.style.SUCCESS(f"{arquivo['nome']} restaurado em {destino} ({arquivo['bytes_sql']} bytes)."))
+
+    def _restore_diretorio(self, deposito: Deposito, manifesto: dict, diretorio: Path, threads: int) -> None:
+        """Backup por tabela: um arquivo por tabela + manifesto.json, o formato do restore_db."""
+        if str(diretorio) == "-":
+            raise CommandError("Backup por tabela: use --saida DIRETORIO ou --tabela.")
+        diretorio.mkdir(parents=True, exist_ok=True)
+        formato = formato_padrao()
+
+        inicio = time.monotonic()
+        gerados = []
+        for arquivo in manifesto["arquivos"]:
+            destino = diretorio / f"{arquivo['tabela']}.sql{EXTENSOES[formato]}"
+            gerado = gravar_blocos(deposito.blocos(arquivo), destino, formato=formato, threads=threads)
+            gerado.extra = {k: arquivo[k] for k in ("tabela", "linhas", "ddl")}
+            gerados.append(gerado)
+            self.stderr.write(f"  {destino.name}: {gerado.bytes_sql} bytes")
+
+        gravar_manifesto(
+            diretorio / "manifesto.json",
+            banco=manifesto["banco"],
+            modo=manifesto["modo"],
+            formato=formato,
+            arquivos=gerados,
+            inicio=inicio,
+            snapshot=manifesto.get("snapshot", {}),
+            origem=manifesto["nome"],
+        )
+        self.stderr.write(self.style.SUCCESS(f"Backup {manifesto['nome']} remontado em {diretorio} (use restore_db)."))
+
+    # =========================================================================
+    # prune
+    # =========================================================================
+
+    def _prune(self, deposito: Deposito, opts) -> None:
+        backups = deposito.backups()
+        retidos = selecionar_retidos(
+            [(m["nome"], data_do_backup(m)) for m in backups],
+            diarios=opts["diarios"],
+            semanais=opts["semanais"],
+            mensais=opts["mensais"],
+        )
+        remover = [m["nome"] for m in backups if m["nome"] not in retidos]
+        for nome in remover:
+            self.stdout.write(f"  remover {nome}")
+        if not opts["simular"]:
+            deposito.remover_backups(remover)
+
+        # na simulação os manifestos continuam lá: a coleta só enxerga o que já estava sem referência
+        quantidade, liberados = deposito.coletar_lixo(
+            carencia=timedelta(hours=opts["carencia_horas"]),
+            simular=opts["simular"],
+        )
+        prefixo = "[simulação] " if opts["simular"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixo}{len(retidos)} backup(s) mantidos, {len(remover)} removidos; "
+            f"{quantidade} pedaço(s) apagados ({_tamanho(liberados)})."
+        ))
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import random
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backup.compressao import EXTENSOES, abrir_leitura, formato_padrao
+from core.backup.pipeline import executar_dump
+
+
+def _mb_s(bytes_: int, segundos: float) -> str:
+    return f"{bytes_ / (1024 * 1024) / max(segundos, 1e-6):.0f} MB/s"
+
+
+def _gerar_dump(destino: Path, tamanho: int) -> None:
+    """SQL sintético parecido com a saída do mysqldump (INSERTs longos, texto repetitivo)."""
+    aleatorio = random.Random(0)
+    palavras = ["processo", "setor", "despacho", "protocolo", "interessado", "arquivado", "recebido", "2024"]
+    with open(destino, "w", encoding="ascii") as f:
+        escritos = 0
+        while escritos < tamanho:
+            valores = ",".join(
+                f"({aleatorio.randrange(10**7)},'{' '.join(aleatorio.choices(palavras, k=8))}',"
+                f"'2024-{aleatorio.randrange(1, 13):02d}-{aleatorio.randrange(1, 29):02d} 10:00:00')"
+                for _ in range(200)
+            )
+            escritos += f.write(f"INSERT INTO `protocolos_movimentacaoprocesso` VALUES {valores};\n")
+
+
+def _sha256(arquivo) -> str:
+    h = hashlib.sha256()
+    with arquivo as f:
+        while bloco := f.read(1 << 22):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a vazão do pipeline de backup (executar_dump) contra o jeito antigo "
+        "(gzip.open como stdout do mysqldump) e o gzip da linha de comando, sobre um "
+        "dump em arquivo. Não toca no banco: o 'mysqldump' é um cat do arquivo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--arquivo", help="Dump .sql usado na medição (default: gera um sintético).")
+        parser.add_argument("--mb", type=int, default=256, help="Tamanho do dump sintético em MB (default: 256).")
+        parser.add_argument("--formato", choices=list(EXTENSOES), default=None,
+                            help="Formato do pipeline (default: zst se disponível, senão gz).")
+        parser.add_argument("--threads", type=int, nargs="+", default=[1, 4],
+                            help="Threads de compressão a medir (default: 1 4).")
+
+    def handle(self, *args, **opts):
+        formato = opts["formato"] or formato_padrao()
+        with tempfile.TemporaryDirectory(prefix="bench_backup_") as tmp:
+            tmp = Path(tmp)
+            if opts["arquivo"]:
+                origem = Path(opts["arquivo"])
+                if not origem.is_file():
+                    raise CommandError(f"Arquivo não encontrado: {origem}")
+            else:
+                origem = tmp / "dump.sql"
+                self.stdout.write(f"Gerando dump sintético de {opts['mb']} MB...")
+                _gerar_dump(origem, opts["mb"] * 1024 * 1024)
+            tamanho = origem.stat().st_size
+            cmd = ["cat", str(origem)]
+            esperado = _sha256(open(origem, "rb"))
+
+            inicio = time.perf_counter()
+            with gzip.open(tmp / "antigo.sql.gz", "wb") as gz:
+                subprocess.run(cmd, stdout=gz, check=True)
+            duracao = time.perf_counter() - inicio
+            # o filho escreve direto no fd do GzipFile: o .gz sai sem compressão (e ilegível)
+            self.stdout.write(
+                f"{'gzip.open como stdout':<24} {duracao:6.1f}s  {_mb_s(tamanho, duracao):>9}  "
+                f"{(tmp / 'antigo.sql.gz').stat().st_size} bytes  (não comprimido)"
+            )
+
+            for threads in opts["threads"]:
+                destino = tmp / f"pipeline{threads}.sql{EXTENSOES[formato]}"
+                inicio = time.perf_counter()
+                gerado = executar_dump(cmd, destino, env=os.environ.copy(), formato=formato, threads=max(threads, 1))
+                duracao = time.perf_counter() - inicio
+                integro = _sha256(abrir_leitura(destino)) == esperado
+                self.stdout.write(
+                    f"{f'pipeline {formato} threads={threads}':<24} {duracao:6.1f}s  "
+                    f"{_mb_s(gerado.bytes_sql, duracao):>9}  {gerado.bytes} bytes  "
+                    f"{'ok' if integro else 'CONTEÚDO DIFERENTE'}"
+                )
+                destino.unlink()
+
+            inicio = time.perf_counter()
+            with open(tmp / "cli.sql.gz", "wb") as saida:
+                subprocess.run(["gzip", "-6", "-c", str(origem)], stdout=saida, check=True)
+            duracao = time.perf_counter() - inicio
+            self.stdout.write(
+                f"{'gzip -6 (CLI)':<24} {duracao:6.1f}s  {_mb_s(tamanho, duracao):>9}  "
+                f"{(tmp / 'cli.sql.gz').stat().st_size} bytes"
+            )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backup.pipeline import ErroBackup, ler_manifesto
+
+
+class Command(BaseCommand):
+    help = (
+        "Restaura um backup gerado com backup_db --por-tabela: carrega as tabelas em paralelo, "
+        "recria índices e FKs depois da carga e confere SHA-256 e contagem de linhas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "backup",
+            help="Diretório do backup (ou o manifesto.json dele).",
+        )
+        parser.add_argument(
+            "--banco",
+            default="",
+            help="Banco de destino (default: NAME de DATABASES['default']). Tabelas existentes são recriadas.",
+        )
+        parser.add_argument(
+            "--paralelo",
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help="Tabelas carregadas ao mesmo tempo (default: min(4, CPUs)).",
+        )
+
+    def handle(self, *args, **opts):
+        db = settings.DATABASES.get("default", {})
+        if "mysql" not in db.get("ENGINE", ""):
+            raise CommandError(f"ENGINE não suportado por este comando: {db.get('ENGINE', '')}")
+
+        caminho = Path(opts["backup"])
+        diretorio = caminho if caminho.is_dir() else caminho.parent
+        manifesto_path = diretorio / "manifesto.json" if caminho.is_dir() else caminho
+
+        from core.backup import mysql
+
+        try:
+            manifesto = ler_manifesto(manifesto_path)
+        except ErroBackup as e:
+            raise CommandError(str(e))
+        if manifesto.get("modo") != "por_tabela":
+            raise CommandError(
+                "Este comando restaura apenas backups --por-tabela. "
+                "Para o dump único use: mysql < arquivo.sql (descomprimindo antes)."
+            )
+
+        banco = opts["banco"] or db.get("NAME")
+        paralelo = max(1, opts["paralelo"])
+        self.stdout.write(self.style.NOTICE(
+            f"Restaurando {len(manifesto['arquivos'])} tabela(s) de '{manifesto['banco']}' em '{banco}' "
+            f"({paralelo} em paralelo)..."
+        ))
+
+        inicio = time.monotonic()
+        try:
+            contagens = mysql.restaurar_paralelo(
+                db, banco, diretorio, manifesto, paralelo=paralelo, progresso=lambda msg: self.stdout.write(f"  {msg}"),
+            )
+        except ErroBackup as e:
+            raise CommandError(str(e))
+
+        divergentes = {t: c for t, c in contagens.items() if c[0] != c[1]}
+        for tabela, (esperado, encontrado) in divergentes.items():
+            self.stdout.write(self.style.WARNING(f"{tabela}: esperado {esperado} linha(s), encontrado {encontrado}"))
+        if divergentes:
+            raise CommandError(f"Contagem de linhas divergente em {len(divergentes)} tabela(s).")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Restauração concluída em {time.monotonic() - inicio:.1f}s: "
+            f"{sum(c[1] for c in contagens.values())} linha(s) em {len(contagens)} tabela(s)."
+        ))
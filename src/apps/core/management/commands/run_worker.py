@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa jobs da fila do banco (core.Job). Escala subindo mais processos "
+        "(--processos ou vários run_worker em paralelo); não precisa de broker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=1, help="Threads por processo (default: 1).")
+        parser.add_argument("--processos", type=int, default=1, help="Processos worker (default: 1).")
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=2.0,
+            help="Segundos de espera quando a fila está vazia (default: 2).",
+        )
+        parser.add_argument(
+            "--uma-vez",
+            action="store_true",
+            help="Esvazia a fila e sai (útil no cron).",
+        )
+
+    def handle(self, *args, **opts):
+        jobs.descobrir_tarefas()
+        self.stdout.write(self.style.NOTICE(f"Tarefas registradas: {', '.join(jobs.tarefas_registradas()) or '-'}"))
+
+        recuperados = jobs.recuperar_orfaos()
+        if recuperados:
+            self.stdout.write(self.style.WARNING(f"Jobs órfãos devolvidos à fila: {recuperados}"))
+
+        if opts["processos"] <= 1:
+            total = self._rodar_processo(opts)
+            self.stdout.write(self.style.SUCCESS(f"Worker finalizado. Jobs executados: {total}"))
+            return
+
+        # cada processo abre as próprias conexões (não herda a do pai)
+        connection.close()
+        filhos = [
+            multiprocessing.Process(target=self._rodar_processo, args=(opts,), daemon=False)
+            for _ in range(opts["processos"])
+        ]
+        for p in filhos:
+            p.start()
+        try:
+            for p in filhos:
+                p.join()
+        except KeyboardInterrupt:
+            for p in filhos:
+                p.terminate()
+            for p in filhos:
+                p.join()
+        self.stdout.write(self.style.SUCCESS("Workers finalizados."))
+
+    def _rodar_processo(self, opts) -> int:
+        parar = threading.Event()
+
+        def _sinal(signum, frame):
+            parar.set()
+
+        signal.signal(signal.SIGTERM, _sinal)
+        signal.signal(signal.SIGINT, _sinal)
+
+        contadores = []
+        nomes = [self._nome_worker(i) for i in range(max(opts["threads"], 1))]
+        threads = [
+            threading.Thread(target=self._loop, args=(nome, opts, parar, contadores), daemon=True)
+            for nome in nomes
+        ]
+        for t in threads:
+            t.start()
+        terminou = threading.Event()
+        batimento = threading.Thread(target=self._batimento, args=(nomes, terminou), daemon=True)
+        batimento.start()
+        # join com timeout para o processo principal continuar recebendo sinais
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+        terminou.set()
+        batimento.join()
+        return sum(contadores)
+
+    @staticmethod
+    def _nome_worker(indice: int) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{indice}"
+
+    def _batimento(self, nomes: list[str], terminou: threading.Event) -> None:
+        """Renova o lease dos jobs em execução e devolve à fila os de workers mortos."""
+        try:
+            while not terminou.wait(jobs.INTERVALO_BATIMENTO):
+                try:
+                    jobs.renovar(nomes)
+                    recuperados = jobs.recuperar_orfaos()
+                except DatabaseError as e:
+                    self.stderr.write(f"[{nomes[0]}] erro no batimento: {e}")
+                    connection.close()
+                    continue
+                if recuperados:
+                    self.stdout.write(self.style.WARNING(f"Jobs órfãos devolvidos à fila: {recuperados}"))
+        finally:
+            connection.close()
+
+    def _loop(self, worker: str, opts, parar: threading.Event, contadores: list) -> None:
+        executados = 0
+        try:
+            while not parar.is_set():
+                close_old_connections()
+                try:
+                    reivindicados = jobs.reivindicar(worker)
+                except DatabaseError as e:
+                    # banco fora/instável: não derruba a thread, tenta de novo depois
+                    self.stderr.write(f"[{worker}] erro ao reivindicar jobs: {e}")
+                    connection.close()
+                    parar.wait(opts["intervalo"])
+                    continue
+
+                if not reivindicados:
+                    if opts["uma_vez"]:
+                        break
+                    parar.wait(opts["intervalo"])
+                    continue
+
+                for job in reivindicados:
+                    try:
+                        ok = jobs.executar(job)
+                    except DatabaseError as e:
+                        # status não gravado: recuperar_orfaos devolve o job à fila depois
+                        self.stderr.write(f"[{worker}] erro ao gravar job #{job.pk}: {e}")
+                        connection.close()
+                        ok = False
+                    executados += 1
+                    estilo = self.style.SUCCESS if ok else self.style.ERROR
+                    self.stdout.write(estilo(f"[{worker}] {job.tarefa} #{job.pk}: {'ok' if ok else 'falhou'}"))
+        finally:
+            connection.close()
+            contadores.append(executados)
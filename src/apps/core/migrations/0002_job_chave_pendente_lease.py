@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='batimento_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='chave_pendente',
+            field=models.CharField(blank=True, editable=False, max_length=150, null=True, unique=True),
+        ),
+    ]
@@ -1,3 +1,54 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Job(models.Model):
+    """
+    Tarefa em segundo plano (fila no próprio banco, sem broker).
+    Enfileire com core.jobs.enfileirar(); os workers (manage.py run_worker)
+    reivindicam com SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+
+    class Status(models.TextChoices):
+        PENDENTE = "PENDENTE", "Pendente"
+        EXECUTANDO = "EXECUTANDO", "Executando"
+        CONCLUIDO = "CONCLUIDO", "Concluído"
+        FALHOU = "FALHOU", "Falhou"
+
+    tarefa = models.CharField(max_length=100, db_index=True)
+    payload = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDENTE)
+    prioridade = models.SmallIntegerField(default=0, help_text="Maior valor executa primeiro.")
+
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    max_tentativas = models.PositiveSmallIntegerField(default=5)
+    executar_apos = models.DateTimeField(default=timezone.now)
+
+    # ✅ deduplicação opcional: não enfileira de novo enquanto houver um PENDENTE com a mesma chave
+    chave = models.CharField(max_length=150, blank=True, default="", db_index=True)
+    # = chave enquanto o job espera a primeira execução, NULL depois: o UNIQUE decide a
+    # deduplicação (o MySQL não tem índice único condicional; NULLs não colidem)
+    chave_pendente = models.CharField(max_length=150, null=True, blank=True, unique=True, editable=False)
+
+    resultado = models.JSONField(null=True, blank=True)
+    erro = models.TextField(blank=True, default="")
+    worker = models.CharField(max_length=100, blank=True, default="")
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    # ✅ lease: o worker renova enquanto executa; parado há mais que JOBS_LEASE = órfão
+    batimento_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-criado_em"]
+        indexes = [
+            # ✅ índice da consulta de reivindicação (status + prontos + ordem)
+            models.Index(fields=["status", "executar_apos", "prioridade"], name="core_job_fila_idx"),
+        ]
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+
+    def __str__(self) -> str:
+        return f"{self.tarefa} #{self.pk} ({self.status})"
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .jobs import tarefa
+from .models import Job
+
+
+@tarefa("core.limpar_jobs_antigos")
+def limpar_jobs_antigos(dias: int = 30) -> dict:
+    """Apaga jobs CONCLUIDOS há mais de `dias` dias (FALHOU fica para análise)."""
+    limite = timezone.now() - timedelta(days=dias)
+    apagados, _ = Job.objects.filter(status=Job.Status.CONCLUIDO, concluido_em__lt=limite).delete()
+    return {"apagados": apagados}
@@ -1,3 +1,439 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from protocolos.models import Pessoa
+
+from . import db_router, jobs
+from .backup import mysql
+from .backup.limites import Controle
+from .backup.pipeline import ErroBackup, gravar_blocos, saida_do_comando
+from .models import Job
+
+
+# ✅ cache em memória: os testes não leem, gravam nem limpam o FileBasedCache de src/cache
+CACHE_DE_TESTE = override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+
+
+# =============================================================================
+# Fila de jobs: deduplicação por chave e lease do worker
+# =============================================================================
+
+@CACHE_DE_TESTE
+class EnfileirarTests(TestCase):
+    def test_chave_reaproveita_o_pendente(self):
+        primeiro = jobs.enfileirar("teste.tarefa", {"n": 1}, chave="k")
+        self.assertEqual(jobs.enfileirar("teste.tarefa", {"n": 2}, chave="k").pk, primeiro.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_chave_liberada_quando_o_job_e_reivindicado(self):
+        primeiro = jobs.enfileirar("teste.tarefa", chave="k")
+        jobs.reivindicar("w")
+        segundo = jobs.enfileirar("teste.tarefa", chave="k")
+        self.assertNotEqual(segundo.pk, primeiro.pk)
+
+
+@CACHE_DE_TESTE
+class EnfileirarConcorrenteTests(TransactionTestCase):
+    """20 requests enfileirando a mesma chave ao mesmo tempo: um único job."""
+
+    CLIENTES = 20
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("SQLite em memória não aceita escritas concorrentes (use MySQL ou SQLite em arquivo).")
+
+    def test_mesma_chave_um_job(self):
+        largada = threading.Barrier(self.CLIENTES)
+        ids, erros = [], []
+
+        def enfileirar():
+            try:
+                largada.wait(timeout=30)
+                ids.append(jobs.enfileirar("teste.tarefa", chave="mesma").pk)
+            except Exception as e:  # noqa: BLE001 - o teste conta qualquer falha
+                largada.abort()
+                erros.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=enfileirar) for _ in range(self.CLIENTES)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(erros, [])
+        self.assertEqual(len(set(ids)), 1)
+        self.assertEqual(Job.objects.count(), 1)
+
+
+@CACHE_DE_TESTE
+class RecuperarOrfaosTests(TestCase):
+    def setUp(self):
+        jobs.enfileirar("teste.tarefa")
+        (self.job,) = jobs.reivindicar("host:1:0")
+        # começou há uma hora: job longo
+        Job.objects.filter(pk=self.job.pk).update(iniciado_em=timezone.now() - timedelta(hours=1))
+
+    def test_job_longo_com_batimento_nao_volta_para_a_fila(self):
+        jobs.renovar(["host:1:0"])
+        self.assertEqual(jobs.recuperar_orfaos(lease=60), 0)
+        self.assertEqual(Job.objects.get().status, Job.Status.EXECUTANDO)
+
+    def test_worker_sem_batimento_devolve_o_job(self):
+        Job.objects.filter(pk=self.job.pk).update(batimento_em=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(jobs.recuperar_orfaos(lease=60), 1)
+        self.assertEqual(Job.objects.get().status, Job.Status.PENDENTE)
+
+
+@CACHE_DE_TESTE
+class DevolverComChaveTests(TestCase):
+    def setUp(self):
+        jobs.enfileirar("teste.falha", chave="k")
+        (self.job,) = jobs.reivindicar("host:1:0")
+
+    def _orfao(self):
+        Job.objects.filter(pk=self.job.pk).update(batimento_em=timezone.now() - timedelta(minutes=5))
+        return jobs.recuperar_orfaos(lease=60)
+
+    def test_job_devolvido_retoma_a_chave(self):
+        self.assertEqual(self._orfao(), 1)
+        self.assertEqual(jobs.enfileirar("teste.falha", chave="k").pk, self.job.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_retentativa_retoma_a_chave(self):
+        self.assertFalse(jobs.executar(self.job))  # tarefa não registrada: falha com tentativas sobrando
+        self.assertEqual(Job.objects.get().status, Job.Status.PENDENTE)
+        self.assertEqual(jobs.enfileirar("teste.falha", chave="k").pk, self.job.pk)
+
+    def test_pendente_novo_com_a_mesma_chave_prevalece(self):
+        novo = jobs.enfileirar("teste.falha", chave="k")
+        self.assertEqual(self._orfao(), 0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.Status.FALHOU)
+        self.assertEqual(Job.objects.get(status=Job.Status.PENDENTE).pk, novo.pk)
+
+
+# =============================================================================
+# Réplica de leitura: roteamento por requisição (ContextVar)
+# =============================================================================
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+
+    def _com_estado(self, usar_replica: bool):
+        estado = db_router.EstadoRequisicao()
+        estado.usar_replica = usar_replica
+        token = db_router._estado.set(estado)
+        self.addCleanup(db_router._estado.reset, token)
+        return estado
+
+    def test_fora_de_requisicao_le_do_primario(self):
+        self.assertIsNone(self.router.db_for_read(Pessoa))
+
+    def test_view_de_leitura_vai_para_a_replica_exceto_tabelas_de_autenticacao(self):
+        self._com_estado(usar_replica=True)
+        self.assertEqual(self.router.db_for_read(Pessoa), db_router.REPLICA)
+        self.assertIsNone(self.router.db_for_read(get_user_model()))
+
+    def test_depois_de_escrever_volta_para_o_primario(self):
+        estado = self._com_estado(usar_replica=True)
+        self.router.db_for_write(Pessoa)
+        self.assertTrue(estado.escreveu)
+        self.assertIsNone(self.router.db_for_read(Pessoa))
+
+    def test_estado_nao_vaza_para_outra_thread(self):
+        self._com_estado(usar_replica=True)
+        vistos = []
+        t = threading.Thread(target=lambda: vistos.append(self.router.db_for_read(Pessoa)))
+        t.start()
+        t.join()
+        self.assertEqual(vistos, [None])
+
+
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.fabrica = RequestFactory()
+
+    def _rodar(self, *, session: dict, ativo: bool = True, escrever: bool = False):
+        """Passa uma requisição pelo middleware e devolve o destino das leituras dentro da view."""
+        vistos = []
+
+        @db_router.leitura_na_replica
+        def view(request):
+            vistos.append(db_router.ReplicaRouter().db_for_read(Pessoa))
+            if escrever:
+                db_router.ReplicaRouter().db_for_write(Pessoa)
+            return HttpResponse()
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = db_router.ReplicaMiddleware(get_response)
+        middleware.ativo = ativo
+        request = self.fabrica.get("/")
+        request.session = session
+        middleware(request)
+        self.assertIsNone(db_router._estado.get())  # estado descartado ao fim da requisição
+        return vistos[0]
+
+    def test_sem_replica_configurada_tudo_no_primario(self):
+        self.assertIsNone(self._rodar(session={}, ativo=False))
+
+    def test_leitura_vai_para_a_replica(self):
+        self.assertEqual(self._rodar(session={}), db_router.REPLICA)
+
+    def test_escrita_fixa_a_sessao_no_primario(self):
+        session = {}
+        self._rodar(session=session, escrever=True)
+        self.assertGreater(session[db_router.CHAVE_SESSAO], time.time())
+        self.assertIsNone(self._rodar(session=session))
+
+    def test_janela_vencida_volta_para_a_replica(self):
+        session = {db_router.CHAVE_SESSAO: int(time.time()) - 1}
+        self.assertEqual(self._rodar(session=session), db_router.REPLICA)
+
+
+# =============================================================================
+# Backup: prioridade do mysqldump
+# =============================================================================
+
+@unittest.skipUnless(shutil.which("nice") and hasattr(os, "getpriority"), "nice indisponível")
+class PrioridadeBackupTests(SimpleTestCase):
+    def test_nice_vai_no_prefixo_do_comando(self):
+        controle = Controle(nice=5)
+        self.assertEqual(controle.prefixo_comando()[-3:], ["nice", "-n", "5"])
+
+    def test_processo_ja_reduzido_nao_repete_o_prefixo(self):
+        controle = Controle(nice=5)
+        controle._reduzido = True  # filhos herdam a prioridade do processo
+        self.assertEqual(controle.prefixo_comando(), [])
+
+    def test_filho_roda_com_nice(self):
+        atual = os.getpriority(os.PRIO_PROCESS, 0)
+        with saida_do_comando(["nice"], env=os.environ.copy(), controle=Controle(nice=5)) as blocos:
+            saida = b"".join(blocos)
+        self.assertEqual(int(saida), min(atual + 5, 19))
+
+
+# =============================================================================
+# Backup: restauração em paralelo (backup_db --por-tabela / restore_db)
+# =============================================================================
+
+DDL_PROCESSO = """CREATE TABLE `processo` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `numero` varchar(20) NOT NULL,
+  `tipo_id` int NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `processo_numero_uniq` (`numero`),
+  KEY `processo_tipo_idx` (`tipo_id`),
+  CONSTRAINT `processo_tipo_fk` FOREIGN KEY (`tipo_id`) REFERENCES `tipo` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+
+DDL_TIPO = """CREATE TABLE `tipo` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `nome` varchar(50) NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `tipo_nome_idx` (`nome`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+
+
+class _BancoFalso:
+    """
+    Faz as vezes do MySQL em restaurar_paralelo: registra os comandos (de todas as
+    conexões, em ordem) e conta as linhas de cada INSERT para o SELECT COUNT(*).
+    """
+
+    def __init__(self):
+        self.comandos = []
+        self.linhas = {}
+        self.conexoes = 0
+        self._lock = threading.Lock()
+
+    def conectar(self, db, *, banco=None):
+        with self._lock:
+            self.conexoes += 1
+        return _ConexaoFalsa(self)
+
+    def executar(self, sql: str):
+        with self._lock:
+            self.comandos.append(sql)
+            if sql.startswith("INSERT INTO "):
+                tabela = sql.split("`")[1]
+                self.linhas[tabela] = self.linhas.get(tabela, 0) + sql.count("),(") + 1
+            elif sql.startswith("SELECT COUNT(*) FROM "):
+                return (self.linhas.get(sql.split("`")[1], 0),)
+        return None
+
+    def indice(self, prefixo: str) -> int:
+        return next(i for i, sql in enumerate(self.comandos) if sql.startswith(prefixo))
+
+    def ultimo(self, prefixo: str) -> int:
+        return max(i for i, sql in enumerate(self.comandos) if sql.startswith(prefixo))
+
+
+class _ConexaoFalsa:
+    def __init__(self, banco):
+        self.banco = banco
+        self._resultado = None
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self._resultado = self.banco.executar(sql.decode() if isinstance(sql, bytes) else sql)
+
+    def fetchone(self):
+        return self._resultado
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class RestauracaoParalelaTests(SimpleTestCase):
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.diretorio)
+        self.banco = _BancoFalso()
+        patcher = mock.patch.object(mysql, "conectar", self.banco.conectar)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _arquivo(self, tabela: str, ddl: str, inserts: list[bytes], *, linhas: int) -> dict:
+        gerado = gravar_blocos(inserts, self.diretorio / f"{tabela}.sql.gz", formato="gz", threads=2)
+        gerado.extra.update(tabela=tabela, linhas=linhas, ddl=ddl)
+        return gerado.como_dict()
+
+    def _manifesto(self, *, linhas_processo: int = 3) -> dict:
+        return {"modo": "por_tabela", "banco": "origem", "arquivos": [
+            self._arquivo("processo", DDL_PROCESSO, [
+                b"INSERT INTO `processo` VALUES (1,'00001/24',1),(2,'00002/24',2);\n",
+                b"INSERT INTO `processo` VALUES (3,'00003/24',1);\n",
+            ], linhas=linhas_processo),
+            self._arquivo("tipo", DDL_TIPO, [b"INSERT INTO `tipo` VALUES (1,'Oficio'),(2,'Memorando');\n"], linhas=2),
+        ]}
+
+    def _restaurar(self, manifesto: dict) -> dict:
+        return mysql.restaurar_paralelo({}, "destino", self.diretorio, manifesto, paralelo=2)
+
+    def test_carrega_e_confere_as_contagens(self):
+        contagens = self._restaurar(self._manifesto())
+        self.assertEqual(contagens, {"processo": (3, 3), "tipo": (2, 2)})
+        self.assertGreater(self.banco.conexoes, 2)  # uma conexão por carga (em paralelo)
+
+    def test_indices_e_fks_depois_da_carga(self):
+        self._restaurar(self._manifesto())
+        comandos = self.banco.comandos
+        create = comandos[self.banco.indice("CREATE TABLE `processo`")]
+        self.assertNotIn("KEY `processo_tipo_idx`", create)
+        self.assertNotIn("FOREIGN KEY", create)
+        self.assertIn("PRIMARY KEY", create)
+
+        ultimo_insert = self.banco.ultimo("INSERT INTO ")
+        indices = self.banco.indice("ALTER TABLE `processo` ADD UNIQUE KEY")
+        self.assertGreater(self.banco.indice("INSERT INTO "), self.banco.ultimo("CREATE TABLE "))
+        self.assertGreater(indices, ultimo_insert)
+        self.assertIn("ADD KEY `processo_tipo_idx`", comandos[indices])
+        fk = self.banco.indice("ALTER TABLE `processo` ADD CONSTRAINT `processo_tipo_fk`")
+        self.assertGreater(fk, self.banco.ultimo("ALTER TABLE `tipo` ADD KEY"))
+        self.assertGreater(fk, indices)
+
+    def test_contagem_divergente_aparece_no_resultado(self):
+        contagens = self._restaurar(self._manifesto(linhas_processo=4))
+        self.assertEqual(contagens["processo"], (4, 3))
+
+    def test_arquivo_adulterado_falha_na_verificacao(self):
+        manifesto = self._manifesto()
+        manifesto["arquivos"][1]["sha256_sql"] = "0" * 64
+        with self.assertRaisesRegex(ErroBackup, "tipo.sql.gz: SHA-256"):
+            self._restaurar(manifesto)
+
+    def test_separar_ddl_mantem_o_indice_do_auto_increment(self):
+        ddl = DDL_PROCESSO.replace("PRIMARY KEY (`id`)", "KEY `processo_id_idx` (`id`)")
+        separada = mysql.separar_ddl(ddl)
+        self.assertIn("KEY `processo_id_idx` (`id`)", separada.create)
+        self.assertEqual(separada.indices, ["UNIQUE KEY `processo_numero_uniq` (`numero`)", "KEY `processo_tipo_idx` (`tipo_id`)"])
+        self.assertEqual(len(separada.fks), 1)
+
+
+@CACHE_DE_TESTE
+class RestauracaoParalelaMySQLTests(TransactionTestCase):
+    """Ida e volta num MySQL/MariaDB de verdade (DB_* apontando para um contêiner local)."""
+
+    def setUp(self):
+        if connection.vendor != "mysql":
+            self.skipTest("requer MySQL/MariaDB")
+
+    def _tabelas(self, banco: str) -> dict:
+        with connection.cursor() as cur:
+            cur.execute(
+                "SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'",
+                [banco],
+            )
+            tabelas = sorted(row[0] for row in cur.fetchall())
+            cur.execute(f"CHECKSUM TABLE {', '.join(f'`{banco}`.`{t}`' for t in tabelas)}")
+            checksums = {nome.split(".", 1)[1]: valor for nome, valor in cur.fetchall()}
+            cur.execute(
+                "SELECT TABLE_NAME, COUNT(DISTINCT INDEX_NAME) FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = %s GROUP BY TABLE_NAME", [banco],
+            )
+            indices = dict(cur.fetchall())
+            cur.execute(
+                "SELECT TABLE_NAME, COUNT(*) FROM information_schema.REFERENTIAL_CONSTRAINTS "
+                "WHERE CONSTRAINT_SCHEMA = %s GROUP BY TABLE_NAME", [banco],
+            )
+            fks = dict(cur.fetchall())
+        return {t: (checksums[t], indices.get(t, 0), fks.get(t, 0)) for t in tabelas}
+
+    def test_dump_e_restauracao_em_paralelo(self):
+        get_user_model().objects.create_user("restauracao", password="x")
+        Pessoa.objects.bulk_create(
+            Pessoa(nome=f"Pessoa {i}", cpf=f"{i:011d}", telefone="81999999999") for i in range(50)
+        )
+
+        db = connection.settings_dict
+        origem, destino = db["NAME"], f"{db['NAME']}_restauracao"
+        diretorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, diretorio)
+        try:
+            gerados, _ = mysql.dump_paralelo(
+                db, mysql.gravar_em_diretorio(diretorio, formato="gz", threads=2), paralelo=3,
+            )
+        except ErroBackup as e:
+            self.skipTest(str(e))  # sem o privilégio RELOAD
+        manifesto = {"arquivos": [g.como_dict() for g in gerados]}
+
+        with connection.cursor() as cur:
+            cur.execute(f"CREATE DATABASE `{destino}`")
+        try:
+            contagens = mysql.restaurar_paralelo(db, destino, diretorio, manifesto, paralelo=3)
+            self.assertTrue(all(esperado == encontrado for esperado, encontrado in contagens.values()), contagens)
+            self.assertGreaterEqual(contagens["protocolos_pessoa"][1], 50)
+            self.assertEqual(self._tabelas(destino), self._tabelas(origem))
+        finally:
+            with connection.cursor() as cur:
+                cur.execute(f"DROP DATABASE IF EXISTS `{destino}`")
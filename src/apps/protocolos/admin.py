@@ -1,3 +1,4 @@
+from django import forms
 from django.contrib import admin
 from .models import (
     Pessoa,
@@ -7,7 +8,14 @@ from .models import (
     Processo,
     MovimentacaoProcesso,
     Comprovante,
+    ProcessoSnapshot,
+    SequenciaProcesso,
+    NotificacaoEmail,
+    DocumentoGerado,
+    PermanenciaSetor,
+    FluxoSetor,
 )
+from .services.processo_service import abrir_processo, get_protocolo_geral
 
 
 @admin.register(Pessoa)
@@ -71,8 +79,29 @@ class DepartamentoMembroAdmin(admin.ModelAdmin):
     ordering = ("-criado_em",)
 
 
+class ProcessoAdminForm(forms.ModelForm):
+    class Meta:
+        model = Processo
+        fields = "__all__"
+
+    def clean(self):
+        cleaned = super().clean()
+        if self.instance.pk:
+            return cleaned
+        # ✅ o que abrir_processo recusaria vira erro do formulário (não 500 no save_model)
+        if not get_protocolo_geral():
+            raise forms.ValidationError('Departamento marcado como "PROTOCOLO GERAL" não encontrado (INTERNO/ativo).')
+        numero, ano = cleaned.get("numero_manual"), cleaned.get("ano")
+        if numero is not None and ano is not None and Processo.numero_no_arquivo_frio(numero, ano):
+            raise forms.ValidationError(
+                f"Já existe um processo com o número {Processo.format_numero(numero, ano)} (arquivo frio)."
+            )
+        return cleaned
+
+
 @admin.register(Processo)
 class ProcessoAdmin(admin.ModelAdmin):
+    form = ProcessoAdminForm
     list_display = (
         "numero_formatado",
         "tipo_processo",
@@ -86,6 +115,21 @@ class ProcessoAdmin(admin.ModelAdmin):
     search_fields = ("numero_formatado", "assunto", "descricao", "criado_por__username")
     ordering = ("-criado_em",)
 
+    def get_readonly_fields(self, request, obj=None):
+        # numero_formatado sai de (numero_manual, ano); na abertura, o recebimento no
+        # PROTOCOLO GERAL é gravado por abrir_processo
+        if obj is None:
+            return ("numero_formatado", "recebido_em", "recebido_por", "responsavel_setor")
+        return ("numero_formatado",)
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            obj.numero_formatado = Processo.format_numero(obj.numero_manual, obj.ano)
+            return super().save_model(request, obj, form, change)
+        # ✅ mesma abertura da tela (movimentação no PROTOCOLO GERAL + comprovante ABERTURA)
+        # (duplicidade de número e falta do PROTOCOLO GERAL já barradas por ProcessoAdminForm)
+        abrir_processo(obj, interessados=[], usuario=request.user)
+
 
 @admin.register(MovimentacaoProcesso)
 class MovimentacaoProcessoAdmin(admin.ModelAdmin):
@@ -102,3 +146,56 @@ class ComprovanteAdmin(admin.ModelAdmin):
     search_fields = ("codigo_autenticacao", "processo__id", "processo__numero_formatado")
     ordering = ("-emitido_em",)
     readonly_fields = ("codigo_autenticacao", "emitido_em", "emitido_por")
+
+
+@admin.register(ProcessoSnapshot)
+class ProcessoSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("processo", "versao_formato", "gerado_em")
+    search_fields = ("processo__numero_formatado",)
+    ordering = ("-gerado_em",)
+    readonly_fields = ("processo", "versao_formato", "gerado_em")
+    exclude = ("dados",)
+
+
+@admin.register(SequenciaProcesso)
+class SequenciaProcessoAdmin(admin.ModelAdmin):
+    list_display = ("ano", "ultimo_numero")
+    ordering = ("-ano",)
+
+
+@admin.register(NotificacaoEmail)
+class NotificacaoEmailAdmin(admin.ModelAdmin):
+    list_display = ("destinatario", "numero_processo", "setor", "status", "tentativas", "criado_em", "enviado_em")
+    list_filter = ("status",)
+    search_fields = ("destinatario", "numero_processo")
+    ordering = ("-criado_em",)
+    readonly_fields = ("criado_em", "enviado_em", "erro")
+
+
+@admin.register(DocumentoGerado)
+class DocumentoGeradoAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "titulo", "status", "quantidade", "solicitado_por", "criado_em", "concluido_em")
+    list_filter = ("tipo", "status")
+    search_fields = ("titulo", "solicitado_por__username")
+    ordering = ("-criado_em",)
+    readonly_fields = ("criado_em", "concluido_em", "erro")
+
+
+@admin.register(PermanenciaSetor)
+class PermanenciaSetorAdmin(admin.ModelAdmin):
+    list_display = ("processo_id", "setor", "tipo_processo", "entrada", "recebido_em", "saida", "duracao_ms")
+    list_filter = ("setor", "tipo_processo", "mes")
+    ordering = ("-entrada",)
+    list_select_related = ("setor", "tipo_processo")
+    # ✅ calculado por atualizar_permanencias: só leitura
+    readonly_fields = [f.name for f in PermanenciaSetor._meta.fields]
+
+
+@admin.register(FluxoSetor)
+class FluxoSetorAdmin(admin.ModelAdmin):
+    list_display = ("mes", "origem", "destino", "tipo_tramitacao", "acao", "quantidade")
+    list_filter = ("mes", "tipo_tramitacao", "acao", "origem")
+    ordering = ("-mes", "-quantidade")
+    list_select_related = ("origem", "destino")
+    # ✅ somado por atualizar_fluxo: só leitura
+    readonly_fields = [f.name for f in FluxoSetor._meta.fields]
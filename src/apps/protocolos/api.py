@@ -0,0 +1,428 @@
+# apps/protocolos/api.py
+"""
+API JSON somente leitura (/api/v1/).
+
+- Autenticação: header "Authorization: Token <chave>" (accounts.TokenAPI).
+  O papel é o do Perfil do usuário dono do token.
+- Paginação por cursor (keyset em id decrescente): ?limit=50&cursor=<next_cursor>.
+- ?fields=a,b,c escolhe os campos (vira values(); campo desconhecido -> 400).
+- ETag em todas as respostas (If-None-Match -> 304), derivado das versões em cache
+  (versoes.py) e dos parâmetros: o 304 sai sem consultar nem serializar nada.
+
+As linhas saem de values() direto para o JSON, sem instanciar models.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import re
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Q, Subquery
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+
+from accounts.models import Perfil, TokenAPI
+from core.db_router import leitura_na_replica
+from core.validators import only_digits
+
+from . import versoes
+from .models import MovimentacaoProcesso, MovimentacaoProcessoFria, Pessoa, Processo
+from .services.consulta_service import LIMITE_LOTE, resolver_numeros
+
+try:
+    import orjson
+except ImportError:  # opcional: só acelera a serialização
+    orjson = None
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+# ultimo_uso_em é gravado no máximo uma vez por este intervalo (segundos)
+INTERVALO_ULTIMO_USO = 60
+
+
+# =============================================================================
+# Resposta / erros
+# =============================================================================
+
+_encoder = DjangoJSONEncoder()
+
+
+def _dumps(dados) -> bytes:
+    # ✅ datas/Decimal pelo DjangoJSONEncoder nos dois caminhos: a saída não depende do orjson
+    if orjson is not None:
+        return orjson.dumps(dados, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(dados, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _etag_confere(request, etag: str) -> bool:
+    recebidos = [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]
+    return f'"{etag}"' in recebidos or "*" in recebidos
+
+
+def _etag_da_requisicao(request, recurso: str, *versoes_) -> str:
+    """ETag de uma resposta: versões dos dados + tudo da requisição que muda o corpo."""
+    return versoes.etag(recurso, *versoes_, request.get_host(), request.GET.urlencode())
+
+
+def _resposta(request, dados, *, etag: str, status: int = 200) -> HttpResponse:
+    if status == 200 and _etag_confere(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(_dumps(dados), status=status, content_type="application/json")
+    response["ETag"] = f'"{etag}"'
+    response["Cache-Control"] = "private, no-cache"
+    response["Vary"] = "Authorization"
+    return response
+
+
+def _erro(status: int, mensagem: str) -> HttpResponse:
+    return HttpResponse(_dumps({"erro": mensagem}), status=status, content_type="application/json")
+
+
+class ErroParametro(ValueError):
+    pass
+
+
+# =============================================================================
+# Autenticação por token
+# =============================================================================
+
+def api_token_required(*papeis: str):
+    """Exige token válido; com `papeis`, restringe pelo Perfil.Papel do dono."""
+    def decorator(view):
+        @wraps(view)
+        def _wrapped(request, *args, **kwargs):
+            tipo, _, chave = request.headers.get("Authorization", "").partition(" ")
+            if tipo.lower() not in ("token", "bearer") or not chave.strip():
+                return _erro(401, "Informe o header Authorization: Token <chave>.")
+
+            token = (
+                TokenAPI.objects
+                .select_related("user", "user__perfil")
+                .filter(chave_hash=TokenAPI.calcular_hash(chave.strip()), ativo=True, user__is_active=True)
+                .first()
+            )
+            if not token:
+                return _erro(401, "Token inválido ou inativo.")
+
+            papel = getattr(getattr(token.user, "perfil", None), "papel", Perfil.Papel.CONSULTA)
+            if papeis and papel not in papeis:
+                return _erro(403, "Seu papel não tem acesso a este recurso.")
+
+            agora = timezone.now()
+            if not token.ultimo_uso_em or (agora - token.ultimo_uso_em).total_seconds() > INTERVALO_ULTIMO_USO:
+                TokenAPI.objects.filter(pk=token.pk).update(ultimo_uso_em=agora)
+
+            request.user = token.user
+            request.api_papel = papel
+            try:
+                return view(request, *args, **kwargs)
+            except ErroParametro as e:
+                return _erro(400, str(e))
+
+        return _wrapped
+    return decorator
+
+
+# =============================================================================
+# fields= / cursor
+# =============================================================================
+
+def _campos(request, disponiveis: dict, padrao: list[str], extras: tuple = ()) -> list[str]:
+    bruto = (request.GET.get("fields") or "").strip()
+    if not bruto:
+        return list(padrao)
+
+    campos = [c.strip() for c in bruto.split(",") if c.strip()]
+    desconhecidos = [c for c in campos if c not in disponiveis and c not in extras]
+    if desconhecidos:
+        raise ErroParametro(
+            f"Campo(s) desconhecido(s): {', '.join(desconhecidos)}. "
+            f"Disponíveis: {', '.join([*disponiveis, *extras])}."
+        )
+    if "id" not in campos:
+        campos.insert(0, "id")  # o cursor precisa do id
+    return campos
+
+
+def _codificar_cursor(ultimo_id: int) -> str:
+    return base64.urlsafe_b64encode(str(ultimo_id).encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ErroParametro("Cursor inválido.")
+
+
+def _limite(request) -> int:
+    bruto = request.GET.get("limit") or ""
+    if not bruto:
+        return LIMITE_PADRAO
+    if not bruto.isdigit() or int(bruto) < 1:
+        raise ErroParametro("limit deve ser um inteiro positivo.")
+    return min(int(bruto), LIMITE_MAXIMO)
+
+
+def _paginar(request, qs, mapa: dict, campos: list[str]) -> tuple[list[dict], str | None]:
+    """Keyset em id decrescente: sem OFFSET, custo constante em qualquer página."""
+    cursor = request.GET.get("cursor")
+    if cursor:
+        qs = qs.filter(id__lt=_decodificar_cursor(cursor))
+
+    limite = _limite(request)
+    caminhos = [mapa[c] for c in campos if c in mapa]
+    rows = list(qs.order_by("-id").values(*caminhos)[: limite + 1])
+
+    proximo = None
+    if len(rows) > limite:
+        rows = rows[:limite]
+        proximo = _codificar_cursor(rows[-1]["id"])
+
+    # caminhos ORM -> nomes públicos, na ordem pedida em fields=
+    pares = [(c, mapa[c]) for c in campos if c in mapa]
+    rows = [{publico: row[caminho] for publico, caminho in pares} for row in rows]
+    return rows, proximo
+
+
+def _pagina(request, rows: list[dict], proximo: str | None) -> dict:
+    proximo_url = None
+    if proximo:
+        params = request.GET.copy()
+        params["cursor"] = proximo
+        proximo_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return {"results": rows, "next_cursor": proximo, "next": proximo_url}
+
+
+# =============================================================================
+# Processos
+# =============================================================================
+
+PROCESSO_CAMPOS = {
+    "id": "id",
+    "numero": "numero_formatado",
+    "ano": "ano",
+    "tipo_processo": "tipo_processo__nome",
+    "tipo_processo_id": "tipo_processo_id",
+    "assunto": "assunto",
+    "descricao": "descricao",
+    "prioridade": "prioridade",
+    "status": "status",
+    "criado_em": "criado_em",
+    "atualizado_em": "atualizado_em",
+    "recebido_em": "recebido_em",
+    "arquivado_em": "arquivado_em",
+    "responsavel_setor": "responsavel_setor__username",
+    "setor_atual": "setor_atual",
+    "setor_atual_id": "setor_atual_id",
+    "interessados": "interessados_resumo",
+}
+PROCESSO_PADRAO = ["id", "numero", "tipo_processo", "assunto", "prioridade", "status", "criado_em", "setor_atual"]
+
+# ✅ dados pessoais (nome/CPF dos interessados, cadastro de pessoas): só estes papéis
+PAPEIS_DADOS_PESSOAIS = (Perfil.Papel.ADMIN, Perfil.Papel.PROTOCOLISTA)
+
+
+def _anotar_setor_atual(qs):
+    ultima = MovimentacaoProcesso.objects.filter(processo=OuterRef("pk")).order_by("-registrado_em", "-id")
+    return qs.annotate(
+        setor_atual=Subquery(ultima.values("departamento_destino__nome")[:1]),
+        setor_atual_id=Subquery(ultima.values("departamento_destino_id")[:1]),
+    )
+
+
+@leitura_na_replica
+@require_GET
+@api_token_required()
+def processos(request):
+    """
+    GET /api/v1/processos/
+    Filtros (mesmos de processos_list): q, tipo, setor, status, prioridade.
+    Campo opcional: interessados (coluna desnormalizada, sem consulta a mais).
+    Dados pessoais só para ADMIN/PROTOCOLISTA: o campo interessados e a busca de
+    q por nome/CPF do interessado; os demais papéis buscam só número, assunto e descrição.
+    ETag pela versão global da lista: qualquer alteração de processo o vence
+    (ver versoes.versao_lista_processos).
+    """
+    dados_pessoais = request.api_papel in PAPEIS_DADOS_PESSOAIS
+    campos = _campos(request, PROCESSO_CAMPOS, PROCESSO_PADRAO)
+    if "interessados" in campos and not dados_pessoais:
+        return _erro(403, "O campo interessados (nome e CPF) é restrito a ADMIN e PROTOCOLISTA.")
+
+    etag = _etag_da_requisicao(
+        request, "api-processos", versoes.versao_lista_processos(), versoes.versao_catalogo_departamentos(),
+        dados_pessoais,
+    )
+    if _etag_confere(request, etag):
+        return _resposta(request, None, etag=etag)
+
+    q = (request.GET.get("q") or "").strip()
+    tipo = (request.GET.get("tipo") or "").strip()
+    setor = (request.GET.get("setor") or "").strip()
+    status = (request.GET.get("status") or "").strip()
+    prioridade = (request.GET.get("prioridade") or "").strip()
+
+    qs = Processo.objects.all()
+
+    # ✅ subquery do setor atual só quando pedida (campo ou filtro)
+    if setor or "setor_atual" in campos or "setor_atual_id" in campos:
+        qs = _anotar_setor_atual(qs)
+
+    if q:
+        digits = re.sub(r"\D+", "", q)
+        filtros = Q(numero_formatado__icontains=q) | Q(assunto__icontains=q) | Q(descricao__icontains=q)
+        if dados_pessoais:
+            filtros |= Q(interessados__nome__icontains=q)
+            if digits:
+                filtros |= Q(interessados__cpf__icontains=digits)
+        qs = qs.filter(filtros).distinct()
+
+    for nome, valor in (("tipo", tipo), ("setor", setor)):
+        if valor and not valor.isdigit():
+            raise ErroParametro(f"{nome} deve ser o id numérico.")
+
+    if tipo:
+        qs = qs.filter(tipo_processo_id=tipo)
+    if setor:
+        qs = qs.filter(setor_atual_id=setor)
+    if status:
+        qs = qs.filter(status=status)
+    if prioridade:
+        qs = qs.filter(prioridade=prioridade)
+
+    rows, proximo = _paginar(request, qs, PROCESSO_CAMPOS, campos)
+
+    if "interessados" in campos:
+        # o resumo guarda o CPF formatado; a API continua devolvendo só os dígitos
+        for row in rows:
+            row["interessados"] = [{**i, "cpf": only_digits(i["cpf"])} for i in row["interessados"]]
+
+    return _resposta(request, _pagina(request, rows, proximo), etag=etag)
+
+
+@leitura_na_replica
+@csrf_exempt  # autenticação por header (token), não por cookie
+@require_http_methods(["GET", "POST"])
+@api_token_required()
+def processos_lote(request):
+    """
+    Resolve vários números de uma vez (balcão de leitura, malote).
+    POST {"numeros": ["0123/26", "012426", ...]}  ou  GET ?numeros=0123/26,0124/26
+    Resposta na ordem da entrada; desconhecidos/ inválidos vêm com encontrado=false e "erro".
+    """
+    if request.method == "POST":
+        try:
+            corpo = json.loads(request.body or b"{}")
+        except ValueError:
+            raise ErroParametro("Corpo JSON inválido.")
+        numeros = corpo.get("numeros") if isinstance(corpo, dict) else None
+        if not isinstance(numeros, list):
+            raise ErroParametro('Envie {"numeros": [...]}.')
+    else:
+        numeros = [n for n in (request.GET.get("numeros") or "").split(",") if n.strip()]
+
+    if len(numeros) > LIMITE_LOTE:
+        raise ErroParametro(f"Envie no máximo {LIMITE_LOTE} números por consulta.")
+
+    etag = _etag_da_requisicao(
+        request, "api-lote", versoes.versao_lista_processos(), versoes.versao_catalogo_departamentos(),
+        hashlib.sha1(_dumps(numeros)).hexdigest(),
+    )
+    if _etag_confere(request, etag):
+        return _resposta(request, None, etag=etag)
+
+    resultados = resolver_numeros(numeros)
+    return _resposta(request, {
+        "results": resultados,
+        "nao_encontrados": [r["entrada"] for r in resultados if not r["encontrado"]],
+    }, etag=etag)
+
+
+# =============================================================================
+# Movimentações de um processo
+# =============================================================================
+
+MOVIMENTACAO_CAMPOS = {
+    "id": "id",
+    "tipo_tramitacao": "tipo_tramitacao",
+    "acao": "acao",
+    "departamento_origem": "departamento_origem__nome",
+    "departamento_origem_id": "departamento_origem_id",
+    "departamento_destino": "departamento_destino__nome",
+    "departamento_destino_id": "departamento_destino_id",
+    "observacao": "observacao",
+    "registrado_em": "registrado_em",
+    "registrado_por": "registrado_por__username",
+}
+MOVIMENTACAO_PADRAO = list(MOVIMENTACAO_CAMPOS)
+
+
+@require_GET
+@api_token_required()
+def processo_movimentacoes(request, pk: int):
+    """GET /api/v1/processos/<id>/movimentacoes/ (inclui processos do arquivo frio)."""
+    # ✅ versão em cache: If-None-Match responde 304 sem consultar as movimentações
+    versao = versoes.versao_processo(pk)
+    if versao is None:
+        return _erro(404, "Processo não encontrado.")
+
+    etag = _etag_da_requisicao(request, "api-movs", pk, versao)
+    if _etag_confere(request, etag):
+        return _resposta(request, None, etag=etag)
+
+    campos = _campos(request, MOVIMENTACAO_CAMPOS, MOVIMENTACAO_PADRAO)
+    modelo = MovimentacaoProcessoFria if versao.startswith("frio-") else MovimentacaoProcesso
+    rows, proximo = _paginar(request, modelo.objects.filter(processo_id=pk), MOVIMENTACAO_CAMPOS, campos)
+
+    return _resposta(request, _pagina(request, rows, proximo), etag=etag)
+
+
+# =============================================================================
+# Pessoas
+# =============================================================================
+
+PESSOA_CAMPOS = {
+    "id": "id",
+    "nome": "nome",
+    "cpf": "cpf",
+    "email": "email",
+    "telefone": "telefone",
+    "whatsapp": "whatsapp",
+    "ativo": "ativo",
+    "criado_em": "criado_em",
+    "atualizado_em": "atualizado_em",
+}
+PESSOA_PADRAO = ["id", "nome", "cpf", "ativo"]
+
+
+@leitura_na_replica
+@require_GET
+@api_token_required(*PAPEIS_DADOS_PESSOAIS)
+def pessoas(request):
+    """GET /api/v1/pessoas/ — filtros: q (nome ou início do CPF), ativo (1/0). Dados pessoais: ADMIN/PROTOCOLISTA."""
+    etag = _etag_da_requisicao(request, "api-pessoas", versoes.versao_catalogo_pessoas())
+    if _etag_confere(request, etag):
+        return _resposta(request, None, etag=etag)
+
+    campos = _campos(request, PESSOA_CAMPOS, PESSOA_PADRAO)
+
+    qs = Pessoa.objects.all()
+
+    q = (request.GET.get("q") or "").strip()
+    if q:
+        digits = re.sub(r"\D+", "", q)
+        qs = qs.filter(cpf__startswith=digits) if digits else qs.filter(nome__icontains=q)
+
+    ativo = (request.GET.get("ativo") or "").strip()
+    if ativo in ("0", "1"):
+        qs = qs.filter(ativo=(ativo == "1"))
+
+    rows, proximo = _paginar(request, qs, PESSOA_CAMPOS, campos)
+    return _resposta(request, _pagina(request, rows, proximo), etag=etag)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import api
+
+urlpatterns = [
+    path("processos/", api.processos, name="api_v1_processos"),
+    path("processos/lote/", api.processos_lote, name="api_v1_processos_lote"),
+    path("processos/<int:pk>/movimentacoes/", api.processo_movimentacoes, name="api_v1_processo_movimentacoes"),
+    path("pessoas/", api.pessoas, name="api_v1_pessoas"),
+]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProtocolosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'protocolos'
+
+    def ready(self):
+        import protocolos.signals  # noqa
@@ -0,0 +1,224 @@
+# apps/protocolos/feed.py
+"""
+Feed ao vivo da Caixa de Entrada (Server-Sent Events, só sob ASGI).
+
+Um único NotificadorCaixaEntrada por worker consulta as movimentações novas
+a cada INTERVALO segundos (uma consulta por tick para todas as conexões) e
+distribui os eventos para as filas dos clientes conectados, filtrando pelos
+setores de cada um. Conexão ociosa é só uma corrotina esperando na fila.
+
+O id (AUTO_INCREMENT) é reservado no INSERT, não no COMMIT: uma transação mais
+lenta pode aparecer depois de ids maiores. Por isso cada consulta relê também as
+movimentações dos últimos SOBREPOSICAO segundos e o notificador descarta as que
+já distribuiu; o cliente (caixa_entrada_feed.js) também descarta ids repetidos.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Departamento, MovimentacaoProcesso
+
+logger = logging.getLogger(__name__)
+
+INTERVALO = getattr(settings, "CAIXA_ENTRADA_SSE_INTERVALO", 3)
+HEARTBEAT = 15  # segundos (mantém proxies e o EventSource vivos)
+TAMANHO_FILA = 100  # cliente lento perde eventos em vez de segurar memória
+# eventos novos são sempre recentes: o limite em registrado_em deixa o MySQL ler só a
+# partição do ano corrente (a do ano anterior também, só na virada do ano)
+JANELA_EVENTOS = timedelta(days=1)
+# releitura a cada consulta: cobre transações que comitam fora da ordem dos ids
+SOBREPOSICAO = timedelta(seconds=getattr(settings, "CAIXA_ENTRADA_SSE_SOBREPOSICAO", 30))
+
+_CHEGADA = (
+    Q(tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.INTERNA, acao=MovimentacaoProcesso.Acao.ENCAMINHADO)
+    | Q(tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.EXTERNA, acao=MovimentacaoProcesso.Acao.DEVOLVIDO)
+)
+_RECEBIMENTO = Q(tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.INTERNA, acao=MovimentacaoProcesso.Acao.RECEBIDO)
+
+
+# =============================================================================
+# Consultas (síncronas; chamadas via sync_to_async)
+# =============================================================================
+
+def _estado_inicial() -> tuple[int, list[int]]:
+    """Último id e ids dentro da sobreposição: o que já existia antes da primeira assinatura."""
+    ultimo_id = MovimentacaoProcesso.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    recentes = list(
+        MovimentacaoProcesso.objects
+        .filter(registrado_em__gte=timezone.now() - SOBREPOSICAO)
+        .values_list("id", flat=True)
+    )
+    return ultimo_id, recentes
+
+
+def buscar_eventos(depois_de: int, limite: int = 500) -> list[dict]:
+    """
+    Chegadas e recebimentos em setores INTERNOS com id > depois_de, mais os registrados
+    nos últimos SOBREPOSICAO segundos (comitados fora de ordem), numa consulta.
+    """
+    chegada_anterior = MovimentacaoProcesso.objects.filter(
+        _CHEGADA,
+        processo_id=OuterRef("processo_id"),
+        departamento_destino_id=OuterRef("departamento_destino_id"),
+        id__lt=OuterRef("id"),
+    )
+    agora = timezone.now()
+    rows = (
+        MovimentacaoProcesso.objects
+        .filter(
+            Q(id__gt=depois_de) | Q(registrado_em__gte=agora - SOBREPOSICAO),
+            registrado_em__gte=agora - JANELA_EVENTOS,
+            departamento_destino__tipo=Departamento.Tipo.INTERNO,
+        )
+        # recebimento só conta se houve chegada antes (a abertura no PG não foi "pendente")
+        .filter(_CHEGADA | (_RECEBIMENTO & Q(Exists(chegada_anterior))))
+        .order_by("id")
+        .values(
+            "id",
+            "acao",
+            "processo_id",
+            "processo__numero_formatado",
+            "processo__assunto",
+            "processo__tipo_processo__nome",
+            "departamento_destino_id",
+            "departamento_destino__nome",
+        )[:limite]
+    )
+    return [
+        {
+            "id": r["id"],
+            "tipo": "recebido" if r["acao"] == MovimentacaoProcesso.Acao.RECEBIDO else "chegada",
+            "processo_id": r["processo_id"],
+            "numero": r["processo__numero_formatado"],
+            "assunto": r["processo__assunto"],
+            "tipo_processo": r["processo__tipo_processo__nome"],
+            "setor_id": r["departamento_destino_id"],
+            "setor_nome": r["departamento_destino__nome"],
+        }
+        for r in rows
+    ]
+
+
+def formatar_evento(ev: dict, cursor: int | None = None) -> str:
+    """`cursor` vai no campo id (Last-Event-ID da reconexão); o id real segue no data."""
+    cursor = ev["id"] if cursor is None else cursor
+    return f"id: {cursor}\nevent: {ev['tipo']}\ndata: {json.dumps(ev, ensure_ascii=False)}\n\n"
+
+
+# =============================================================================
+# Notificador (um por processo/event loop)
+# =============================================================================
+
+class NotificadorCaixaEntrada:
+    def __init__(self, intervalo: float = INTERVALO):
+        self.intervalo = intervalo
+        self._assinantes: dict[asyncio.Queue, frozenset | None] = {}
+        self._tarefa: asyncio.Task | None = None
+        self._ultimo_id: int | None = None
+        self._entregues: dict[int, object] = {}  # id -> quando foi distribuído (dedupe da sobreposição)
+
+    @property
+    def conexoes(self) -> int:
+        return len(self._assinantes)
+
+    async def assinar(self, setores: frozenset | None) -> tuple[asyncio.Queue, int]:
+        """`setores=None` recebe tudo (ADMIN). Devolve a fila e o último id já conhecido."""
+        fila: asyncio.Queue = asyncio.Queue(maxsize=TAMANHO_FILA)
+        self._assinantes[fila] = setores
+
+        if self._ultimo_id is None:
+            self._ultimo_id, recentes = await sync_to_async(_estado_inicial, thread_sensitive=False)()
+            agora = timezone.now()
+            self._entregues = dict.fromkeys(recentes, agora)
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._rodar())
+        return fila, self._ultimo_id
+
+    def cancelar(self, fila: asyncio.Queue) -> None:
+        self._assinantes.pop(fila, None)
+
+    def _distribuir(self, ev: dict) -> None:
+        for fila, setores in list(self._assinantes.items()):
+            if setores is not None and ev["setor_id"] not in setores:
+                continue
+            try:
+                fila.put_nowait(ev)
+            except asyncio.QueueFull:
+                pass
+
+    def _novos(self, eventos: list[dict]) -> list[dict]:
+        """Tira os já distribuídos (releitura da sobreposição) e avança o cursor."""
+        agora = timezone.now()
+        novos = [ev for ev in eventos if ev["id"] not in self._entregues]
+        for ev in novos:
+            self._entregues[ev["id"]] = agora
+            self._ultimo_id = max(self._ultimo_id or 0, ev["id"])
+        # o que saiu da janela de releitura não volta mais
+        limite = agora - SOBREPOSICAO
+        self._entregues = {i: quando for i, quando in self._entregues.items() if quando >= limite}
+        return novos
+
+    async def _rodar(self) -> None:
+        # sem conexões, a tarefa termina (e volta na próxima assinatura)
+        while self._assinantes:
+            await asyncio.sleep(self.intervalo)
+            try:
+                eventos = await sync_to_async(buscar_eventos, thread_sensitive=False)(self._ultimo_id)
+            except Exception:
+                logger.exception("Falha ao consultar movimentações para o feed da caixa de entrada")
+                continue
+
+            for ev in self._novos(eventos):
+                self._distribuir(ev)
+
+
+_notificadores: dict[int, NotificadorCaixaEntrada] = {}
+
+
+def get_notificador() -> NotificadorCaixaEntrada:
+    """Um notificador por event loop (o servidor ASGI roda um loop por worker)."""
+    loop = asyncio.get_running_loop()
+    notificador = _notificadores.get(id(loop))
+    if notificador is None:
+        notificador = _notificadores[id(loop)] = NotificadorCaixaEntrada()
+    return notificador
+
+
+async def stream_eventos(setores: frozenset | None, ultimo_visto: int | None = None):
+    """Gerador assíncrono do corpo text/event-stream de uma conexão."""
+    notificador = get_notificador()
+    fila, ultimo_id = await notificador.assinar(setores)
+    try:
+        yield f"retry: {int(INTERVALO * 1000)}\n\n"
+
+        # o id do evento SSE é o maior já enviado (não regride com evento fora de ordem)
+        cursor = ultimo_visto or 0
+
+        # reconexão (Last-Event-ID): entrega o que chegou enquanto o cliente estava fora
+        # (com a sobreposição; o cliente descarta o que já tinha visto)
+        if ultimo_visto is not None:
+            perdidos = await sync_to_async(buscar_eventos, thread_sensitive=False)(ultimo_visto)
+            for ev in perdidos:
+                if ev["id"] <= ultimo_id and (setores is None or ev["setor_id"] in setores):
+                    cursor = max(cursor, ev["id"])
+                    yield formatar_evento(ev, cursor)
+
+        while True:
+            try:
+                ev = await asyncio.wait_for(fila.get(), timeout=HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            cursor = max(cursor, ev["id"])
+            yield formatar_evento(ev, cursor)
+    finally:
+        notificador.cancelar(fila)
@@ -427,6 +427,7 @@ class ProcessoCreateForm(forms.Form):
     numero_processo = forms.CharField(
         label="Número do processo",
         max_length=7,
+        required=False,
         widget=forms.TextInput(
             attrs={
                 "class": "form-control",
@@ -435,7 +436,7 @@ class ProcessoCreateForm(forms.Form):
                 "inputmode": "numeric",
             }
         ),
-        help_text="Formato obrigatório: 0000/00 (ex.: 0123/26).",
+        help_text="Formato 0000/00 (ex.: 0123/26). Deixe em branco para numeração automática do ano.",
     )
 
     cpf = forms.CharField(
@@ -483,19 +484,19 @@ class ProcessoCreateForm(forms.Form):
         self.ano_int = None
 
     def clean_numero_processo(self):
-        raw = self.cleaned_data.get("numero_processo") or ""
+        raw = (self.cleaned_data.get("numero_processo") or "").strip()
+        if not raw:
+            # ✅ numeração automática (SequenciaProcesso) na gravação
+            return ""
+
         normal = _normalize_numero_processo(raw)
 
         numero4, ano2 = normal.split("/")
         self.numero_int = int(numero4)
         self.ano_int = int(ano2)
 
-        if Processo.objects.filter(ano=self.ano_int, numero_manual=self.numero_int).exists():
-            raise ValidationError(f"Já existe um processo com o número {normal}.")
-
-        if Processo.objects.filter(numero_formatado=normal).exists():
-            raise ValidationError(f"Já existe um processo com o número {normal}.")
-
+        # ✅ duplicidade (tabelas quentes e arquivo frio) fica com abrir_processo: o ValueError
+        # dele volta como erro deste campo na view (sem consultar o arquivo frio duas vezes)
         return normal
 
     def clean_cpf(self):
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from protocolos.services.arquivo_frio_service import ids_elegiveis_arquivo_frio, mover_para_arquivo_frio
+
+
+class Command(BaseCommand):
+    help = (
+        "Move processos ARQUIVADOS antigos (ano anterior ao corte), com movimentações, "
+        "interessados e comprovantes, para as tabelas do arquivo frio."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ano-corte",
+            type=int,
+            required=True,
+            help="Move processos com ano ANTERIOR a este (aceita 2019 ou 19).",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=200,
+            help="Processos por transação (default: 200).",
+        )
+        parser.add_argument(
+            "--limite",
+            type=int,
+            default=None,
+            help="Quantidade máxima de processos nesta execução.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas mostra quantos processos seriam movidos.",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["lote"] <= 0:
+            raise CommandError("--lote deve ser maior que zero.")
+
+        if opts["dry_run"]:
+            qtd = len(ids_elegiveis_arquivo_frio(ano_corte=opts["ano_corte"], limite=opts["limite"]))
+            self.stdout.write(self.style.NOTICE(f"Processos elegíveis: {qtd}"))
+            return
+
+        def progresso(total):
+            self.stdout.write(f"{total} processos movidos...")
+
+        total = mover_para_arquivo_frio(
+            ano_corte=opts["ano_corte"],
+            lote=opts["lote"],
+            limite=opts["limite"],
+            progresso=progresso,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Processos movidos para o arquivo frio: {total}"))
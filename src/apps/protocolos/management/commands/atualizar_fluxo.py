@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from protocolos.services import fluxo_service
+
+
+class Command(BaseCommand):
+    help = (
+        "Soma na matriz de fluxo entre setores (FluxoSetor) as movimentações novas desde a "
+        "última rodada. Rode no cron (ex.: a cada hora); o dashboard do ADMIN lê o agregado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reprocessar",
+            action="store_true",
+            help=(
+                "Apaga a matriz e recalcula a partir de todas as movimentações das tabelas quentes "
+                "(processos já no arquivo frio deixam de ser contados)."
+            ),
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=fluxo_service.LOTE,
+            help=f"Movimentações somadas por transação (default: {fluxo_service.LOTE}).",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["lote"] < 1:
+            raise CommandError("--lote deve ser positivo.")
+
+        inicio = time.monotonic()
+        resultado = fluxo_service.atualizar(reprocessar=opts["reprocessar"], lote=opts["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Movimentações somadas: {resultado['movimentacoes']} "
+            f"(registradas até {timezone.localtime(resultado['ate']):%d/%m/%Y %H:%M:%S}, {time.monotonic() - inicio:.1f}s)."
+        ))
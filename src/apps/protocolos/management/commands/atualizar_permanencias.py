@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from protocolos.services import permanencia_service
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula o tempo de permanência dos processos em cada setor (PermanenciaSetor) a partir "
+        "das movimentações novas desde a última rodada. Rode no cron (ex.: a cada hora)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reprocessar",
+            action="store_true",
+            help="Recalcula todos os processos, não só os que tiveram movimentação nova.",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=permanencia_service.LOTE,
+            help=f"Processos recalculados por transação (default: {permanencia_service.LOTE}).",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["lote"] < 1:
+            raise CommandError("--lote deve ser positivo.")
+
+        inicio = time.monotonic()
+        resultado = permanencia_service.atualizar(reprocessar=opts["reprocessar"], lote=opts["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Processos recalculados: {resultado['processos']}; permanências gravadas: {resultado['permanencias']} "
+            f"(registradas até {timezone.localtime(resultado['ate']):%d/%m/%Y %H:%M:%S}, {time.monotonic() - inicio:.1f}s)."
+        ))
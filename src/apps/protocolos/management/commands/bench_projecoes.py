@@ -0,0 +1,74 @@
+import gc
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
+
+from protocolos import projecoes
+from protocolos.models import MovimentacaoProcesso, Processo
+
+
+def _qs_models():
+    """Como a lista de processos carregava antes das projeções: models + select_related + prefetch."""
+    ultima = MovimentacaoProcesso.objects.filter(processo=OuterRef("pk")).order_by("-registrado_em", "-id")
+    return (
+        Processo.objects
+        .select_related("tipo_processo", "criado_por", "responsavel_setor")
+        .annotate(
+            ultima_tramitacao=Subquery(ultima.values("registrado_em")[:1]),
+            setor_atual=Subquery(ultima.values("departamento_destino__nome")[:1]),
+            setor_atual_id=Subquery(ultima.values("departamento_destino_id")[:1]),
+        )
+        .prefetch_related("interessados")
+        .order_by("-criado_em")
+    )
+
+
+def _carregar_models(limite: int) -> list:
+    processos = list(_qs_models()[:limite])
+    for p in processos:
+        list(p.interessados.all())  # o template percorre os interessados de cada linha
+    return processos
+
+
+def _carregar_projecoes(limite: int) -> list:
+    return projecoes.linhas(projecoes.qs_linhas().order_by("-criado_em"), limite=limite, interessados=True)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede tempo e memória de carregar as linhas da lista de processos: models "
+        "(select_related + prefetch) x projecoes.linhas (__slots__). Só lê o banco."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limite", type=int, default=5000, help="Linhas carregadas (default: 5000).")
+        parser.add_argument("--repeticoes", type=int, default=3, help="Rodadas de cada forma; vale a melhor (default: 3).")
+
+    def _medir(self, nome: str, carregar, limite: int, repeticoes: int) -> None:
+        melhor = None
+        for _ in range(max(repeticoes, 1)):
+            gc.collect()
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            linhas = carregar(limite)
+            duracao = time.perf_counter() - inicio
+            retido, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            quantidade = len(linhas)
+            del linhas
+            if melhor is None or duracao < melhor[0]:
+                melhor = (duracao, retido, pico, quantidade)
+
+        duracao, retido, pico, quantidade = melhor
+        por_linha = retido / quantidade / 1024 if quantidade else 0
+        self.stdout.write(
+            f"{nome:<10} {quantidade} linhas  {duracao:.2f}s  "
+            f"{por_linha:.1f} KB/linha  pico {pico / 2**20:.1f} MiB"
+        )
+
+    def handle(self, *args, **opts):
+        limite, repeticoes = max(opts["limite"], 1), opts["repeticoes"]
+        self._medir("models", _carregar_models, limite, repeticoes)
+        self._medir("projecoes", _carregar_projecoes, limite, repeticoes)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from protocolos.services.notificacao_service import LOTE_ENVIO, enviar_notificacoes_pendentes
+
+
+class Command(BaseCommand):
+    help = "Envia os e-mails pendentes da outbox (resumo por destinatário). Normalmente roda via run_worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=LOTE_ENVIO, help=f"Máximo de avisos por execução (default: {LOTE_ENVIO}).")
+
+    def handle(self, *args, **opts):
+        r = enviar_notificacoes_pendentes(limite=opts["lote"])
+        self.stdout.write(self.style.SUCCESS(f"E-mails: {r['enviados']} aviso(s) enviado(s), {r['falhas']} falha(s)."))
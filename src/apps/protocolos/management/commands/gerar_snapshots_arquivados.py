@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from protocolos.models import Processo
+from protocolos.services.snapshot_service import gravar_snapshot
+
+
+class Command(BaseCommand):
+    help = "Gera snapshots (dossiê congelado) dos processos ARQUIVADOS que ainda não possuem."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help="Regenera também os snapshots já existentes.",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=500,
+            help="Quantidade de processos lidos por vez (default: 500).",
+        )
+
+    def handle(self, *args, **opts):
+        qs = Processo.objects.filter(status=Processo.Status.ARQUIVADO).order_by("pk")
+        if not opts["todos"]:
+            qs = qs.filter(snapshot__isnull=True)
+
+        total = 0
+        for processo in qs.only("id", "status").iterator(chunk_size=opts["lote"]):
+            gravar_snapshot(processo)
+            total += 1
+            if total % opts["lote"] == 0:
+                self.stdout.write(f"{total} snapshots gerados...")
+
+        self.stdout.write(self.style.SUCCESS(f"Snapshots gerados: {total}"))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from protocolos.services import particionamento_service as particionamento
+
+
+def _tamanho(bytes_: int) -> str:
+    for unidade in ("B", "KB", "MB", "GB"):
+        if bytes_ < 1024 or unidade == "GB":
+            return f"{bytes_:.0f} {unidade}" if unidade == "B" else f"{bytes_:.1f} {unidade}"
+        bytes_ /= 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Particionamento por ano (MySQL) de Processo e MovimentacaoProcesso: cria as partições "
+        "dos próximos anos e mostra o tamanho de cada partição. Rode no cron antes da virada do ano."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--particionar",
+            action="store_true",
+            help=(
+                "Particiona as tabelas que ainda não são particionadas (reescreve a tabela: use em janela "
+                "de manutenção). Remove do banco os FKs de/para elas e o UNIQUE de numero_formatado; "
+                "a integridade passa a ser garantida pela aplicação."
+            ),
+        )
+        parser.add_argument(
+            "--anos-futuros",
+            type=int,
+            default=2,
+            help="Garante partições até o ano corrente + N (default: 2).",
+        )
+        parser.add_argument(
+            "--sql",
+            action="store_true",
+            help="Apenas mostra o SQL, sem executar.",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["anos_futuros"] < 0:
+            raise CommandError("--anos-futuros não pode ser negativo.")
+
+        try:
+            comandos = particionamento.planejar(particionar=opts["particionar"], anos_futuros=opts["anos_futuros"])
+            if comandos and not opts["sql"]:
+                particionamento.executar(comandos)
+            relatorio = particionamento.relatorio()
+        except particionamento.ErroParticionamento as e:
+            raise CommandError(str(e))
+
+        for sql in comandos:
+            self.stdout.write(sql + ";")
+        if opts["sql"]:
+            return
+
+        for tabela, particoes in relatorio.items():
+            if not particoes:
+                self.stdout.write(self.style.WARNING(f"{tabela}: não particionada (use --particionar)."))
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(tabela))
+            for p in particoes:
+                limite = "MAXVALUE" if p["limite"] is None else f"< {p['limite']}"
+                self.stdout.write(f"  {p['nome']:<8} {limite:<10} ~{p['linhas']:>10} linhas  {_tamanho(p['bytes']):>10}")
+
+        self.stdout.write(self.style.SUCCESS(f"Comandos executados: {len(comandos)}"))
@@ -0,0 +1,64 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from protocolos.services import permanencia_service
+
+
+def _mes(valor: str) -> date:
+    try:
+        ano, mes = valor.split("-")[:2]
+        return date(int(ano), int(mes), 1)
+    except ValueError:
+        raise CommandError(f"Mês inválido: {valor} (use AAAA-MM).")
+
+
+def _duracao(ms: int) -> str:
+    horas = ms / 3_600_000
+    return f"{horas / 24:.1f} d" if horas >= 48 else f"{horas:.1f} h"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mediana e p90 do tempo de permanência (ms) por setor, tipo de processo e/ou mês, "
+        "a partir de PermanenciaSetor (atualize antes com atualizar_permanencias)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--por",
+            default="setor",
+            help=f"Agrupamento, separado por vírgula: {', '.join(permanencia_service.DIMENSOES)} (default: setor).",
+        )
+        parser.add_argument("--desde", default="", help="Mês inicial de entrada (AAAA-MM).")
+        parser.add_argument("--ate", default="", help="Mês final de entrada (AAAA-MM).")
+        parser.add_argument("--setor", type=int, default=None, help="Só este setor (id).")
+        parser.add_argument("--tipo", type=int, default=None, help="Só este tipo de processo (id).")
+
+    def handle(self, *args, **opts):
+        por = [p.strip() for p in opts["por"].split(",") if p.strip()]
+        try:
+            linhas = permanencia_service.relatorio(
+                por=por,
+                desde=_mes(opts["desde"]) if opts["desde"] else None,
+                ate=_mes(opts["ate"]) if opts["ate"] else None,
+                setor_id=opts["setor"],
+                tipo_processo_id=opts["tipo"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not linhas:
+            self.stdout.write(self.style.WARNING("Nenhuma permanência encerrada no período."))
+            return
+
+        for linha in linhas:
+            grupo = " | ".join(
+                f"{linha['mes']:%Y-%m}" if d == "mes" else linha["setor" if d == "setor" else "tipo_processo"]
+                for d in por
+            )
+            self.stdout.write(
+                f"{grupo:<60} n={linha['quantidade']:>7}  "
+                f"mediana {linha['mediana_ms']:>12} ms ({_duracao(linha['mediana_ms'])})  "
+                f"p90 {linha['p90_ms']:>12} ms ({_duracao(linha['p90_ms'])})"
+            )
@@ -0,0 +1,35 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from protocolos.forms import _normalize_numero_processo
+from protocolos.models import ProcessoFrio
+from protocolos.services.arquivo_frio_service import restaurar_do_arquivo_frio
+
+
+class Command(BaseCommand):
+    help = "Restaura processos do arquivo frio para as tabelas quentes (ex.: revisão jurídica)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "numeros",
+            nargs="+",
+            help="Números dos processos (0000/00).",
+        )
+
+    def handle(self, *args, **opts):
+        numeros = []
+        for raw in opts["numeros"]:
+            try:
+                numeros.append(_normalize_numero_processo(raw))
+            except ValidationError as e:
+                raise CommandError(f"{raw}: {' '.join(e.messages)}")
+
+        encontrados = dict(
+            ProcessoFrio.objects.filter(numero_formatado__in=numeros).values_list("numero_formatado", "id")
+        )
+        faltando = [n for n in numeros if n not in encontrados]
+        if faltando:
+            raise CommandError(f"Não encontrados no arquivo frio: {', '.join(faltando)}")
+
+        total = restaurar_do_arquivo_frio(list(encontrados.values()))
+        self.stdout.write(self.style.SUCCESS(f"Processos restaurados: {total}"))
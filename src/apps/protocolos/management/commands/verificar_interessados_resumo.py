@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from protocolos.models import Processo
+from protocolos.services import interessados_service
+
+
+class Command(BaseCommand):
+    help = (
+        "Confere o resumo desnormalizado dos interessados (Processo.interessados_resumo) "
+        "contra os vínculos e, com --corrigir, regrava os divergentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--corrigir",
+            action="store_true",
+            help="Regrava os resumos divergentes (sem isso, só relata).",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=interessados_service.LOTE,
+            help=f"Quantidade de processos conferidos por vez (default: {interessados_service.LOTE}).",
+        )
+
+    def handle(self, *args, **opts):
+        ids = list(Processo.objects.order_by("pk").values_list("pk", flat=True))
+        lote = max(opts["lote"], 1)
+
+        divergentes = []
+        for i in range(0, len(ids), lote):
+            divergentes += interessados_service.atualizar_resumo(ids[i: i + lote], gravar=opts["corrigir"])
+
+        if not divergentes:
+            self.stdout.write(self.style.SUCCESS(f"Resumos conferidos: {len(ids)}. Nenhuma divergência."))
+            return
+
+        numeros = Processo.objects.filter(pk__in=divergentes[:20]).values_list("numero_formatado", flat=True)
+        exemplo = ", ".join(numeros) + (" ..." if len(divergentes) > 20 else "")
+        if opts["corrigir"]:
+            self.stdout.write(self.style.SUCCESS(f"Resumos corrigidos: {len(divergentes)} ({exemplo})"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Resumos divergentes: {len(divergentes)} ({exemplo})"))
+            self.stdout.write("Rode novamente com --corrigir para regravar.")
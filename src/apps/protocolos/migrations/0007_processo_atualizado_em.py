@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('protocolos', '0006_processo_responsavel_setor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processo',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
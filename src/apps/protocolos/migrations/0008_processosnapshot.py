@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('protocolos', '0007_processo_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessoSnapshot',
+            fields=[
+                ('processo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='protocolos.processo')),
+                ('dados', models.BinaryField()),
+                ('versao_formato', models.PositiveSmallIntegerField(default=1)),
+                ('gerado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Processo Arquivado',
+                'verbose_name_plural': 'Snapshots de Processos Arquivados',
+            },
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('protocolos', '0008_processosnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessoFrio',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('ano', models.PositiveIntegerField(db_index=True)),
+                ('numero_manual', models.PositiveIntegerField()),
+                ('numero_formatado', models.CharField(max_length=7, unique=True)),
+                ('assunto', models.CharField(max_length=255)),
+                ('descricao', models.TextField(blank=True, null=True)),
+                ('prioridade', models.CharField(max_length=10)),
+                ('status', models.CharField(max_length=10)),
+                ('criado_em', models.DateTimeField()),
+                ('atualizado_em', models.DateTimeField()),
+                ('recebido_em', models.DateTimeField(blank=True, null=True)),
+                ('arquivado_em', models.DateTimeField(blank=True, null=True)),
+                ('snapshot', models.BinaryField()),
+                ('movido_em', models.DateTimeField(auto_now_add=True)),
+                ('arquivado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('criado_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('recebido_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('responsavel_setor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('tipo_processo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='protocolos.tipoprocesso')),
+            ],
+            options={
+                'verbose_name': 'Processo (arquivo frio)',
+                'verbose_name_plural': 'Processos (arquivo frio)',
+                'ordering': ['-criado_em'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimentacaoProcessoFria',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tipo_tramitacao', models.CharField(max_length=10)),
+                ('acao', models.CharField(max_length=20)),
+                ('observacao', models.TextField(blank=True, null=True)),
+                ('registrado_em', models.DateTimeField()),
+                ('departamento_destino', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='protocolos.departamento')),
+                ('departamento_origem', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='protocolos.departamento')),
+                ('registrado_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('processo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimentacoes', to='protocolos.processofrio')),
+            ],
+            options={
+                'verbose_name': 'Movimentação (arquivo frio)',
+                'verbose_name_plural': 'Movimentações (arquivo frio)',
+                'ordering': ['-registrado_em'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ComprovanteFrio',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('movimentacao_id', models.BigIntegerField(blank=True, null=True)),
+                ('tipo', models.CharField(max_length=12)),
+                ('codigo_autenticacao', models.CharField(max_length=64, unique=True)),
+                ('emitido_em', models.DateTimeField()),
+                ('emitido_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('processo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comprovantes', to='protocolos.processofrio')),
+            ],
+            options={
+                'verbose_name': 'Comprovante (arquivo frio)',
+                'verbose_name_plural': 'Comprovantes (arquivo frio)',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProcessoInteressadoFrio',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('papel', models.CharField(blank=True, max_length=50, null=True)),
+                ('criado_em', models.DateTimeField()),
+                ('pessoa', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='protocolos.pessoa')),
+                ('processo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interessados_links', to='protocolos.processofrio')),
+            ],
+            options={
+                'verbose_name': 'Interessado (arquivo frio)',
+                'verbose_name_plural': 'Interessados (arquivo frio)',
+            },
+        ),
+    ]
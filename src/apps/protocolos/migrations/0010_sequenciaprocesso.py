@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('protocolos', '0009_arquivo_frio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaProcesso',
+            fields=[
+                ('ano', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('ultimo_numero', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Sequência de Processo',
+                'verbose_name_plural': 'Sequências de Processo',
+            },
+        ),
+    ]
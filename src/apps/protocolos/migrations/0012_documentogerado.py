@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('protocolos', '0011_notificacaoemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoGerado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('ETIQUETAS', 'Etiquetas'), ('GUIA_REMESSA', 'Guia de remessa')], max_length=20)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('PRONTO', 'Pronto'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=10)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('titulo', models.CharField(blank=True, default='', max_length=200)),
+                ('arquivo', models.FileField(blank=True, upload_to='documentos/%Y/%m/')),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='documentos_gerados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Documento gerado',
+                'verbose_name_plural': 'Documentos gerados',
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
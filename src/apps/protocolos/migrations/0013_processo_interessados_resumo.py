@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:35
+
+from django.db import migrations, models
+
+from core.validators import format_cpf
+
+LOTE = 1000
+
+
+def preencher_resumo(apps, schema_editor):
+    Processo = apps.get_model("protocolos", "Processo")
+    ProcessoInteressado = apps.get_model("protocolos", "ProcessoInteressado")
+
+    ids = list(Processo.objects.order_by("pk").values_list("pk", flat=True))
+    for i in range(0, len(ids), LOTE):
+        lote = ids[i: i + LOTE]
+        resumos = {pk: [] for pk in lote}
+        rows = (
+            ProcessoInteressado.objects
+            .filter(processo_id__in=lote)
+            .values_list("processo_id", "pessoa_id", "pessoa__nome", "pessoa__cpf")
+        )
+        for processo_id, pessoa_id, nome, cpf in rows:
+            resumos[processo_id].append({"id": pessoa_id, "nome": nome, "cpf": format_cpf(cpf)})
+        for itens in resumos.values():
+            itens.sort(key=lambda i: (i["nome"], i["id"]))
+        Processo.objects.bulk_update(
+            [Processo(pk=pk, interessados_resumo=itens) for pk, itens in resumos.items() if itens],
+            ["interessados_resumo"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('protocolos', '0012_documentogerado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processo',
+            name='interessados_resumo',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(preencher_resumo, migrations.RunPython.noop),
+    ]
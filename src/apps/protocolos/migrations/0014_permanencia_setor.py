@@ -0,0 +1,47 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('protocolos', '0013_processo_interessados_resumo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaProcessamento',
+            fields=[
+                ('nome', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('ultimo_id', models.BigIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Marca de processamento',
+                'verbose_name_plural': 'Marcas de processamento',
+            },
+        ),
+        migrations.CreateModel(
+            name='PermanenciaSetor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entrada', models.DateTimeField()),
+                ('recebido_em', models.DateTimeField(blank=True, null=True)),
+                ('saida', models.DateTimeField(blank=True, null=True)),
+                ('duracao_ms', models.BigIntegerField(blank=True, null=True)),
+                ('espera_recebimento_ms', models.BigIntegerField(blank=True, null=True)),
+                ('mes', models.DateField(help_text='Primeiro dia do mês da entrada (horário local).')),
+                ('processo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='permanencias', to='protocolos.processo')),
+                ('setor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='permanencias', to='protocolos.departamento')),
+                ('tipo_processo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='permanencias', to='protocolos.tipoprocesso')),
+            ],
+            options={
+                'verbose_name': 'Permanência em setor',
+                'verbose_name_plural': 'Permanências em setor',
+                'ordering': ['processo_id', 'entrada'],
+                'indexes': [models.Index(fields=['setor', 'mes'], name='prot_perm_setor_mes_idx'), models.Index(fields=['tipo_processo', 'mes'], name='prot_perm_tipo_mes_idx'), models.Index(fields=['mes'], name='prot_perm_mes_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('protocolos', '0014_permanencia_setor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FluxoSetor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês da movimentação (horário local).')),
+                ('tipo_tramitacao', models.CharField(max_length=10)),
+                ('acao', models.CharField(max_length=20)),
+                ('quantidade', models.BigIntegerField(default=0)),
+                ('medidas', models.BigIntegerField(default=0)),
+                ('soma_ms', models.BigIntegerField(default=0)),
+                ('histograma', models.JSONField(default=dict)),
+                ('destino', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='protocolos.departamento')),
+                ('origem', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='protocolos.departamento')),
+            ],
+            options={
+                'verbose_name': 'Fluxo entre setores',
+                'verbose_name_plural': 'Fluxos entre setores',
+                'ordering': ['mes', 'origem_id', 'destino_id'],
+                'constraints': [models.UniqueConstraint(fields=('mes', 'origem', 'destino', 'tipo_tramitacao', 'acao'), name='prot_fluxo_chave_uniq')],
+            },
+        ),
+    ]
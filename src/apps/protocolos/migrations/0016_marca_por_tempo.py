@@ -0,0 +1,41 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:33
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+# As marcas passam do maior id processado para (registrado_em, id): o id sai na ordem
+# do INSERT, não do COMMIT. A marca existente vira o registrado_em da movimentação
+# dela; movimentações do mesmo instante fora de ordem podem ser contadas de novo ou
+# puladas uma vez (na dúvida: atualizar_fluxo --reprocessar).
+
+
+def preencher_ultimo_em(apps, schema_editor):
+    MarcaProcessamento = apps.get_model("protocolos", "MarcaProcessamento")
+    MovimentacaoProcesso = apps.get_model("protocolos", "MovimentacaoProcesso")
+
+    for marca in MarcaProcessamento.objects.filter(ultimo_id__gt=0):
+        marca.ultimo_em = (
+            MovimentacaoProcesso.objects.filter(id__lte=marca.ultimo_id).aggregate(m=Max("registrado_em"))["m"]
+        )
+        marca.save(update_fields=["ultimo_em"])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('protocolos', '0015_fluxo_setor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='marcaprocessamento',
+            name='ultimo_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='movimentacaoprocesso',
+            index=models.Index(fields=['registrado_em', 'id'], name='prot_mov_registrado_idx'),
+        ),
+        migrations.RunPython(preencher_ultimo_em, migrations.RunPython.noop),
+    ]
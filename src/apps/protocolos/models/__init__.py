@@ -1,17 +1,38 @@
 # Exporta os models para permitir: from protocolos.models import Pessoa, Processo, etc.
 
 from .cadastros import Pessoa, TipoProcesso, Departamento, DepartamentoMembro
-from .processos import Processo, ProcessoInteressado
+from .processos import SequenciaProcesso, Processo, ProcessoInteressado
 from .tramitacao import MovimentacaoProcesso
 from .comprovantes import Comprovante
+from .snapshots import ProcessoSnapshot
+from .notificacoes import NotificacaoEmail
+from .documentos import DocumentoGerado
+from .analise import PermanenciaSetor, MarcaProcessamento, FluxoSetor
+from .arquivo_frio import (
+    ProcessoFrio,
+    ProcessoInteressadoFrio,
+    MovimentacaoProcessoFria,
+    ComprovanteFrio,
+)
 
 __all__ = [
     "Pessoa",
     "TipoProcesso",
     "Departamento",
     "DepartamentoMembro",
+    "SequenciaProcesso",
     "Processo",
     "ProcessoInteressado",
     "MovimentacaoProcesso",
     "Comprovante",
+    "ProcessoSnapshot",
+    "NotificacaoEmail",
+    "DocumentoGerado",
+    "PermanenciaSetor",
+    "MarcaProcessamento",
+    "FluxoSetor",
+    "ProcessoFrio",
+    "ProcessoInteressadoFrio",
+    "MovimentacaoProcessoFria",
+    "ComprovanteFrio",
 ]
@@ -0,0 +1,97 @@
+from django.db import models
+
+from .cadastros import Departamento, TipoProcesso
+from .processos import Processo
+
+
+class PermanenciaSetor(models.Model):
+    """
+    Fato analítico: um intervalo em que o processo ficou num setor, da chegada
+    (encaminhamento/devolução/abertura) até a movimentação seguinte que o tirou
+    de lá. Calculado a partir de MovimentacaoProcesso por
+    permanencia_service.atualizar() (incremental); saida nula = ainda no setor.
+    """
+
+    # ✅ DO_NOTHING sem FK no banco: o histórico de permanência sobrevive à ida do
+    # processo para o arquivo frio (que apaga das tabelas quentes).
+    processo = models.ForeignKey(
+        Processo, on_delete=models.DO_NOTHING, related_name="permanencias", db_constraint=False
+    )
+    setor = models.ForeignKey(Departamento, on_delete=models.PROTECT, related_name="permanencias")
+    # desnormalizado do processo: relatórios por tipo sem join com Processo
+    tipo_processo = models.ForeignKey(TipoProcesso, on_delete=models.PROTECT, related_name="permanencias")
+
+    entrada = models.DateTimeField()
+    recebido_em = models.DateTimeField(null=True, blank=True)  # primeiro RECEBIDO no setor
+    saida = models.DateTimeField(null=True, blank=True)
+
+    duracao_ms = models.BigIntegerField(null=True, blank=True)  # saida - entrada
+    espera_recebimento_ms = models.BigIntegerField(null=True, blank=True)  # recebido_em - entrada
+    mes = models.DateField(help_text="Primeiro dia do mês da entrada (horário local).")
+
+    class Meta:
+        ordering = ["processo_id", "entrada"]
+        indexes = [
+            models.Index(fields=["setor", "mes"], name="prot_perm_setor_mes_idx"),
+            models.Index(fields=["tipo_processo", "mes"], name="prot_perm_tipo_mes_idx"),
+            models.Index(fields=["mes"], name="prot_perm_mes_idx"),
+        ]
+        verbose_name = "Permanência em setor"
+        verbose_name_plural = "Permanências em setor"
+
+    def __str__(self) -> str:
+        return f"{self.processo_id} em {self.setor_id} desde {self.entrada:%d/%m/%Y %H:%M}"
+
+
+class MarcaProcessamento(models.Model):
+    """
+    Até onde um processamento incremental já foi: registrado_em (e, no desempate,
+    id) da última MovimentacaoProcesso processada.
+    """
+
+    nome = models.CharField(max_length=50, primary_key=True)
+    ultimo_em = models.DateTimeField(null=True, blank=True)
+    ultimo_id = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Marca de processamento"
+        verbose_name_plural = "Marcas de processamento"
+
+    def __str__(self) -> str:
+        return f"{self.nome}: {self.ultimo_em or '-'} ({self.ultimo_id})"
+
+
+class FluxoSetor(models.Model):
+    """
+    Agregado da matriz de transições: quantas movimentações foram de `origem` para
+    `destino` (nulo = arquivamento) com tal tipo/ação no mês, e quanto tempo o
+    processo levou desde a movimentação anterior. Só cresce: mantido por
+    fluxo_service.atualizar() a partir da marca, sem reler a tabela inteira.
+    """
+
+    mes = models.DateField(help_text="Primeiro dia do mês da movimentação (horário local).")
+    origem = models.ForeignKey(Departamento, on_delete=models.PROTECT, related_name="+")
+    destino = models.ForeignKey(Departamento, on_delete=models.PROTECT, related_name="+", null=True, blank=True)
+    tipo_tramitacao = models.CharField(max_length=10)
+    acao = models.CharField(max_length=20)
+
+    quantidade = models.BigIntegerField(default=0)
+    # ✅ com intervalo conhecido (a abertura não tem movimentação anterior)
+    medidas = models.BigIntegerField(default=0)
+    soma_ms = models.BigIntegerField(default=0)
+    # mediana não se soma: histograma em faixas logarítmicas {faixa: quantidade}, que se soma
+    histograma = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ["mes", "origem_id", "destino_id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["mes", "origem", "destino", "tipo_tramitacao", "acao"], name="prot_fluxo_chave_uniq"
+            ),
+        ]
+        verbose_name = "Fluxo entre setores"
+        verbose_name_plural = "Fluxos entre setores"
+
+    def __str__(self) -> str:
+        return f"{self.mes:%m/%Y} {self.origem_id} -> {self.destino_id or 'arquivo'} ({self.acao}): {self.quantidade}"
@@ -0,0 +1,104 @@
+"""
+Arquivo frio: processos ARQUIVADOS antigos movidos para fora das tabelas quentes.
+
+Os ids são preservados (mesma chave primária das tabelas quentes), o que permite
+restaurar o processo sem remapear relacionamentos e manter as mesmas URLs.
+As datas são campos comuns (sem auto_now) para preservar os valores originais.
+"""
+from django.conf import settings
+from django.db import models
+
+from .cadastros import Departamento, Pessoa, TipoProcesso
+
+
+class ProcessoFrio(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+
+    ano = models.PositiveIntegerField(db_index=True)
+    numero_manual = models.PositiveIntegerField()
+    numero_formatado = models.CharField(max_length=7, unique=True)
+
+    tipo_processo = models.ForeignKey(TipoProcesso, on_delete=models.PROTECT, related_name="+")
+    assunto = models.CharField(max_length=255)
+    descricao = models.TextField(blank=True, null=True)
+
+    prioridade = models.CharField(max_length=10)
+    status = models.CharField(max_length=10)
+
+    criado_em = models.DateTimeField()
+    criado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="+")
+    atualizado_em = models.DateTimeField()
+
+    recebido_em = models.DateTimeField(null=True, blank=True)
+    recebido_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.PROTECT, null=True, blank=True, related_name="+"
+    )
+
+    arquivado_em = models.DateTimeField(null=True, blank=True)
+    arquivado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.PROTECT, null=True, blank=True, related_name="+"
+    )
+
+    responsavel_setor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    # ✅ cópia do ProcessoSnapshot: consulta por chave primária, sem joins
+    snapshot = models.BinaryField()
+    movido_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-criado_em"]
+        verbose_name = "Processo (arquivo frio)"
+        verbose_name_plural = "Processos (arquivo frio)"
+
+    def __str__(self) -> str:
+        return self.numero_formatado
+
+
+class ProcessoInteressadoFrio(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    processo = models.ForeignKey(ProcessoFrio, on_delete=models.CASCADE, related_name="interessados_links")
+    pessoa = models.ForeignKey(Pessoa, on_delete=models.PROTECT, related_name="+")
+    papel = models.CharField(max_length=50, blank=True, null=True)
+    criado_em = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Interessado (arquivo frio)"
+        verbose_name_plural = "Interessados (arquivo frio)"
+
+
+class MovimentacaoProcessoFria(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    processo = models.ForeignKey(ProcessoFrio, on_delete=models.CASCADE, related_name="movimentacoes")
+    tipo_tramitacao = models.CharField(max_length=10)
+    acao = models.CharField(max_length=20)
+
+    departamento_origem = models.ForeignKey(Departamento, on_delete=models.PROTECT, related_name="+")
+    departamento_destino = models.ForeignKey(
+        Departamento, on_delete=models.PROTECT, blank=True, null=True, related_name="+"
+    )
+
+    observacao = models.TextField(blank=True, null=True)
+    registrado_em = models.DateTimeField()
+    registrado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="+")
+
+    class Meta:
+        ordering = ["-registrado_em"]
+        verbose_name = "Movimentação (arquivo frio)"
+        verbose_name_plural = "Movimentações (arquivo frio)"
+
+
+class ComprovanteFrio(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    processo = models.ForeignKey(ProcessoFrio, on_delete=models.CASCADE, related_name="comprovantes")
+    movimentacao_id = models.BigIntegerField(blank=True, null=True)
+    tipo = models.CharField(max_length=12)
+
+    codigo_autenticacao = models.CharField(max_length=64, unique=True)
+    emitido_em = models.DateTimeField()
+    emitido_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="+")
+
+    class Meta:
+        verbose_name = "Comprovante (arquivo frio)"
+        verbose_name_plural = "Comprovantes (arquivo frio)"
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import models
+
+
+class DocumentoGerado(models.Model):
+    """
+    Documento para impressão gerado em segundo plano (job "protocolos.gerar_documento"):
+    folha de etiquetas com código de barras ou guia de remessa entre setores.
+    O HTML é gravado em partes direto no arquivo (centenas de processos por documento).
+    """
+
+    class Tipo(models.TextChoices):
+        ETIQUETAS = "ETIQUETAS", "Etiquetas"
+        GUIA_REMESSA = "GUIA_REMESSA", "Guia de remessa"
+
+    class Status(models.TextChoices):
+        PENDENTE = "PENDENTE", "Pendente"
+        PRONTO = "PRONTO", "Pronto"
+        FALHOU = "FALHOU", "Falhou"
+
+    tipo = models.CharField(max_length=20, choices=Tipo.choices)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDENTE)
+
+    # ETIQUETAS: {"processos": [ids]} | GUIA_REMESSA: {"origem": id, "destino": id}
+    parametros = models.JSONField(default=dict, blank=True)
+    titulo = models.CharField(max_length=200, blank=True, default="")
+
+    arquivo = models.FileField(upload_to="documentos/%Y/%m/", blank=True)
+    quantidade = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True, default="")
+
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name="documentos_gerados",
+    )
+    criado_em = models.DateTimeField(auto_now_add=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-criado_em"]
+        verbose_name = "Documento gerado"
+        verbose_name_plural = "Documentos gerados"
+
+    def __str__(self) -> str:
+        return f"{self.get_tipo_display()} #{self.pk} ({self.status})"
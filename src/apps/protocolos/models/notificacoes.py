@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from .processos import Processo
+
+
+class NotificacaoEmail(models.Model):
+    """
+    Outbox de e-mails: gravada na mesma transação da movimentação e enviada
+    depois pelo dispatcher (job "protocolos.enviar_notificacoes"), agrupando
+    as pendências de cada destinatário num único e-mail (resumo).
+    """
+
+    class Status(models.TextChoices):
+        PENDENTE = "PENDENTE", "Pendente"
+        ENVIADO = "ENVIADO", "Enviado"
+        FALHOU = "FALHOU", "Falhou"
+
+    destinatario = models.EmailField(max_length=254, db_index=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="notificacoes_email",
+    )
+
+    # ✅ SET_NULL + texto copiado: o processo pode ir para o arquivo frio antes do envio
+    processo = models.ForeignKey(Processo, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    numero_processo = models.CharField(max_length=7)
+    setor = models.CharField(max_length=150)
+    mensagem = models.CharField(max_length=255)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDENTE)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    erro = models.TextField(blank=True, default="")
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-criado_em"]
+        indexes = [
+            models.Index(fields=["status", "proxima_tentativa"], name="prot_notif_fila_idx"),
+        ]
+        verbose_name = "Notificação por e-mail"
+        verbose_name_plural = "Notificações por e-mail"
+
+    def __str__(self) -> str:
+        return f"{self.destinatario} - {self.numero_processo} ({self.status})"
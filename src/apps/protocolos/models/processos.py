@@ -1,12 +1,96 @@
 from __future__ import annotations
 
 from django.conf import settings
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Max
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from core.validators import format_cpf
 
 from .cadastros import Pessoa, TipoProcesso
 
 
+NOME_UNICO_NUMERO = "uniq_processo_ano_numero_manual"
+
+
+class SequenciaProcesso(models.Model):
+    """
+    Contador da numeração automática (uma linha por ano de dois dígitos).
+    Reservar números é um único UPDATE ... SET ultimo_numero = ultimo_numero + n
+    na linha do ano: nada de SELECT ... FOR UPDATE em faixa vazia (gap lock).
+    """
+
+    NUMERO_MAXIMO = 9999
+
+    ano = models.PositiveIntegerField(primary_key=True)  # 0..99 (dois dígitos)
+    ultimo_numero = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Sequência de Processo"
+        verbose_name_plural = "Sequências de Processo"
+
+    def __str__(self) -> str:
+        return f"{self.ano:02d}: {self.ultimo_numero:04d}"
+
+    @staticmethod
+    def _maior_usado(ano_2d: int) -> int:
+        """Maior número do ano já usado (tabelas quentes e arquivo frio)."""
+        from .arquivo_frio import ProcessoFrio
+
+        return max(
+            Processo.objects.filter(ano=ano_2d).aggregate(m=Max("numero_manual"))["m"] or 0,
+            ProcessoFrio.objects.filter(ano=ano_2d).aggregate(m=Max("numero_manual"))["m"] or 0,
+        )
+
+    @classmethod
+    def avancar_ate(cls, ano_2d: int, numero: int) -> None:
+        """
+        Garante ultimo_numero >= numero: número manual digitado à frente da sequência
+        não vira colisão na numeração automática. Um UPDATE condicional (sem linha: nada a fazer,
+        _criar_linha_do_ano já parte do maior usado).
+        """
+        cls.objects.filter(ano=ano_2d, ultimo_numero__lt=numero).update(ultimo_numero=numero)
+
+    @classmethod
+    def sincronizar(cls, ano_2d: int) -> None:
+        """Pula a sequência para depois do maior número já usado no ano (após uma colisão)."""
+        cls.avancar_ate(ano_2d, cls._maior_usado(ano_2d))
+
+    @classmethod
+    def _criar_linha_do_ano(cls, ano_2d: int) -> None:
+        # ✅ começa depois dos números manuais já usados no ano (inclusive arquivo frio)
+        maior = cls._maior_usado(ano_2d)
+        try:
+            with transaction.atomic():
+                cls.objects.create(ano=ano_2d, ultimo_numero=maior)
+        except IntegrityError:
+            pass  # outro balcão criou a linha ao mesmo tempo
+
+    @classmethod
+    def reservar(cls, ano_2d: int, quantidade: int = 1) -> range:
+        """
+        Reserva `quantidade` números consecutivos do ano e devolve a faixa.
+        Chame fora da transação que cria o processo: o lock da linha dura só este bloco
+        (dentro de um atomic externo ele dura até o commit dele e enfileira as outras
+        reservas do ano atrás dela).
+        Números reservados e não usados viram lacunas (aceitável, como em qualquer sequência).
+        """
+        if quantidade < 1:
+            raise ValueError("Quantidade deve ser pelo menos 1.")
+
+        with transaction.atomic():
+            filtro = cls.objects.filter(ano=ano_2d)
+            if not filtro.update(ultimo_numero=F("ultimo_numero") + quantidade):
+                cls._criar_linha_do_ano(ano_2d)
+                filtro.update(ultimo_numero=F("ultimo_numero") + quantidade)
+            ultimo = filtro.values_list("ultimo_numero", flat=True).get()
+
+        if ultimo > cls.NUMERO_MAXIMO:
+            raise ValueError(f"Numeração automática esgotada para o ano {ano_2d:02d}.")
+        return range(ultimo - quantidade + 1, ultimo + 1)
+
+
 class Processo(models.Model):
     class Prioridade(models.TextChoices):
         NORMAL = "NORMAL", "Normal"
@@ -19,6 +103,8 @@ class Processo(models.Model):
     # ✅ MANUAL: 0000/00
     ano = models.PositiveIntegerField()  # 0..99 (dois dígitos)
     numero_manual = models.PositiveIntegerField()  # 0..9999 (quatro dígitos)
+    # particionar_tabelas troca este UNIQUE por índice simples (chave única de tabela
+    # particionada precisa conter o ano); a unicidade segue por (ano, numero_manual)
     numero_formatado = models.CharField(max_length=7, db_index=True, unique=True)
 
     tipo_processo = models.ForeignKey(TipoProcesso, on_delete=models.PROTECT, related_name="processos")
@@ -30,6 +116,11 @@ class Processo(models.Model):
 
     interessados = models.ManyToManyField(Pessoa, through="ProcessoInteressado", related_name="processos")
 
+    # ✅ resumo desnormalizado dos interessados para as listagens (sem prefetch do M2M):
+    # [{"id", "nome", "cpf" (formatado)}] em ordem de nome. Mantido pelos signals e,
+    # onde há bulk_create, por interessados_service.atualizar_resumo.
+    interessados_resumo = models.JSONField(default=list, blank=True, editable=False)
+
     criado_em = models.DateTimeField(auto_now_add=True)
     criado_por = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -37,6 +128,9 @@ class Processo(models.Model):
         related_name="processos_criados",
     )
 
+    # ✅ carimbo de alteração (versão barata para cache/ETag)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
     recebido_em = models.DateTimeField(null=True, blank=True)
     recebido_por = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -67,7 +161,7 @@ class Processo(models.Model):
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(fields=["ano", "numero_manual"], name="uniq_processo_ano_numero_manual"),
+            models.UniqueConstraint(fields=["ano", "numero_manual"], name=NOME_UNICO_NUMERO),
         ]
         ordering = ["-criado_em"]
         verbose_name = "Processo"
@@ -76,10 +170,48 @@ class Processo(models.Model):
     def __str__(self) -> str:
         return self.numero_formatado
 
+    def save(self, *args, **kwargs):
+        # auto_now só é gravado quando o campo está em update_fields
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "atualizado_em" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "atualizado_em"]
+        return super().save(*args, **kwargs)
+
     @staticmethod
     def format_numero(numero_manual: int, ano_2d: int) -> str:
         return f"{numero_manual:04d}/{ano_2d:02d}"
 
+    @staticmethod
+    def ano_do_numero(numero_formatado: str) -> int:
+        """"0123/26" -> 26. Filtrar também por ano restringe a busca à partição do ano."""
+        return int(numero_formatado[-2:])
+
+    @staticmethod
+    def item_resumo(pessoa_id: int, nome: str, cpf: str) -> dict:
+        return {"id": pessoa_id, "nome": nome, "cpf": format_cpf(cpf)}
+
+    @classmethod
+    def resumo_de_interessados(cls, pessoas) -> list[dict]:
+        """interessados_resumo a partir de objetos Pessoa (ordem: nome, id)."""
+        itens = [cls.item_resumo(p.pk, p.nome, p.cpf) for p in pessoas]
+        return sorted(itens, key=lambda i: (i["nome"], i["id"]))
+
+    @staticmethod
+    def numero_duplicado(erro: IntegrityError) -> bool:
+        """
+        O IntegrityError veio do índice único (ano, numero_manual)? NOT NULL, FK etc.
+        não são "número duplicado". MySQL/PostgreSQL citam o nome da constraint; SQLite, as colunas.
+        """
+        texto = str(erro)
+        return NOME_UNICO_NUMERO in texto or ("UNIQUE constraint failed" in texto and "numero_manual" in texto)
+
+    @staticmethod
+    def numero_no_arquivo_frio(numero_manual: int, ano_2d: int) -> bool:
+        """O número pertence a um processo do arquivo frio (fora do índice único das tabelas quentes)."""
+        from .arquivo_frio import ProcessoFrio
+
+        return ProcessoFrio.objects.filter(ano=ano_2d, numero_manual=numero_manual).exists()
+
     @classmethod
     def criar_manual(
         cls,
@@ -97,28 +229,82 @@ class Processo(models.Model):
             raise ValueError("O processo deve ter pelo menos 1 interessado.")
 
         numero_formatado = cls.format_numero(numero_manual, ano_2d)
+        if cls.numero_no_arquivo_frio(numero_manual, ano_2d):
+            raise ValueError(f"Já existe um processo com o número {numero_formatado} (arquivo frio).")
+        interessados = list({p.pk: p for p in interessados}.values())
 
-        with transaction.atomic():
-            if cls.objects.select_for_update().filter(numero_formatado__iexact=numero_formatado).exists():
-                raise ValueError(f"Já existe um processo com o número {numero_formatado}.")
-
-            processo = cls.objects.create(
-                ano=ano_2d,
-                numero_manual=numero_manual,
-                numero_formatado=numero_formatado,
-                tipo_processo=tipo_processo,
-                assunto=assunto,
-                descricao=descricao,
-                prioridade=prioridade,
-                criado_por=criado_por,
-            )
-
-            ProcessoInteressado.objects.bulk_create(
-                [ProcessoInteressado(processo=processo, pessoa=p) for p in interessados]
-            )
+        # ✅ sem checagem prévia: o índice único decide (evita gap lock do SELECT ... FOR UPDATE)
+        try:
+            with transaction.atomic():
+                processo = cls.objects.create(
+                    ano=ano_2d,
+                    numero_manual=numero_manual,
+                    numero_formatado=numero_formatado,
+                    tipo_processo=tipo_processo,
+                    assunto=assunto,
+                    descricao=descricao,
+                    prioridade=prioridade,
+                    criado_por=criado_por,
+                    interessados_resumo=cls.resumo_de_interessados(interessados),
+                )
 
+                ProcessoInteressado.objects.bulk_create(
+                    [ProcessoInteressado(processo=processo, pessoa=p) for p in interessados]
+                )
+        except IntegrityError as e:
+            if not cls.numero_duplicado(e):
+                raise
+            raise ValueError(f"Já existe um processo com o número {numero_formatado}.")
+
+        SequenciaProcesso.avancar_ate(ano_2d, numero_manual)
         return processo
 
+    # ✅ Transições concorrentes (compare-and-set)
+    # Um único UPDATE condicional: quem chega primeiro altera a linha, o outro recebe
+    # False e mostra a mensagem de "já feito". Sem select_for_update segurando o setor.
+    # Obs.: queryset.update() não dispara post_save; quem chama invalida versoes.
+    def _atualizar_se(self, condicao: models.Q, **valores) -> bool:
+        valores["atualizado_em"] = timezone.now()
+        alterou = type(self).objects.filter(condicao, pk=self.pk).update(**valores) == 1
+        if alterou:
+            for campo, valor in valores.items():
+                setattr(self, campo, valor)
+        return alterou
+
+    def receber_se_pendente(self, user, *, ultima_movimentacao_id: int, ultima_registrado_em, quando=None) -> bool:
+        """
+        Marca o recebimento só se o processo ainda estiver pendente (recebido_em nulo)
+        e nada tiver sido registrado depois da última movimentação que quem recebe viu
+        (id e registrado_em). Sem isso, um clique velho recebe num setor que já não tem
+        o processo: A encaminha para X, B recebe e encaminha para Y (recebido_em volta
+        a nulo) e o "receber" atrasado de X passaria.
+        """
+        from .tramitacao import MovimentacaoProcesso
+
+        posteriores = MovimentacaoProcesso.objects.filter(processo_id=models.OuterRef("pk")).filter(
+            models.Q(id__gt=ultima_movimentacao_id) | models.Q(registrado_em__gt=ultima_registrado_em)
+        )
+        return self._atualizar_se(
+            models.Q(recebido_em__isnull=True)
+            & ~models.Q(status=self.Status.ARQUIVADO)
+            & ~models.Exists(posteriores),
+            recebido_em=quando or timezone.now(),
+            recebido_por=user,
+        )
+
+    def trocar_responsavel_setor(self, novo, *, esperado_id: int | None, exigir_recebido: bool = False) -> bool:
+        """
+        Troca responsavel_setor só se o valor no banco ainda for `esperado_id`
+        (o que o usuário viu na tela). `novo=None` libera o processo.
+        """
+        condicao = (
+            models.Q(responsavel_setor__isnull=True) if esperado_id is None
+            else models.Q(responsavel_setor_id=esperado_id)
+        )
+        if exigir_recebido:
+            condicao &= models.Q(recebido_em__isnull=False) & ~models.Q(status=self.Status.ARQUIVADO)
+        return self._atualizar_se(condicao, responsavel_setor=novo)
+
     # ✅ Helpers de atribuição (setores com múltiplos membros)
     def limpar_responsavel_setor(self, *, save: bool = True) -> None:
         self.responsavel_setor = None
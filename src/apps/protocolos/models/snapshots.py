@@ -0,0 +1,29 @@
+from django.db import models
+
+from .processos import Processo
+
+
+class ProcessoSnapshot(models.Model):
+    """
+    Dossiê congelado de um processo ARQUIVADO (JSON comprimido com zlib).
+    Processo arquivado não tramita mais: a consulta vira uma única busca por chave
+    primária, sem joins. Correções posteriores (edição no admin, interessado
+    renomeado) regeneram o snapshot pelos signals (snapshot_service.regenerar_snapshots).
+    """
+
+    processo = models.OneToOneField(
+        Processo,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="snapshot",
+    )
+    dados = models.BinaryField()
+    versao_formato = models.PositiveSmallIntegerField(default=1)
+    gerado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Snapshot de Processo Arquivado"
+        verbose_name_plural = "Snapshots de Processos Arquivados"
+
+    def __str__(self) -> str:
+        return f"Snapshot {self.processo_id}"
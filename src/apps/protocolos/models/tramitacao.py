@@ -54,6 +54,10 @@ class MovimentacaoProcesso(models.Model):
 
     class Meta:
         ordering = ["-registrado_em"]
+        indexes = [
+            # janelas por tempo: análises incrementais e releitura do feed da caixa de entrada
+            models.Index(fields=["registrado_em", "id"], name="prot_mov_registrado_idx"),
+        ]
         verbose_name = "Movimentação do Processo"
         verbose_name_plural = "Movimentações do Processo"
 
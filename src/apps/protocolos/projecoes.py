@@ -0,0 +1,167 @@
+# apps/protocolos/projecoes.py
+"""
+Linhas enxutas para páginas de listagem (lista de processos, caixa de entrada, dashboards).
+
+Em vez de instanciar Processo + select_related de usuários + prefetch de Pessoa,
+busca só as colunas que os templates mostram (values_list) e embrulha cada linha
+num objeto com __slots__ e os MESMOS nomes de atributo usados nos templates
+(p.tipo_processo.nome, p.interessados.all, p.get_status_display ...).
+Os interessados vêm da coluna desnormalizada Processo.interessados_resumo, sem prefetch.
+"""
+from __future__ import annotations
+
+from django.db.models import OuterRef, Subquery
+
+from .models import Departamento, MovimentacaoProcesso, Processo
+
+_STATUS = dict(Processo.Status.choices)
+_PRIORIDADE = dict(Processo.Prioridade.choices)
+
+
+# =============================================================================
+# Objetos de linha
+# =============================================================================
+
+class Nome:
+    """Substitui o FK no template: p.tipo_processo.nome / p.responsavel_setor.username."""
+
+    __slots__ = ("nome", "username")
+
+    def __init__(self, valor):
+        self.nome = self.username = valor
+
+    def __str__(self) -> str:
+        return self.nome or ""
+
+
+class Interessado:
+    __slots__ = ("id", "nome", "cpf")
+
+    def __init__(self, id, nome, cpf):
+        self.id = id
+        self.nome = nome
+        self.cpf = cpf
+
+
+class Interessados(tuple):
+    """Tupla com .all (o template continua com `p.interessados.all`)."""
+
+    __slots__ = ()
+
+    def all(self):
+        return self
+
+
+SEM_INTERESSADOS = Interessados()
+
+
+class LinhaProcesso:
+    __slots__ = (
+        "id",
+        "numero_formatado",
+        "assunto",
+        "status",
+        "prioridade",
+        "criado_em",
+        "arquivado_em",
+        "recebido_em",
+        "responsavel_setor_id",
+        "ultima_tramitacao",
+        "setor_atual_id",
+        "setor_atual",
+        "tipo_processo",
+        "responsavel_setor",
+        "interessados",
+        "pendente_recebimento",
+    )
+
+    def get_status_display(self) -> str:
+        return _STATUS.get(self.status, self.status)
+
+    def get_prioridade_display(self) -> str:
+        return _PRIORIDADE.get(self.prioridade, self.prioridade)
+
+
+# colunas lidas do banco, na ordem dos __slots__ que vêm direto da linha
+_COLUNAS = (
+    "id",
+    "numero_formatado",
+    "assunto",
+    "status",
+    "prioridade",
+    "criado_em",
+    "arquivado_em",
+    "recebido_em",
+    "responsavel_setor_id",
+    "ultima_tramitacao",
+    "setor_atual_id",
+    "setor_atual",
+    "tipo_processo__nome",
+    "responsavel_setor__username",
+    "setor_atual_tipo",
+)
+
+
+# =============================================================================
+# Consultas
+# =============================================================================
+
+def qs_linhas():
+    """Processo com setor atual/última tramitação anotados (filtre e ordene normalmente)."""
+    ultima = MovimentacaoProcesso.objects.filter(processo=OuterRef("pk")).order_by("-registrado_em", "-id")
+    return Processo.objects.annotate(
+        ultima_tramitacao=Subquery(ultima.values("registrado_em")[:1]),
+        setor_atual=Subquery(ultima.values("departamento_destino__nome")[:1]),
+        setor_atual_id=Subquery(ultima.values("departamento_destino_id")[:1]),
+        setor_atual_tipo=Subquery(ultima.values("departamento_destino__tipo")[:1]),
+    )
+
+
+def _interessados(resumo: list[dict] | None) -> Interessados:
+    if not resumo:
+        return SEM_INTERESSADOS
+    return Interessados(Interessado(i["id"], i["nome"], i["cpf"]) for i in resumo)
+
+
+def linhas(qs, *, inicio: int = 0, limite: int | None = None, interessados: bool = False) -> list[LinhaProcesso]:
+    """Executa `qs` (de qs_linhas) projetando só as colunas das páginas; uma consulta."""
+    colunas = (*_COLUNAS, "interessados_resumo") if interessados else _COLUNAS
+
+    rows = qs.values_list(*colunas)
+    if limite is not None:
+        rows = rows[inicio: inicio + limite]
+    elif inicio:
+        rows = rows[inicio:]
+
+    resultado = []
+    for row in rows:
+        linha = LinhaProcesso()
+        (
+            linha.id,
+            linha.numero_formatado,
+            linha.assunto,
+            linha.status,
+            linha.prioridade,
+            linha.criado_em,
+            linha.arquivado_em,
+            linha.recebido_em,
+            linha.responsavel_setor_id,
+            linha.ultima_tramitacao,
+            linha.setor_atual_id,
+            linha.setor_atual,
+            tipo_nome,
+            responsavel_username,
+            setor_tipo,
+        ) = row[:15]
+        linha.tipo_processo = Nome(tipo_nome)
+        linha.responsavel_setor = Nome(responsavel_username) if responsavel_username else None
+        linha.interessados = _interessados(row[15]) if interessados else SEM_INTERESSADOS
+        # mesma regra de setor_esta_pendente_de_recebimento, pela projeção recebido_em
+        linha.pendente_recebimento = (
+            setor_tipo == Departamento.Tipo.INTERNO
+            and linha.recebido_em is None
+            and linha.status != Processo.Status.ARQUIVADO
+        )
+        resultado.append(linha)
+    return resultado
+
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DateTimeField, Q, Value, When
+
+from protocolos import versoes
+from protocolos.models import (
+    Comprovante,
+    ComprovanteFrio,
+    MovimentacaoProcesso,
+    MovimentacaoProcessoFria,
+    Processo,
+    ProcessoFrio,
+    ProcessoInteressado,
+    ProcessoInteressadoFrio,
+    ProcessoSnapshot,
+)
+from protocolos.services import interessados_service
+from protocolos.services.snapshot_service import descompactar, gravar_snapshot
+
+CAMPOS_PROCESSO = [
+    "id", "ano", "numero_manual", "numero_formatado", "tipo_processo_id", "assunto", "descricao",
+    "prioridade", "status", "criado_em", "criado_por_id", "atualizado_em", "recebido_em", "recebido_por_id",
+    "arquivado_em", "arquivado_por_id", "responsavel_setor_id",
+]
+CAMPOS_INTERESSADO = ["id", "processo_id", "pessoa_id", "papel", "criado_em"]
+CAMPOS_MOVIMENTACAO = [
+    "id", "processo_id", "tipo_tramitacao", "acao", "departamento_origem_id", "departamento_destino_id",
+    "observacao", "registrado_em", "registrado_por_id",
+]
+CAMPOS_COMPROVANTE = ["id", "processo_id", "movimentacao_id", "tipo", "codigo_autenticacao", "emitido_em", "emitido_por_id"]
+
+
+def _ano_2d(ano: int) -> int:
+    """Aceita 2019 ou 19 (Processo.ano guarda dois dígitos)."""
+    return ano % 100
+
+
+def _lotes(ids: list[int], tamanho: int):
+    for i in range(0, len(ids), tamanho):
+        yield ids[i:i + tamanho]
+
+
+def _invalidar_depois_do_commit(ids: list[int]) -> None:
+    def _invalidar():
+        for pk in ids:
+            versoes.invalidar_estado_processo(pk)
+
+    transaction.on_commit(_invalidar)
+
+
+# =============================================================================
+# Quente -> frio
+# =============================================================================
+
+def ids_elegiveis_arquivo_frio(*, ano_corte: int, limite: int | None = None) -> list[int]:
+    """Processos ARQUIVADOS com ano (dois dígitos) anterior ao ano de corte."""
+    qs = (
+        Processo.objects
+        .filter(status=Processo.Status.ARQUIVADO, ano__lt=_ano_2d(ano_corte))
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    if limite:
+        qs = qs[:limite]
+    return list(qs)
+
+
+def _mover_lote_para_frio(ids: list[int]) -> int:
+    with transaction.atomic():
+        ids = list(
+            Processo.objects.select_for_update()
+            .filter(pk__in=ids, status=Processo.Status.ARQUIVADO)
+            .values_list("pk", flat=True)
+        )
+        if not ids:
+            return 0
+
+        snapshots = dict(ProcessoSnapshot.objects.filter(pk__in=ids).values_list("processo_id", "dados"))
+        for pk in ids:
+            if pk not in snapshots:
+                snapshots[pk] = gravar_snapshot(Processo(pk=pk, status=Processo.Status.ARQUIVADO)).dados
+
+        ProcessoFrio.objects.bulk_create([
+            ProcessoFrio(**row, snapshot=snapshots[row["id"]])
+            for row in Processo.objects.filter(pk__in=ids).values(*CAMPOS_PROCESSO)
+        ])
+        ProcessoInteressadoFrio.objects.bulk_create([
+            ProcessoInteressadoFrio(**row)
+            for row in ProcessoInteressado.objects.filter(processo_id__in=ids).values(*CAMPOS_INTERESSADO)
+        ])
+        MovimentacaoProcessoFria.objects.bulk_create([
+            MovimentacaoProcessoFria(**row)
+            for row in MovimentacaoProcesso.objects.filter(processo_id__in=ids).values(*CAMPOS_MOVIMENTACAO)
+        ])
+        ComprovanteFrio.objects.bulk_create([
+            ComprovanteFrio(**row)
+            for row in Comprovante.objects.filter(processo_id__in=ids).values(*CAMPOS_COMPROVANTE)
+        ])
+
+        # apaga das tabelas quentes (dependentes primeiro). ✅ sem os signals por linha
+        # (resumo, snapshot, cache): o processo sai junto e as versões são invalidadas
+        # uma vez por processo, depois do commit
+        with interessados_service.sincronizacao_suspensa():
+            Comprovante.objects.filter(processo_id__in=ids).delete()
+            ProcessoInteressado.objects.filter(processo_id__in=ids).delete()
+            ProcessoSnapshot.objects.filter(pk__in=ids).delete()
+            MovimentacaoProcesso.objects.filter(processo_id__in=ids).delete()
+            Processo.objects.filter(pk__in=ids).delete()
+
+        _invalidar_depois_do_commit(ids)
+
+    return len(ids)
+
+
+def mover_para_arquivo_frio(*, ano_corte: int, lote: int = 200, limite: int | None = None, progresso=None) -> int:
+    """
+    Move processos ARQUIVADOS anteriores a `ano_corte` (com movimentações, interessados
+    e comprovantes) para as tabelas frias. Cada lote roda na sua própria transação,
+    então o comando pode ser interrompido e retomado sem deixar processo pela metade.
+    """
+    total = 0
+    for ids in _lotes(ids_elegiveis_arquivo_frio(ano_corte=ano_corte, limite=limite), lote):
+        total += _mover_lote_para_frio(ids)
+        if progresso:
+            progresso(total)
+    return total
+
+
+# =============================================================================
+# Frio -> quente (revisão jurídica)
+# =============================================================================
+
+def _preservar_datas(model, rows: list[dict], campos: list[str]) -> None:
+    """bulk_create aplica auto_now/auto_now_add; regrava as datas originais (um UPDATE por campo)."""
+    if not rows:
+        return
+    for campo in campos:
+        model.objects.filter(pk__in=[r["id"] for r in rows]).update(**{
+            campo: Case(
+                *[When(pk=r["id"], then=Value(r[campo])) for r in rows],
+                output_field=DateTimeField(),
+            )
+        })
+
+
+def _checar_colisao_de_numero(frios: list[dict]) -> None:
+    """Número reaproveitado nas tabelas quentes enquanto o processo estava no arquivo frio."""
+    filtro = Q()
+    for row in frios:
+        filtro |= Q(ano=row["ano"], numero_manual=row["numero_manual"])
+    em_uso = list(Processo.objects.filter(filtro).values_list("numero_formatado", flat=True))
+    if em_uso:
+        raise ValueError(
+            f"Número já em uso nas tabelas quentes: {', '.join(sorted(em_uso))}. "
+            "Renumere o processo ativo antes de restaurar."
+        )
+
+
+def restaurar_do_arquivo_frio(ids: list[int]) -> int:
+    """
+    Devolve processos do arquivo frio para as tabelas quentes (mesmos ids).
+    Levanta ValueError se o número de algum deles já estiver em uso nas tabelas quentes.
+    """
+    with transaction.atomic():
+        frios = list(
+            ProcessoFrio.objects.select_for_update()
+            .filter(pk__in=ids)
+            .values(*CAMPOS_PROCESSO, "snapshot")
+        )
+        if not frios:
+            return 0
+        ids = [row["id"] for row in frios]
+        _checar_colisao_de_numero(frios)
+
+        processos = [{k: v for k, v in row.items() if k != "snapshot"} for row in frios]
+        try:
+            with transaction.atomic():
+                Processo.objects.bulk_create([Processo(**row) for row in processos])
+        except IntegrityError:
+            # criado entre a checagem e o INSERT
+            raise ValueError("Número já em uso nas tabelas quentes; tente novamente.")
+        _preservar_datas(Processo, processos, ["criado_em", "atualizado_em"])
+
+        interessados = list(ProcessoInteressadoFrio.objects.filter(processo_id__in=ids).values(*CAMPOS_INTERESSADO))
+        ProcessoInteressado.objects.bulk_create([ProcessoInteressado(**row) for row in interessados])
+        _preservar_datas(ProcessoInteressado, interessados, ["criado_em"])
+        # a tabela fria não guarda o resumo: recalcula a partir dos vínculos restaurados
+        interessados_service.atualizar_resumo(ids)
+
+        MovimentacaoProcesso.objects.bulk_create([
+            MovimentacaoProcesso(**row)
+            for row in MovimentacaoProcessoFria.objects.filter(processo_id__in=ids).values(*CAMPOS_MOVIMENTACAO)
+        ])
+
+        comprovantes = list(ComprovanteFrio.objects.filter(processo_id__in=ids).values(*CAMPOS_COMPROVANTE))
+        Comprovante.objects.bulk_create([Comprovante(**row) for row in comprovantes])
+        _preservar_datas(Comprovante, comprovantes, ["emitido_em"])
+
+        ProcessoSnapshot.objects.bulk_create([
+            ProcessoSnapshot(processo_id=row["id"], dados=row["snapshot"]) for row in frios
+        ])
+
+        # CASCADE remove movimentações, interessados e comprovantes frios
+        ProcessoFrio.objects.filter(pk__in=ids).delete()
+
+        _invalidar_depois_do_commit(ids)
+
+    return len(ids)
+
+
+# =============================================================================
+# Consulta
+# =============================================================================
+
+def carregar_snapshot_frio(processo_id: int) -> dict | None:
+    """Mesmo formato de snapshot_service.carregar_snapshot, lido da tabela fria."""
+    dados = ProcessoFrio.objects.filter(pk=processo_id).values_list("snapshot", flat=True).first()
+    if dados is None:
+        return None
+    return descompactar(dados)
+
+
+def buscar_no_arquivo_frio(*, q: str = "", tipo: str = "", prioridade: str = "", limite: int = 200):
+    """Busca explícita no arquivo frio (mesmos filtros de texto de processos_list)."""
+    qs = (
+        ProcessoFrio.objects
+        .select_related("tipo_processo")
+        .prefetch_related("interessados_links__pessoa")
+        .order_by("-criado_em")
+    )
+
+    if q:
+        digits = re.sub(r"\D+", "", q)
+        filtros = (
+            Q(numero_formatado__icontains=q)
+            | Q(assunto__icontains=q)
+            | Q(descricao__icontains=q)
+            | Q(interessados_links__pessoa__nome__icontains=q)
+        )
+        if digits:
+            filtros |= Q(interessados_links__pessoa__cpf__icontains=digits)
+        qs = qs.filter(filtros).distinct()
+
+    if tipo:
+        qs = qs.filter(tipo_processo_id=tipo)
+
+    if prioridade:
+        qs = qs.filter(prioridade=prioridade)
+
+    return list(qs[:limite])
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from protocolos import projecoes, versoes
+from protocolos.models import Departamento, Processo
+
+TAMANHO_PAGINA = 25
+
+# contador do menu por usuário, na versão atual da caixa (versões antigas expiram sozinhas)
+CHAVE_TOTAL_PENDENTES = "protocolos:caixa:{versao}:pendentes:{user}:{escopo}"
+TOTAL_PENDENTES_TIMEOUT = 60 * 10
+
+SECAO_PENDENTES = "pendentes"
+SECAO_NO_SETOR = "no-setor"
+
+# Projeção de "pendente de recebimento" (mesma regra de setor_esta_pendente_de_recebimento):
+# recebido_em é zerado a cada chegada interna e preenchido no recebimento.
+PENDENTE = Q(recebido_em__isnull=True)
+
+
+def qs_setores_do_usuario(user):
+    """Setores INTERNOS ativos onde o usuário é responsável, substituto ou membro ativo."""
+    return (
+        Departamento.objects
+        .filter(tipo=Departamento.Tipo.INTERNO, ativo=True)
+        .filter(
+            Q(responsavel_id=user.id)
+            | Q(substituto_id=user.id)
+            | Q(membros__user_id=user.id, membros__ativo=True)
+        )
+        .distinct()
+    )
+
+
+def _qs_caixa(user, *, eh_admin: bool, setores_ids=None):
+    """Processos ativos com o setor atual anotado, já no recorte da caixa do usuário."""
+    qs = (
+        projecoes.qs_linhas()
+        .exclude(status=Processo.Status.ARQUIVADO)
+        .filter(setor_atual_id__isnull=False)
+    )
+    if not eh_admin:
+        # ✅ só processos disponíveis no setor ou atribuídos a mim
+        qs = qs.filter(setor_atual_id__in=[] if setores_ids is None else setores_ids).filter(
+            Q(responsavel_setor__isnull=True) | Q(responsavel_setor_id=user.id)
+        )
+    return qs
+
+
+def contar_por_setor(user, *, eh_admin: bool, setores_ids=None) -> dict[int, dict]:
+    """
+    {setor_id: {"pendentes": n, "no_setor": n}} com uma única consulta agrupada.
+    Órgão EXTERNO não tem recebimento: tudo que está lá conta como "no setor".
+    """
+    rows = (
+        _qs_caixa(user, eh_admin=eh_admin, setores_ids=setores_ids)
+        .order_by()
+        .values("setor_atual_id")
+        .annotate(
+            pendentes=Count("id", filter=PENDENTE),
+            no_setor=Count("id", filter=~PENDENTE),
+        )
+    )
+    return {r["setor_atual_id"]: {"pendentes": r["pendentes"], "no_setor": r["no_setor"]} for r in rows}
+
+
+def total_pendentes(user, *, eh_admin: bool, setores_ids=None) -> int:
+    """Contador do menu: pendentes de recebimento em setores INTERNOS (uma consulta)."""
+    return (
+        _qs_caixa(user, eh_admin=eh_admin, setores_ids=setores_ids)
+        .filter(PENDENTE)
+        .filter(setor_atual_id__in=Departamento.objects.filter(tipo=Departamento.Tipo.INTERNO).values("id"))
+        .count()
+    )
+
+
+def total_pendentes_do_menu(user, *, eh_admin: bool) -> int:
+    """
+    total_pendentes em cache pela versão da caixa (versoes.versao_caixa): movimentação,
+    alteração de processo, de setor ou de membros troca a versão. Sem mudança, o
+    contador de todas as páginas sai do cache, sem consulta.
+    """
+    chave = CHAVE_TOTAL_PENDENTES.format(
+        versao=versoes.versao_caixa(), user=user.pk, escopo="admin" if eh_admin else "setores"
+    )
+    total = cache.get(chave)
+    if total is None:
+        setores_ids = None if eh_admin else qs_setores_do_usuario(user).values("id")
+        total = total_pendentes(user, eh_admin=eh_admin, setores_ids=setores_ids)
+        cache.set(chave, total, timeout=TOTAL_PENDENTES_TIMEOUT)
+    return total
+
+
+def pagina_da_secao(user, setor: Departamento, secao: str, *, eh_admin: bool, pagina: int = 1):
+    """
+    Uma página (TAMANHO_PAGINA) de uma seção de um setor: URGENTE primeiro, depois a
+    tramitação mais recente. Devolve (itens, tem_mais).
+    """
+    qs = (
+        _qs_caixa(user, eh_admin=eh_admin, setores_ids=[setor.pk])
+        .filter(setor_atual_id=setor.pk)
+        .annotate(
+            ordem_prioridade=Case(
+                When(prioridade=Processo.Prioridade.URGENTE, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by("ordem_prioridade", "-ultima_tramitacao", "-id")
+    )
+
+    pendente_possivel = setor.tipo == Departamento.Tipo.INTERNO
+    if secao == SECAO_PENDENTES:
+        qs = qs.filter(PENDENTE) if pendente_possivel else qs.none()
+    elif pendente_possivel:
+        qs = qs.exclude(PENDENTE)
+
+    inicio = (max(pagina, 1) - 1) * TAMANHO_PAGINA
+    itens = projecoes.linhas(qs, inicio=inicio, limite=TAMANHO_PAGINA + 1, interessados=True)
+    return itens[:TAMANHO_PAGINA], len(itens) > TAMANHO_PAGINA
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from django.core.exceptions import ValidationError
+from django.db.models import OuterRef, Subquery
+
+from protocolos.forms import _normalize_numero_processo
+from protocolos.models import Departamento, MovimentacaoProcesso, Processo, ProcessoFrio
+
+LIMITE_LOTE = 500
+
+
+def qs_estado_atual():
+    """Processo + setor atual (destino da última movimentação) numa única consulta."""
+    ultima = MovimentacaoProcesso.objects.filter(processo=OuterRef("pk")).order_by("-registrado_em", "-id")
+    return Processo.objects.annotate(
+        setor_atual_id=Subquery(ultima.values("departamento_destino_id")[:1]),
+        setor_atual=Subquery(ultima.values("departamento_destino__nome")[:1]),
+        setor_atual_tipo=Subquery(ultima.values("departamento_destino__tipo")[:1]),
+    )
+
+
+def resolver_numeros(entradas: list[str]) -> list[dict]:
+    """
+    Resolve uma lista de números ("0123/26", "012326", ...) para o estado atual.
+
+    - Uma consulta IN no índice de numero_formatado (com o setor atual anotado)
+      e, só para os não encontrados, uma no arquivo frio.
+    - A resposta segue a ordem da entrada; números inválidos ou inexistentes
+      voltam com "erro".
+    - Pendente de recebimento = setor atual INTERNO, recebido_em nulo e não arquivado
+      (a mesma regra de setor_esta_pendente_de_recebimento, sem ler o histórico).
+    """
+    if len(entradas) > LIMITE_LOTE:
+        raise ValueError(f"Envie no máximo {LIMITE_LOTE} números por consulta.")
+
+    normalizados: list[tuple[str, str | None, str | None]] = []
+    for entrada in entradas:
+        try:
+            normalizados.append((entrada, _normalize_numero_processo(str(entrada)), None))
+        except ValidationError as e:
+            normalizados.append((entrada, None, e.messages[0]))
+
+    numeros = {n for _e, n, _erro in normalizados if n}
+
+    encontrados = {
+        row["numero_formatado"]: row
+        for row in qs_estado_atual()
+        .filter(numero_formatado__in=numeros, ano__in={Processo.ano_do_numero(n) for n in numeros})
+        .values(
+            "id", "numero_formatado", "status", "recebido_em",
+            "setor_atual_id", "setor_atual", "setor_atual_tipo",
+        )
+    } if numeros else {}
+
+    faltando = numeros - encontrados.keys()
+    frios = dict(
+        ProcessoFrio.objects
+        .filter(numero_formatado__in=faltando)
+        .values_list("numero_formatado", "id")
+    ) if faltando else {}
+
+    resultado = []
+    for entrada, numero, erro in normalizados:
+        item = {"entrada": entrada, "numero": numero}
+        row = encontrados.get(numero) if numero else None
+
+        if row:
+            item.update(
+                encontrado=True,
+                arquivo_frio=False,
+                id=row["id"],
+                status=row["status"],
+                setor_atual_id=row["setor_atual_id"],
+                setor_atual=row["setor_atual"],
+                pendente_recebimento=(
+                    row["setor_atual_tipo"] == Departamento.Tipo.INTERNO
+                    and row["recebido_em"] is None
+                    and row["status"] != Processo.Status.ARQUIVADO
+                ),
+            )
+        elif numero in frios:
+            item.update(
+                encontrado=True,
+                arquivo_frio=True,
+                id=frios[numero],
+                status=Processo.Status.ARQUIVADO,
+                setor_atual_id=None,
+                setor_atual=None,
+                pendente_recebimento=False,
+            )
+        else:
+            item.update(encontrado=False, erro=erro or "Processo não encontrado.")
+
+        resultado.append(item)
+
+    return resultado
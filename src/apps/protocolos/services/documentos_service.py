@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import tempfile
+
+from django.core.files import File
+from django.db.models import F, OuterRef, Subquery
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from core.code128 import svg_code128
+from core.jobs import enfileirar
+from protocolos.models import Departamento, DocumentoGerado, MovimentacaoProcesso, Processo
+
+TAREFA_GERAR = "protocolos.gerar_documento"
+
+LIMITE_PROCESSOS = 2000
+TAMANHO_BLOCO = 100  # linhas renderizadas/gravadas por vez
+MEMORIA_MAXIMA = 1024 * 1024  # acima disso o arquivo temporário vai para o disco
+
+
+# =============================================================================
+# Consulta (uma só, em conjunto)
+# =============================================================================
+
+def _qs_ultimas_movimentacoes(processos):
+    """
+    Última movimentação de cada processo de `processos` (ids ou queryset de Processo),
+    já com os dados do processo (joins). Uma consulta para o documento inteiro, em vez
+    de buscar o setor atual processo a processo; a subconsulta da última movimentação
+    só roda para as movimentações desses processos, não para a tabela inteira.
+    """
+    ultima_id = (
+        MovimentacaoProcesso.objects
+        .filter(processo_id=OuterRef("processo_id"))
+        .order_by("-registrado_em", "-id")
+        .values("id")[:1]
+    )
+    return (
+        MovimentacaoProcesso.objects
+        .filter(processo_id__in=processos)
+        .annotate(ultima_id=Subquery(ultima_id))
+        .filter(id=F("ultima_id"))
+        .values(
+            "processo_id",
+            "processo__numero_formatado",
+            "processo__assunto",
+            "processo__prioridade",
+            "processo__criado_em",
+            "processo__tipo_processo__nome",
+            "processo__interessados_resumo",
+            "acao",
+            "registrado_em",
+            "registrado_por__username",
+            "departamento_origem__nome",
+            "departamento_destino__nome",
+        )
+    )
+
+
+def _linhas(documento: DocumentoGerado):
+    p = documento.parametros
+
+    if documento.tipo == DocumentoGerado.Tipo.ETIQUETAS:
+        qs = _qs_ultimas_movimentacoes(p.get("processos") or [])
+        ordem = ("processo__numero_formatado",)
+    else:
+        # ✅ guia: tudo que saiu da origem para o destino e ainda não foi recebido lá.
+        # Candidatos primeiro (pendentes de recebimento com encaminhamento origem ->
+        # destino); a última movimentação é conferida só para eles.
+        encaminhamento = dict(
+            tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.INTERNA,
+            acao=MovimentacaoProcesso.Acao.ENCAMINHADO,
+            departamento_origem_id=p.get("origem"),
+            departamento_destino_id=p.get("destino"),
+        )
+        candidatos = (
+            Processo.objects
+            .filter(recebido_em__isnull=True)
+            .exclude(status=Processo.Status.ARQUIVADO)
+            .filter(pk__in=MovimentacaoProcesso.objects.filter(**encaminhamento).values("processo_id"))
+            .values("pk")
+        )
+        qs = _qs_ultimas_movimentacoes(candidatos).filter(**encaminhamento)
+        ordem = ("registrado_em", "processo__numero_formatado")
+
+    for row in qs.order_by(*ordem)[:LIMITE_PROCESSOS].iterator(chunk_size=TAMANHO_BLOCO):
+        resumo = row.pop("processo__interessados_resumo") or []
+        row["interessado"] = resumo[0]["nome"] if resumo else None
+        if documento.tipo == DocumentoGerado.Tipo.ETIQUETAS:
+            row["codigo_barras"] = mark_safe(svg_code128(row["processo__numero_formatado"]))
+        yield row
+
+
+# =============================================================================
+# Geração (worker)
+# =============================================================================
+
+def _blocos(iteravel, tamanho: int = TAMANHO_BLOCO):
+    bloco = []
+    for item in iteravel:
+        bloco.append(item)
+        if len(bloco) == tamanho:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+
+def gerar_documento(documento: DocumentoGerado) -> DocumentoGerado:
+    """
+    Renderiza em blocos de TAMANHO_BLOCO linhas, gravando cada bloco no arquivo
+    temporário assim que fica pronto: o documento inteiro nunca fica em memória.
+    """
+    template_bloco = (
+        "protocolos/documentos/etiquetas_bloco.html"
+        if documento.tipo == DocumentoGerado.Tipo.ETIQUETAS
+        else "protocolos/documentos/guia_bloco.html"
+    )
+    contexto = {"documento": documento, "gerado_em": timezone.now()}
+    if documento.tipo == DocumentoGerado.Tipo.GUIA_REMESSA:
+        setores = Departamento.objects.in_bulk([documento.parametros.get("origem"), documento.parametros.get("destino")])
+        contexto["origem"] = setores.get(documento.parametros.get("origem"))
+        contexto["destino"] = setores.get(documento.parametros.get("destino"))
+
+    total = 0
+    with tempfile.SpooledTemporaryFile(max_size=MEMORIA_MAXIMA) as tmp:
+        tmp.write(render_to_string("protocolos/documentos/impressao_inicio.html", contexto).encode("utf-8"))
+        for bloco in _blocos(_linhas(documento)):
+            tmp.write(render_to_string(template_bloco, {**contexto, "itens": bloco, "inicio": total}).encode("utf-8"))
+            total += len(bloco)
+        tmp.write(render_to_string("protocolos/documentos/impressao_fim.html", {**contexto, "total": total}).encode("utf-8"))
+
+        tmp.seek(0)
+        documento.arquivo.save(f"{documento.tipo.lower()}-{documento.pk}.html", File(tmp), save=False)
+
+    documento.quantidade = total
+    documento.status = DocumentoGerado.Status.PRONTO
+    documento.concluido_em = timezone.now()
+    documento.erro = ""
+    documento.save(update_fields=["arquivo", "quantidade", "status", "concluido_em", "erro"])
+    return documento
+
+
+# =============================================================================
+# Solicitação (views)
+# =============================================================================
+
+def _solicitar(tipo: str, parametros: dict, titulo: str, usuario) -> DocumentoGerado:
+    documento = DocumentoGerado.objects.create(
+        tipo=tipo,
+        parametros=parametros,
+        titulo=titulo[:200],
+        solicitado_por=usuario,
+    )
+    enfileirar(TAREFA_GERAR, {"documento_id": documento.pk}, prioridade=5)
+    return documento
+
+
+def solicitar_etiquetas(processo_ids: list[int], usuario) -> DocumentoGerado:
+    ids = sorted(set(processo_ids))
+    if not ids:
+        raise ValueError("Nenhum processo selecionado para as etiquetas.")
+    if len(ids) > LIMITE_PROCESSOS:
+        raise ValueError(f"Selecione no máximo {LIMITE_PROCESSOS} processos por folha de etiquetas.")
+    return _solicitar(DocumentoGerado.Tipo.ETIQUETAS, {"processos": ids}, f"{len(ids)} etiqueta(s)", usuario)
+
+
+def solicitar_guia_remessa(origem: Departamento, destino: Departamento, usuario) -> DocumentoGerado:
+    if origem.pk == destino.pk:
+        raise ValueError("Origem e destino da guia devem ser diferentes.")
+    return _solicitar(
+        DocumentoGerado.Tipo.GUIA_REMESSA,
+        {"origem": origem.pk, "destino": destino.pk},
+        f"{origem.nome} → {destino.nome}",
+        usuario,
+    )
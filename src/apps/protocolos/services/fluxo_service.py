@@ -0,0 +1,261 @@
+"""
+Matriz de fluxo entre setores: por onde os processos realmente passam.
+
+Cada MovimentacaoProcesso é uma transição (origem -> destino, tipo, ação); o
+intervalo é o tempo desde a movimentação anterior do mesmo processo (quanto ele
+ficou parado antes de andar; para um RECEBIDO, quanto o encaminhamento levou
+para ser recebido).
+
+FluxoSetor guarda o agregado por mês: quantidade, soma (média) e um histograma
+em faixas de 2^(1/4) ms, que se soma entre meses e lotes e dá a mediana com
+erro de até ~9%. Só cresce: cada lote lê as movimentações depois da marca, em
+ordem de (registrado_em, id), soma no agregado e avança a marca na mesma
+transação (nenhuma conta duas vezes). A rodada só vai até ATRASO_COMMIT segundos
+atrás: o id sai na ordem do INSERT, não do COMMIT, e antes do corte tudo já está
+visível (inclusive a movimentação anterior de cada uma, que dá o intervalo).
+Processos que depois vão para o arquivo frio continuam contados.
+"""
+from __future__ import annotations
+
+import math
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from protocolos.models import Departamento, FluxoSetor, MarcaProcessamento, MovimentacaoProcesso
+
+MARCA = "fluxo_setor"
+LOTE = 5000
+ATRASO_COMMIT = settings.ANALISE_ATRASO_COMMIT
+FAIXAS_POR_OITAVA = 4  # faixa k cobre [2^(k/4), 2^((k+1)/4)) ms
+
+
+def _faixa(ms: int) -> int:
+    return int(FAIXAS_POR_OITAVA * math.log2(ms)) if ms >= 1 else 0
+
+
+def _valor_da_faixa(faixa: int) -> int:
+    """Centro geométrico da faixa."""
+    return round(2 ** ((faixa + 0.5) / FAIXAS_POR_OITAVA))
+
+
+def _mediana(histograma: Counter) -> int | None:
+    total = sum(histograma.values())
+    acumulado = 0
+    for faixa in sorted(histograma):
+        acumulado += histograma[faixa]
+        if acumulado * 2 >= total:
+            return _valor_da_faixa(faixa)
+    return None
+
+
+class _Soma:
+    __slots__ = ("quantidade", "medidas", "soma_ms", "histograma")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.medidas = 0
+        self.soma_ms = 0
+        self.histograma = Counter()
+
+    def somar(self, quantidade: int, medidas: int, soma_ms: int, histograma) -> None:
+        self.quantidade += quantidade
+        self.medidas += medidas
+        self.soma_ms += soma_ms
+        for faixa, n in histograma.items():
+            self.histograma[int(faixa)] += n
+
+    def tempos(self) -> dict:
+        return {
+            "media_ms": self.soma_ms // self.medidas if self.medidas else None,
+            "mediana_ms": _mediana(self.histograma),
+        }
+
+
+# =============================================================================
+# Atualização incremental
+# =============================================================================
+
+def _processar_lote(ate: datetime, lote: int) -> tuple[int, datetime | None]:
+    """Soma o próximo lote de movimentações (registradas antes de `ate`) no agregado. Devolve (quantas, nova marca)."""
+    # anterior na mesma ordem (registrado_em, id) da marca: no empate, a de id menor
+    anterior = (
+        MovimentacaoProcesso.objects
+        .filter(processo_id=OuterRef("processo_id"))
+        .filter(
+            Q(registrado_em__lt=OuterRef("registrado_em"))
+            | Q(registrado_em=OuterRef("registrado_em"), id__lt=OuterRef("id"))
+        )
+        .order_by("-registrado_em", "-id")
+        .values("registrado_em")[:1]
+    )
+    with transaction.atomic():
+        # ✅ trava a marca: duas rodadas simultâneas não somam o mesmo lote
+        marca, _ = MarcaProcessamento.objects.select_for_update().get_or_create(nome=MARCA)
+        qs = MovimentacaoProcesso.objects.filter(registrado_em__lt=ate)
+        if marca.ultimo_em is not None:
+            qs = qs.filter(
+                Q(registrado_em__gt=marca.ultimo_em) | Q(registrado_em=marca.ultimo_em, id__gt=marca.ultimo_id)
+            )
+        movs = list(
+            qs
+            .order_by("registrado_em", "id")
+            .annotate(anterior_em=Subquery(anterior))
+            .values_list(
+                "id", "departamento_origem_id", "departamento_destino_id", "tipo_tramitacao", "acao",
+                "registrado_em", "anterior_em",
+            )[:lote]
+        )
+        if not movs:
+            return 0, marca.ultimo_em
+
+        deltas = defaultdict(_Soma)
+        for _, origem, destino, tipo, acao, registrado_em, anterior_em in movs:
+            mes = timezone.localtime(registrado_em).date().replace(day=1)
+            if anterior_em is None:
+                deltas[(mes, origem, destino, tipo, acao)].somar(1, 0, 0, {})
+            else:
+                ms = max(int((registrado_em - anterior_em).total_seconds() * 1000), 0)
+                deltas[(mes, origem, destino, tipo, acao)].somar(1, 1, ms, {_faixa(ms): 1})
+
+        _gravar(deltas)
+        marca.ultimo_em, marca.ultimo_id = movs[-1][5], movs[-1][0]
+        marca.save(update_fields=["ultimo_em", "ultimo_id", "atualizado_em"])
+    return len(movs), marca.ultimo_em
+
+
+def _gravar(deltas: dict) -> None:
+    existentes = {
+        (f.mes, f.origem_id, f.destino_id, f.tipo_tramitacao, f.acao): f
+        for f in FluxoSetor.objects.filter(
+            mes__in={c[0] for c in deltas},
+            origem_id__in={c[1] for c in deltas},
+        )
+    }
+    novos, alterados = [], []
+    for (mes, origem, destino, tipo, acao), delta in deltas.items():
+        fluxo = existentes.get((mes, origem, destino, tipo, acao))
+        if fluxo is None:
+            fluxo = FluxoSetor(mes=mes, origem_id=origem, destino_id=destino, tipo_tramitacao=tipo, acao=acao)
+            novos.append(fluxo)
+        else:
+            alterados.append(fluxo)
+        fluxo.quantidade += delta.quantidade
+        fluxo.medidas += delta.medidas
+        fluxo.soma_ms += delta.soma_ms
+        histograma = dict(fluxo.histograma)
+        for faixa, n in delta.histograma.items():
+            histograma[str(faixa)] = histograma.get(str(faixa), 0) + n
+        fluxo.histograma = histograma
+
+    FluxoSetor.objects.bulk_create(novos, batch_size=LOTE)
+    FluxoSetor.objects.bulk_update(alterados, ["quantidade", "medidas", "soma_ms", "histograma"], batch_size=LOTE)
+
+
+def atualizar(*, reprocessar: bool = False, lote: int = LOTE) -> dict:
+    """
+    Soma no agregado as movimentações registradas desde a última rodada até
+    ATRASO_COMMIT segundos atrás, lote a lote. reprocessar=True apaga o agregado e
+    recomeça do zero (só enxerga as tabelas quentes: o que já foi para o arquivo
+    frio sai da matriz).
+    """
+    if reprocessar:
+        with transaction.atomic():
+            MarcaProcessamento.objects.select_for_update().get_or_create(nome=MARCA)
+            FluxoSetor.objects.all().delete()
+            MarcaProcessamento.objects.filter(nome=MARCA).update(ultimo_em=None, ultimo_id=0)
+
+    # corte fixo da rodada: o que for registrado depois fica para a próxima
+    ate = timezone.now() - timedelta(seconds=ATRASO_COMMIT)
+    total = 0
+    while True:
+        quantas, _ = _processar_lote(ate, lote)
+        if not quantas:
+            break
+        total += quantas
+    return {"movimentacoes": total, "ate": ate}
+
+
+# =============================================================================
+# Consulta
+# =============================================================================
+
+ARQUIVO = "ARQUIVADO"  # rótulo do destino nulo
+
+
+def _agregar(chave, *, desde: date | None, ate: date | None, tipo_tramitacao: str = "", acao: str = "") -> dict:
+    qs = FluxoSetor.objects.all()
+    if desde:
+        qs = qs.filter(mes__gte=desde.replace(day=1))
+    if ate:
+        qs = qs.filter(mes__lte=ate)
+    if tipo_tramitacao:
+        qs = qs.filter(tipo_tramitacao=tipo_tramitacao)
+    if acao:
+        qs = qs.filter(acao=acao)
+
+    somas = defaultdict(_Soma)
+    for f in qs.order_by().iterator():
+        somas[chave(f)].somar(f.quantidade, f.medidas, f.soma_ms, f.histograma)
+    return somas
+
+
+def matriz(*, desde: date | None = None, ate: date | None = None, tipo_tramitacao: str = "", acao: str = "") -> list[dict]:
+    """
+    Transições (origem, destino, tipo, ação) na janela [desde, ate] (por mês), da
+    mais frequente para a menos: quantidade, média e mediana (aprox.) do intervalo em ms.
+    """
+    somas = _agregar(
+        lambda f: (f.origem_id, f.destino_id, f.tipo_tramitacao, f.acao),
+        desde=desde, ate=ate, tipo_tramitacao=tipo_tramitacao, acao=acao,
+    )
+    nomes = dict(Departamento.objects.values_list("pk", "nome"))
+    linhas = [
+        {
+            "origem_id": origem,
+            "origem": nomes.get(origem, str(origem)),
+            "destino_id": destino,
+            "destino": nomes.get(destino, str(destino)) if destino else ARQUIVO,
+            "tipo_tramitacao": tipo,
+            "acao": acao_,
+            "quantidade": soma.quantidade,
+            **soma.tempos(),
+        }
+        for (origem, destino, tipo, acao_), soma in somas.items()
+    ]
+    linhas.sort(key=lambda l: (-l["quantidade"], l["origem"], l["destino"]))
+    return linhas
+
+
+def sankey(*, desde: date | None = None, ate: date | None = None, tipo_tramitacao: str = "", acao: str = "") -> dict:
+    """
+    Mesma janela em formato de diagrama de Sankey: nós de origem à esquerda e de
+    destino à direita (separados: o fluxo entre setores tem ciclos, que o Sankey
+    não desenha) e um link por par origem -> destino, somando tipos e ações.
+    Permanecer no setor (RECEBIDO, abertura: origem = destino) fica de fora.
+    """
+    somas = _agregar(
+        lambda f: (f.origem_id, f.destino_id),
+        desde=desde, ate=ate, tipo_tramitacao=tipo_tramitacao, acao=acao,
+    )
+    nomes = dict(Departamento.objects.values_list("pk", "nome"))
+
+    nos, links = {}, []
+    for (origem, destino), soma in sorted(somas.items(), key=lambda item: -item[1].quantidade):
+        if origem == destino:
+            continue
+        fonte, alvo = f"o:{origem}", f"d:{destino or 'arquivo'}"
+        nos.setdefault(fonte, {"id": fonte, "nome": nomes.get(origem, str(origem)), "lado": "origem"})
+        nos.setdefault(alvo, {"id": alvo, "nome": nomes.get(destino, str(destino)) if destino else ARQUIVO, "lado": "destino"})
+        links.append({"source": fonte, "target": alvo, "value": soma.quantidade, **soma.tempos()})
+
+    return {
+        "desde": desde.isoformat() if desde else None,
+        "ate": ate.isoformat() if ate else None,
+        "nodes": list(nos.values()),
+        "links": links,
+    }
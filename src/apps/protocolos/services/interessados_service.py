@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from protocolos import versoes
+from protocolos.models import Processo, ProcessoInteressado
+
+LOTE = 500
+
+_estado = threading.local()
+
+
+# =============================================================================
+# Resumo desnormalizado (Processo.interessados_resumo)
+# =============================================================================
+
+def resumos_esperados(processo_ids: list[int]) -> dict[int, list[dict]]:
+    """Resumo calculado a partir dos vínculos (uma consulta com join em Pessoa)."""
+    esperado: dict[int, list[dict]] = {pk: [] for pk in processo_ids}
+    rows = (
+        ProcessoInteressado.objects
+        .filter(processo_id__in=processo_ids)
+        .order_by()
+        .values_list("processo_id", "pessoa_id", "pessoa__nome", "pessoa__cpf")
+    )
+    for processo_id, pessoa_id, nome, cpf in rows:
+        esperado[processo_id].append(Processo.item_resumo(pessoa_id, nome, cpf))
+    # ordena em Python (mesma ordem de Processo.resumo_de_interessados, independente da collation)
+    for itens in esperado.values():
+        itens.sort(key=lambda i: (i["nome"], i["id"]))
+    return esperado
+
+
+def atualizar_resumo(processo_ids, *, gravar: bool = True) -> list[int]:
+    """
+    Recalcula interessados_resumo em lotes de LOTE processos: duas leituras por lote
+    (vínculos e resumo atual) e um bulk_update só dos que divergem.
+    Devolve os ids divergentes (com gravar=False, só confere).
+
+    bulk_create/queryset.update de ProcessoInteressado não disparam signals:
+    quem usa chama esta função. bulk_update também não: atualizado_em e a versão
+    (ETag da tela de consulta) são renovados aqui.
+    """
+    ids = sorted(set(processo_ids))
+    divergentes: list[int] = []
+    for i in range(0, len(ids), LOTE):
+        lote = ids[i: i + LOTE]
+        esperado = resumos_esperados(lote)
+        agora = timezone.now()
+        alterar = [
+            Processo(pk=pk, interessados_resumo=esperado[pk], atualizado_em=agora)
+            for pk, atual in Processo.objects.filter(pk__in=lote).values_list("pk", "interessados_resumo")
+            if atual != esperado[pk]
+        ]
+        if alterar and gravar:
+            Processo.objects.bulk_update(alterar, ["interessados_resumo", "atualizado_em"])
+            versoes.invalidar_processos([p.pk for p in alterar])
+        divergentes.extend(p.pk for p in alterar)
+    return divergentes
+
+
+def processos_da_pessoa(pessoa_id: int) -> list[int]:
+    return list(
+        ProcessoInteressado.objects.filter(pessoa_id=pessoa_id).values_list("processo_id", flat=True)
+    )
+
+
+# =============================================================================
+# Sincronização pelos signals
+# =============================================================================
+
+def sincronizacao_ativa() -> bool:
+    return not getattr(_estado, "suspensa", False)
+
+
+@contextmanager
+def sincronizacao_suspensa():
+    """
+    Desliga a sincronização por signals no bloco (ex.: mover para o arquivo frio,
+    onde os vínculos são apagados junto com o processo e o resumo deixa de importar):
+    resumo, snapshots e a invalidação das versões em cache. Quem suspende invalida
+    as versões dos processos afetados por conta própria.
+    """
+    anterior = getattr(_estado, "suspensa", False)
+    _estado.suspensa = True
+    try:
+        yield
+    finally:
+        _estado.suspensa = anterior
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Min
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.jobs import enfileirar
+from protocolos.models import Departamento, DepartamentoMembro, MovimentacaoProcesso, NotificacaoEmail, Processo
+
+TAREFA_ENVIO = "protocolos.enviar_notificacoes"
+
+NOTIFICACOES_ATIVAS = getattr(settings, "NOTIFICACOES_EMAIL_ATIVAS", True)
+# Janela de agrupamento: chegadas dentro dela vão no mesmo e-mail (resumo)
+ATRASO_ENVIO = getattr(settings, "NOTIFICACOES_EMAIL_ATRASO", 60)
+MAX_TENTATIVAS = getattr(settings, "NOTIFICACOES_EMAIL_MAX_TENTATIVAS", 5)
+LOTE_ENVIO = 500
+# Aviso reivindicado por um dispatcher fica fora da fila por esse tempo (segundos): o SMTP
+# roda sem transação aberta e, se o dispatcher morrer no meio, o aviso volta sozinho.
+RESERVA_ENVIO = 10 * 60
+
+
+def _agendar_envio(atraso: int = ATRASO_ENVIO) -> None:
+    # ✅ chave: um único job PENDENTE de envio, não importa quantas chegadas
+    enfileirar(TAREFA_ENVIO, chave=TAREFA_ENVIO, atraso=max(int(atraso), 0))
+
+
+# =============================================================================
+# Gravação (dentro da transação da movimentação)
+# =============================================================================
+
+def registrar_notificacoes_chegada(processo: Processo, mov: MovimentacaoProcesso) -> int:
+    """
+    Grava na outbox um aviso para cada membro ativo (com e-mail) do setor interno de destino,
+    incluindo responsável e substituto do setor (um aviso por usuário).
+    Deve ser chamada na mesma transação do INSERT da movimentação: rollback desfaz os dois.
+    """
+    if not NOTIFICACOES_ATIVAS:
+        return 0
+
+    destino = mov.departamento_destino
+    if not destino or destino.tipo != Departamento.Tipo.INTERNO:
+        return 0
+
+    membros = dict(
+        DepartamentoMembro.objects
+        .filter(departamento_id=destino.pk, ativo=True, user__is_active=True)
+        .exclude(user__email="")
+        .values_list("user_id", "user__email")
+    )
+    chefia = [pk for pk in (destino.responsavel_id, destino.substituto_id) if pk and pk not in membros]
+    if chefia:
+        membros.update(
+            get_user_model().objects
+            .filter(pk__in=chefia, is_active=True)
+            .exclude(email="")
+            .values_list("pk", "email")
+        )
+    membros.pop(mov.registrado_por_id, None)
+
+    if mov.acao == MovimentacaoProcesso.Acao.DEVOLVIDO:
+        mensagem = f"Retorno do órgão externo {mov.departamento_origem.nome}"
+    else:
+        mensagem = f"Encaminhado por {mov.departamento_origem.nome}"
+
+    itens = [
+        NotificacaoEmail(
+            destinatario=email,
+            usuario_id=user_id,
+            processo=processo,
+            numero_processo=processo.numero_formatado,
+            setor=destino.nome,
+            mensagem=f"{mensagem}: {processo.assunto}"[:255],
+        )
+        for user_id, email in membros.items()
+    ]
+    if not itens:
+        return 0
+
+    NotificacaoEmail.objects.bulk_create(itens)
+    _agendar_envio()
+    return len(itens)
+
+
+# =============================================================================
+# Envio (dispatcher)
+# =============================================================================
+
+def _montar_email(destinatario: str, itens: list[NotificacaoEmail], conexao) -> EmailMessage:
+    assunto = (
+        f"[Eprotocolo] Processo {itens[0].numero_processo} chegou ao seu setor"
+        if len(itens) == 1
+        else f"[Eprotocolo] {len(itens)} processos chegaram ao seu setor"
+    )
+    corpo = render_to_string("protocolos/emails/notificacao_resumo.txt", {"itens": itens})
+    return EmailMessage(assunto, corpo, settings.DEFAULT_FROM_EMAIL, [destinatario], connection=conexao)
+
+
+def _backoff(tentativa: int) -> timedelta:
+    return timedelta(minutes=min(2 ** tentativa, 120))
+
+
+def _registrar_falha(itens: list[NotificacaoEmail], erro: str, agora) -> None:
+    grupo = NotificacaoEmail.objects.filter(pk__in=[i.pk for i in itens])
+    tentativa = max(i.tentativas for i in itens) + 1
+    grupo.update(
+        tentativas=F("tentativas") + 1,
+        proxima_tentativa=agora + _backoff(tentativa),
+        erro=erro,
+    )
+    grupo.filter(tentativas__gte=MAX_TENTATIVAS).update(status=NotificacaoEmail.Status.FALHOU)
+
+
+def _reivindicar(limite: int, agora) -> list[NotificacaoEmail]:
+    """
+    Pega até `limite` avisos prontos e os tira da fila por RESERVA_ENVIO, numa transação curta:
+    nenhuma linha fica travada durante o SMTP. SKIP LOCKED: dois dispatchers nunca pegam o mesmo aviso.
+    """
+    with transaction.atomic():
+        itens = list(
+            NotificacaoEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=NotificacaoEmail.Status.PENDENTE, proxima_tentativa__lte=agora)
+            .order_by("id")[:limite]
+        )
+        if itens:
+            NotificacaoEmail.objects.filter(pk__in=[i.pk for i in itens]).update(
+                proxima_tentativa=agora + timedelta(seconds=RESERVA_ENVIO)
+            )
+    return itens
+
+
+def enviar_notificacoes_pendentes(*, limite: int = LOTE_ENVIO) -> dict:
+    """
+    Envia a outbox pendente: um e-mail por destinatário (resumo de todas as chegadas)
+    e uma única conexão SMTP reaproveitada no lote inteiro.
+    Falhas (inclusive servidor SMTP fora do ar) contam tentativa e voltam para a fila
+    com backoff até MAX_TENTATIVAS.
+    """
+    agora = timezone.now()
+    enviados: list[int] = []
+    falhas: list[tuple[list[NotificacaoEmail], str]] = []
+
+    por_destinatario: dict[str, list[NotificacaoEmail]] = defaultdict(list)
+    for item in _reivindicar(limite, agora):
+        por_destinatario[item.destinatario].append(item)
+
+    if por_destinatario:
+        conexao = get_connection()
+        try:
+            conexao.open()
+        except Exception as e:
+            falhas = [(grupo, str(e)) for grupo in por_destinatario.values()]
+        else:
+            try:
+                for destinatario, grupo in por_destinatario.items():
+                    try:
+                        conexao.send_messages([_montar_email(destinatario, grupo, conexao)])
+                        enviados.extend(i.pk for i in grupo)
+                    except Exception as e:
+                        falhas.append((grupo, str(e)))
+            finally:
+                conexao.close()
+
+    if enviados:
+        NotificacaoEmail.objects.filter(pk__in=enviados).update(
+            status=NotificacaoEmail.Status.ENVIADO,
+            enviado_em=timezone.now(),
+            tentativas=F("tentativas") + 1,
+            erro="",
+        )
+
+    for grupo, erro in falhas:
+        _registrar_falha(grupo, erro, agora)
+
+    # ✅ sobrou pendência (lote cheio ou retentativa): agenda o próximo envio
+    proxima = (
+        NotificacaoEmail.objects
+        .filter(status=NotificacaoEmail.Status.PENDENTE)
+        .aggregate(m=Min("proxima_tentativa"))["m"]
+    )
+    if proxima:
+        _agendar_envio((proxima - timezone.now()).total_seconds())
+
+    return {"enviados": len(enviados), "falhas": sum(len(grupo) for grupo, _ in falhas)}
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+
+from protocolos.models import SequenciaProcesso
+
+# Quantos números cada processo (worker) reserva por vez. 1 = sem bloco (numeração contínua).
+# Com bloco > 1 os números deixam de sair em ordem entre workers e um restart deixa lacunas.
+TAMANHO_BLOCO = getattr(settings, "PROCESSO_NUMERACAO_BLOCO", 1)
+
+_blocos: dict[int, list[int]] = {}
+_lock = threading.Lock()
+
+
+def ano_corrente_2d() -> int:
+    return timezone.localdate().year % 100
+
+
+def proximo_numero(ano_2d: int | None = None) -> tuple[int, int]:
+    """Próximo número automático -> (numero_manual, ano_2d)."""
+    ano_2d = ano_corrente_2d() if ano_2d is None else ano_2d
+
+    if TAMANHO_BLOCO <= 1:
+        return SequenciaProcesso.reservar(ano_2d)[0], ano_2d
+
+    with _lock:
+        bloco = _blocos.get(ano_2d)
+        if not bloco:
+            bloco = _blocos[ano_2d] = list(reversed(SequenciaProcesso.reservar(ano_2d, TAMANHO_BLOCO)))
+        return bloco.pop(), ano_2d
+
+
+def descartar_bloco(ano_2d: int) -> None:
+    """Esquece o bloco local do ano (a sequência foi pulada para frente depois de uma colisão)."""
+    with _lock:
+        _blocos.pop(ano_2d, None)
@@ -0,0 +1,221 @@
+"""
+Particionamento por faixa de ano (RANGE) das duas tabelas que mais crescem (só MySQL).
+
+- Processo: RANGE (ano), uma partição por ano de dois dígitos (a26 = ano 26).
+- MovimentacaoProcesso: RANGE (YEAR(registrado_em)), uma partição por ano (p2026).
+- Última partição sempre MAXVALUE (amax/pmax); as futuras são criadas antes da
+  virada do ano partindo-se a MAXVALUE (REORGANIZE PARTITION, rápido com ela vazia).
+
+Exigências do MySQL, atendidas só aqui (--particionar), nunca pelas migrações:
+instalações sem particionamento mantêm todos os FKs e UNIQUEs do model.
+- nenhum FK apontando para a tabela ou saindo dela: os FKs são removidos do banco.
+  Daí em diante a integridade referencial fica com a aplicação: o on_delete
+  (CASCADE/PROTECT/SET_NULL) sempre foi feito pelo Django, e todo INSERT passa pelo ORM;
+- toda chave única inclui a coluna de partição: a PK passa a ser (id, ano) /
+  (id, registrado_em) e o UNIQUE de numero_formatado vira índice simples. A unicidade
+  do número continua no banco por (ano, numero_manual), de que numero_formatado é
+  derivado (Processo.format_numero) em todos os pontos que gravam.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from django.db import connection
+from django.utils import timezone
+
+from protocolos.models import MovimentacaoProcesso, Processo
+
+
+@dataclass(frozen=True)
+class Esquema:
+    model: type
+    coluna_pk: str  # entra na PK junto com id
+    expressao: str  # expressão do RANGE
+    prefixo: str
+
+    @property
+    def tabela(self) -> str:
+        return self.model._meta.db_table
+
+    def nome(self, valor: int) -> str:
+        return f"{self.prefixo}{valor:02d}"
+
+    @property
+    def nome_max(self) -> str:
+        return f"{self.prefixo}max"
+
+
+PROCESSO = Esquema(Processo, "ano", "ano", "a")
+MOVIMENTACAO = Esquema(MovimentacaoProcesso, "registrado_em", "YEAR(registrado_em)", "p")
+ESQUEMAS = (PROCESSO, MOVIMENTACAO)
+
+
+class ErroParticionamento(ValueError):
+    pass
+
+
+def _ano_corrente(esquema: Esquema) -> int:
+    ano = timezone.now().year
+    return ano % 100 if esquema is PROCESSO else ano
+
+
+def _exigir_mysql() -> None:
+    if connection.vendor != "mysql":
+        raise ErroParticionamento("Particionamento só é suportado no MySQL.")
+
+
+# =============================================================================
+# Leitura (information_schema)
+# =============================================================================
+
+def particoes(esquema: Esquema) -> list[dict]:
+    """Partições em ordem: nome, limite (None = MAXVALUE), linhas (estimativa) e bytes."""
+    with connection.cursor() as cur:
+        cur.execute(
+            """
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH
+              FROM information_schema.PARTITIONS
+             WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+             ORDER BY PARTITION_ORDINAL_POSITION
+            """,
+            [esquema.tabela],
+        )
+        return [
+            {
+                "nome": nome,
+                "limite": None if descricao == "MAXVALUE" else int(descricao),
+                "linhas": linhas or 0,
+                "bytes": tamanho or 0,
+            }
+            for nome, descricao, linhas, tamanho in cur.fetchall()
+        ]
+
+
+def _fks(esquema: Esquema) -> list[tuple[str, str]]:
+    """(tabela, constraint) de cada FK saindo da tabela ou apontando para ela."""
+    with connection.cursor() as cur:
+        cur.execute(
+            """
+            SELECT TABLE_NAME, CONSTRAINT_NAME
+              FROM information_schema.REFERENTIAL_CONSTRAINTS
+             WHERE CONSTRAINT_SCHEMA = DATABASE() AND (TABLE_NAME = %s OR REFERENCED_TABLE_NAME = %s)
+             ORDER BY TABLE_NAME, CONSTRAINT_NAME
+            """,
+            [esquema.tabela, esquema.tabela],
+        )
+        return [tuple(row) for row in cur.fetchall()]
+
+
+def _unicos_sem_particao(esquema: Esquema) -> list[tuple[str, list[str]]]:
+    """Índices UNIQUE (fora a PK) que não contêm a coluna de partição: (nome, colunas)."""
+    with connection.cursor() as cur:
+        cur.execute(
+            """
+            SELECT INDEX_NAME, COLUMN_NAME
+              FROM information_schema.STATISTICS
+             WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 0 AND INDEX_NAME <> 'PRIMARY'
+             ORDER BY INDEX_NAME, SEQ_IN_INDEX
+            """,
+            [esquema.tabela],
+        )
+        indices: dict[str, list[str]] = {}
+        for nome, coluna in cur.fetchall():
+            indices.setdefault(nome, []).append(coluna)
+    return [(nome, colunas) for nome, colunas in indices.items() if esquema.coluna_pk not in colunas]
+
+
+def _faixa_dos_dados(esquema: Esquema) -> tuple[int | None, int | None]:
+    tabela = connection.ops.quote_name(esquema.tabela)
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT MIN({esquema.expressao}), MAX({esquema.expressao}) FROM {tabela}")
+        return cur.fetchone()
+
+
+def relatorio() -> dict[str, list[dict]]:
+    _exigir_mysql()
+    return {esquema.tabela: particoes(esquema) for esquema in ESQUEMAS}
+
+
+# =============================================================================
+# DDL
+# =============================================================================
+
+def _definicao(esquema: Esquema, valores: range) -> str:
+    partes = [f"PARTITION {esquema.nome(v)} VALUES LESS THAN ({v + 1})" for v in valores]
+    partes.append(f"PARTITION {esquema.nome_max} VALUES LESS THAN MAXVALUE")
+    return ",\n  ".join(partes)
+
+
+def sql_remover_constraints(esquemas) -> list[str]:
+    """
+    Antes de particionar: remove os FKs de/para as tabelas e troca os UNIQUE sem a
+    coluna de partição por índice simples (mesmo nome: as consultas seguem usando).
+    """
+    comandos: list[str] = []
+    for esquema in esquemas:
+        for tabela, constraint in _fks(esquema):
+            tabela, constraint = connection.ops.quote_name(tabela), connection.ops.quote_name(constraint)
+            sql = f"ALTER TABLE {tabela} DROP FOREIGN KEY {constraint}"
+            if sql not in comandos:  # FK entre as duas tabelas aparece nas duas
+                comandos.append(sql)
+        tabela = connection.ops.quote_name(esquema.tabela)
+        for nome, colunas in _unicos_sem_particao(esquema):
+            indice = connection.ops.quote_name(nome)
+            lista = ", ".join(connection.ops.quote_name(c) for c in colunas)
+            comandos.append(f"ALTER TABLE {tabela} DROP INDEX {indice}, ADD INDEX {indice} ({lista})")
+    return comandos
+
+
+def sql_particionar(esquema: Esquema, anos_futuros: int) -> list[str]:
+    """ALTER TABLE inicial: PK com a coluna de partição + uma partição por ano com dados."""
+    if particoes(esquema):
+        return []
+
+    corrente = _ano_corrente(esquema)
+    minimo, maximo = _faixa_dos_dados(esquema)
+    inicio = corrente if minimo is None else min(minimo, corrente)
+    fim = max(maximo if maximo is not None else corrente, corrente + anos_futuros)
+
+    tabela = connection.ops.quote_name(esquema.tabela)
+    return [
+        f"ALTER TABLE {tabela}\n"
+        f"  DROP PRIMARY KEY, ADD PRIMARY KEY (id, {esquema.coluna_pk})\n"
+        f"  PARTITION BY RANGE ({esquema.expressao}) (\n  {_definicao(esquema, range(inicio, fim + 1))}\n)"
+    ]
+
+
+def sql_criar_futuras(esquema: Esquema, anos_futuros: int) -> list[str]:
+    """Parte a MAXVALUE até existir partição para o ano corrente + anos_futuros."""
+    atuais = particoes(esquema)
+    if not atuais:
+        return []
+    limites = [p["limite"] for p in atuais if p["limite"] is not None]
+    proximo = max(limites) if limites else _ano_corrente(esquema)
+    alvo = _ano_corrente(esquema) + anos_futuros
+    if proximo > alvo:
+        return []
+
+    tabela = connection.ops.quote_name(esquema.tabela)
+    return [
+        f"ALTER TABLE {tabela}\n"
+        f"  REORGANIZE PARTITION {esquema.nome_max} INTO (\n  {_definicao(esquema, range(proximo, alvo + 1))}\n)"
+    ]
+
+
+def executar(comandos: list[str]) -> None:
+    with connection.cursor() as cur:
+        for sql in comandos:
+            cur.execute(sql)
+
+
+def planejar(*, particionar: bool, anos_futuros: int) -> list[str]:
+    """SQL a executar (vazio se nada a fazer). Tabela ainda não particionada só muda com particionar=True."""
+    _exigir_mysql()
+    novas = [esquema for esquema in ESQUEMAS if particionar and not particoes(esquema)]
+    comandos = sql_remover_constraints(novas)
+    for esquema in ESQUEMAS:
+        if esquema in novas:
+            comandos += sql_particionar(esquema, anos_futuros)
+        else:
+            comandos += sql_criar_futuras(esquema, anos_futuros)
+    return comandos
@@ -0,0 +1,239 @@
+"""
+Tempo de permanência por setor (SLA) a partir do histórico de movimentações.
+
+Cada movimentação leva o processo para departamento_destino (ARQUIVADO: para
+lugar nenhum). Em SQL, com funções de janela particionadas por processo e em
+ordem de registrado_em:
+
+1. LAG(destino) marca onde o setor muda: começo de uma permanência (a abertura,
+   um ENCAMINHADO, um DEVOLVIDO/retorno externo, o ARQUIVADO). RECEBIDO no próprio
+   setor não muda nada, só registra o recebimento;
+2. a soma acumulada dessas marcas numera as permanências;
+3. LEAD(entrada) dá a saída: a chegada seguinte (ou o arquivamento).
+
+RECEBIDO_EXTERNO é só registro histórico e fica de fora.
+
+Incremental: cada rodada recalcula só os processos com movimentação registrada
+desde a anterior (apaga e regrava as permanências deles, em lotes). A janela é
+por registrado_em e termina ATRASO_COMMIT segundos atrás, não no maior id: o id
+sai na ordem do INSERT e uma movimentação de id menor pode ficar visível (commit)
+depois de outra de id maior. Antes do corte, tudo já está commitado.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from protocolos.models import (
+    Departamento,
+    MarcaProcessamento,
+    MovimentacaoProcesso,
+    PermanenciaSetor,
+    Processo,
+    TipoProcesso,
+)
+
+MARCA = "permanencia_setor"
+LOTE = 1000
+ATRASO_COMMIT = settings.ANALISE_ATRASO_COMMIT
+
+_SQL_PERMANENCIAS = """
+WITH movs AS (
+    SELECT processo_id, id, acao, registrado_em,
+           departamento_destino_id AS setor_id,
+           LAG(departamento_destino_id) OVER (PARTITION BY processo_id ORDER BY registrado_em, id) AS setor_anterior,
+           ROW_NUMBER() OVER (PARTITION BY processo_id ORDER BY registrado_em, id) AS ordem
+      FROM {movimentacoes}
+     WHERE processo_id IN ({ids}) AND acao <> %s
+),
+trechos AS (
+    SELECT processo_id, id, acao, registrado_em, setor_id,
+           SUM(CASE WHEN ordem = 1 OR setor_id IS NULL OR setor_anterior IS NULL OR setor_id <> setor_anterior
+                    THEN 1 ELSE 0 END)
+               OVER (PARTITION BY processo_id ORDER BY registrado_em, id ROWS UNBOUNDED PRECEDING) AS trecho
+      FROM movs
+),
+permanencias AS (
+    SELECT processo_id, trecho, MAX(setor_id) AS setor_id, MIN(registrado_em) AS entrada,
+           MIN(CASE WHEN acao = %s THEN registrado_em END) AS recebido_em
+      FROM trechos
+     GROUP BY processo_id, trecho
+)
+SELECT processo_id, setor_id, entrada, recebido_em,
+       LEAD(entrada) OVER (PARTITION BY processo_id ORDER BY trecho) AS saida
+  FROM permanencias
+ ORDER BY processo_id, trecho
+"""
+
+
+def _instante(valor) -> datetime | None:
+    """DATETIME cru do cursor (naive em UTC no MySQL, texto no SQLite) -> datetime aware."""
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        valor = parse_datetime(valor)
+    return valor.replace(tzinfo=dt_timezone.utc) if timezone.is_naive(valor) else valor
+
+
+def _ms(inicio: datetime | None, fim: datetime | None) -> int | None:
+    if inicio is None or fim is None:
+        return None
+    return int((fim - inicio).total_seconds() * 1000)
+
+
+# =============================================================================
+# Cálculo
+# =============================================================================
+
+def calcular(processo_ids: list[int]) -> list[PermanenciaSetor]:
+    """Permanências (não gravadas) dos processos, direto das movimentações."""
+    if not processo_ids:
+        return []
+    sql = _SQL_PERMANENCIAS.format(
+        movimentacoes=connection.ops.quote_name(MovimentacaoProcesso._meta.db_table),
+        ids=", ".join(["%s"] * len(processo_ids)),
+    )
+    with connection.cursor() as cur:
+        cur.execute(sql, [*processo_ids, MovimentacaoProcesso.Acao.RECEBIDO_EXTERNO, MovimentacaoProcesso.Acao.RECEBIDO])
+        rows = cur.fetchall()
+
+    tipos = dict(Processo.objects.filter(pk__in=processo_ids).values_list("pk", "tipo_processo_id"))
+    permanencias = []
+    for processo_id, setor_id, entrada, recebido_em, saida in rows:
+        if setor_id is None or processo_id not in tipos:  # arquivamento não é permanência
+            continue
+        entrada, recebido_em, saida = _instante(entrada), _instante(recebido_em), _instante(saida)
+        permanencias.append(PermanenciaSetor(
+            processo_id=processo_id,
+            setor_id=setor_id,
+            tipo_processo_id=tipos[processo_id],
+            entrada=entrada,
+            recebido_em=recebido_em,
+            saida=saida,
+            duracao_ms=_ms(entrada, saida),
+            espera_recebimento_ms=_ms(entrada, recebido_em),
+            mes=timezone.localtime(entrada).date().replace(day=1),
+        ))
+    return permanencias
+
+
+def regravar(processo_ids: list[int]) -> int:
+    """Substitui as permanências dos processos pelas recalculadas. Devolve quantas gravou."""
+    with transaction.atomic():
+        # serializa com outra rodada simultânea (comando x job)
+        MarcaProcessamento.objects.select_for_update().get_or_create(nome=MARCA)
+        permanencias = calcular(processo_ids)
+        PermanenciaSetor.objects.filter(processo_id__in=processo_ids).delete()
+        PermanenciaSetor.objects.bulk_create(permanencias, batch_size=LOTE)
+    return len(permanencias)
+
+
+def atualizar(*, reprocessar: bool = False, lote: int = LOTE) -> dict:
+    """
+    Processa as movimentações registradas desde a última rodada (reprocessar=True:
+    todas) até ATRASO_COMMIT segundos atrás. A marca só avança no fim: se falhar no
+    meio, a próxima rodada refaz os mesmos processos.
+    """
+    marca, _ = MarcaProcessamento.objects.get_or_create(nome=MARCA)
+    desde = None if reprocessar else marca.ultimo_em
+    ate = timezone.now() - timedelta(seconds=ATRASO_COMMIT)
+    if desde is not None and ate <= desde:
+        return {"processos": 0, "permanencias": 0, "ate": desde}
+
+    movs = MovimentacaoProcesso.objects.filter(registrado_em__lt=ate)
+    if desde is not None:
+        movs = movs.filter(registrado_em__gte=desde)
+    processo_ids = sorted(movs.order_by().values_list("processo_id", flat=True).distinct())
+    gravadas = 0
+    for i in range(0, len(processo_ids), lote):
+        gravadas += regravar(processo_ids[i: i + lote])
+
+    MarcaProcessamento.objects.filter(Q(ultimo_em__isnull=True) | Q(ultimo_em__lt=ate), nome=MARCA).update(ultimo_em=ate)
+    return {"processos": len(processo_ids), "permanencias": gravadas, "ate": ate}
+
+
+# =============================================================================
+# Relatório: mediana e p90 (ms) por setor / tipo / mês
+# =============================================================================
+
+DIMENSOES = {"setor": "setor_id", "tipo": "tipo_processo_id", "mes": "mes"}
+
+_SQL_PERCENTIS = """
+WITH ordenadas AS (
+    SELECT {colunas}, duracao_ms,
+           ROW_NUMBER() OVER (PARTITION BY {colunas} ORDER BY duracao_ms) AS rn,
+           COUNT(*) OVER (PARTITION BY {colunas}) AS n
+      FROM {tabela}
+     WHERE duracao_ms IS NOT NULL{filtros}
+)
+SELECT {colunas}, MAX(n), AVG(duracao_ms),
+       MAX(CASE WHEN rn * 100 >= n * 50 AND (rn - 1) * 100 < n * 50 THEN duracao_ms END),
+       MAX(CASE WHEN rn * 100 >= n * 90 AND (rn - 1) * 100 < n * 90 THEN duracao_ms END),
+       MAX(duracao_ms)
+  FROM ordenadas
+ GROUP BY {colunas}
+ ORDER BY {colunas}
+"""
+
+
+def relatorio(*, por=("setor",), desde: date | None = None, ate: date | None = None,
+              setor_id: int | None = None, tipo_processo_id: int | None = None) -> list[dict]:
+    """
+    Permanências encerradas agrupadas por `por` (subconjunto de DIMENSOES), com
+    quantidade, média, mediana (p50), p90 e máximo em ms. Percentil pelo posto mais
+    próximo (ROW_NUMBER), calculado no banco: o MySQL não tem PERCENTILE_CONT.
+    `desde`/`ate` filtram pelo mês de entrada.
+    """
+    invalidas = [d for d in por if d not in DIMENSOES]
+    if not por or invalidas:
+        raise ValueError(f"Agrupamento inválido: {', '.join(invalidas) or 'vazio'} (use {', '.join(DIMENSOES)}).")
+
+    colunas = ", ".join(DIMENSOES[d] for d in por)
+    filtros, params = [], []
+    for coluna, operador, valor in (
+        ("mes", ">=", desde.replace(day=1) if desde else None),
+        ("mes", "<=", ate),
+        ("setor_id", "=", setor_id),
+        ("tipo_processo_id", "=", tipo_processo_id),
+    ):
+        if valor is not None:
+            filtros.append(f" AND {coluna} {operador} %s")
+            params.append(valor)
+
+    sql = _SQL_PERCENTIS.format(
+        colunas=colunas,
+        tabela=connection.ops.quote_name(PermanenciaSetor._meta.db_table),
+        filtros="".join(filtros),
+    )
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+
+    setores = dict(Departamento.objects.values_list("pk", "nome")) if "setor" in por else {}
+    tipos = dict(TipoProcesso.objects.values_list("pk", "nome")) if "tipo" in por else {}
+
+    resultado = []
+    for row in rows:
+        chaves, (quantidade, media, p50, p90, maximo) = row[: len(por)], row[len(por):]
+        linha = {}
+        for dimensao, valor in zip(por, chaves):
+            if dimensao == "setor":
+                linha.update(setor_id=valor, setor=setores.get(valor, str(valor)))
+            elif dimensao == "tipo":
+                linha.update(tipo_processo_id=valor, tipo_processo=tipos.get(valor, str(valor)))
+            else:
+                linha["mes"] = parse_date(valor) if isinstance(valor, str) else valor
+        linha.update(
+            quantidade=quantidade,
+            media_ms=int(media),
+            mediana_ms=int(p50),
+            p90_ms=int(p90),
+            maximo_ms=int(maximo),
+        )
+        resultado.append(linha)
+    return resultado
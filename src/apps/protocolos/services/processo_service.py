@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from protocolos.models import (
+    Comprovante,
+    Departamento,
+    MovimentacaoProcesso,
+    Pessoa,
+    Processo,
+    ProcessoInteressado,
+    SequenciaProcesso,
+)
+from protocolos.services.numeracao_service import descartar_bloco, proximo_numero
+
+# Colisão de número automático: a sequência é sincronizada e o número, reservado de novo.
+# Mais de uma colisão seguida só com números manuais sendo digitados ao mesmo tempo.
+TENTATIVAS_NUMERO_AUTOMATICO = 3
+
+
+def get_protocolo_geral() -> Departamento | None:
+    return Departamento.objects.filter(
+        eh_protocolo_geral=True,
+        tipo=Departamento.Tipo.INTERNO,
+        ativo=True,
+    ).first()
+
+
+def _inserir_abertura(
+    processo: Processo,
+    *,
+    interessados: list[Pessoa],
+    usuario,
+    protocolo_geral: Departamento,
+) -> None:
+    agora = timezone.now()
+
+    # ✅ projeção gravada já no INSERT (nada de save() extra depois da movimentação)
+    processo.recebido_em = agora
+    processo.recebido_por = usuario
+    processo.responsavel_setor = None
+    processo.interessados_resumo = Processo.resumo_de_interessados(interessados)
+    processo.save(force_insert=True)
+
+    if interessados:
+        ProcessoInteressado.objects.bulk_create(
+            [ProcessoInteressado(processo=processo, pessoa=p) for p in interessados]
+        )
+
+    mov = MovimentacaoProcesso.objects.create(
+        processo=processo,
+        tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.INTERNA,
+        acao=MovimentacaoProcesso.Acao.RECEBIDO,
+        departamento_origem=protocolo_geral,
+        departamento_destino=protocolo_geral,
+        observacao="Processo criado no PROTOCOLO GERAL.",
+        registrado_por=usuario,
+        registrado_em=agora,
+    )
+
+    Comprovante.objects.create(
+        processo=processo,
+        movimentacao=mov,
+        tipo=Comprovante.Tipo.ABERTURA,
+        emitido_por=usuario,
+    )
+
+
+def abrir_processo(
+    processo: Processo,
+    *,
+    interessados: list[Pessoa],
+    usuario,
+    protocolo_geral: Departamento | None = None,
+) -> Processo:
+    """
+    Abre um processo no PROTOCOLO GERAL (view, admin e API chamam daqui).
+
+    `processo` chega sem pk, com os campos de cadastro preenchidos. Se `numero_manual`
+    vier vazio, usa a numeração automática do ano (SequenciaProcesso).
+    Grava: processo (já recebido no PG), vínculos de interessados (um INSERT),
+    movimentação de abertura e Comprovante ABERTURA, numa única transação.
+
+    Número manual à frente da sequência a avança; número automático que colide com um
+    manual sincroniza a sequência e tenta de novo. O avanço roda depois do commit: no
+    admin (changeform_view dentro de transaction.atomic) o UPDATE na linha do ano não
+    segura o lock até o fim da requisição. A reserva automática não tem como esperar o
+    commit: não chame com número automático dentro de uma transação.
+    Levanta ValueError se o número já existir ou a numeração automática esgotar; outros
+    IntegrityError (NOT NULL, FK) sobem como estão.
+    """
+    protocolo_geral = protocolo_geral or get_protocolo_geral()
+    if not protocolo_geral:
+        raise ValueError('Departamento marcado como "PROTOCOLO GERAL" não encontrado (INTERNO/ativo).')
+
+    # vínculo único por (processo, pessoa)
+    interessados = list({p.pk: p for p in interessados}.values())
+    processo.criado_por = processo.criado_por if processo.criado_por_id else usuario
+
+    automatico = processo.numero_manual is None
+    tentativas = TENTATIVAS_NUMERO_AUTOMATICO if automatico else 1
+    if not automatico and Processo.numero_no_arquivo_frio(processo.numero_manual, processo.ano):
+        numero = Processo.format_numero(processo.numero_manual, processo.ano)
+        raise ValueError(f"Já existe um processo com o número {numero} (arquivo frio).")
+
+    for _ in range(tentativas):
+        if automatico:
+            # ✅ reserva fora da transação de criação (lock curto na linha do ano)
+            processo.numero_manual, processo.ano = proximo_numero()
+        processo.numero_formatado = Processo.format_numero(processo.numero_manual, processo.ano)
+
+        try:
+            with transaction.atomic():
+                _inserir_abertura(
+                    processo,
+                    interessados=interessados,
+                    usuario=usuario,
+                    protocolo_geral=protocolo_geral,
+                )
+        except IntegrityError as e:
+            # ✅ o índice único decide a duplicidade (sem SELECT prévio); outro erro sobe como está
+            if not Processo.numero_duplicado(e):
+                raise
+            processo.pk = None
+            processo._state.adding = True
+            if automatico:
+                # número manual digitado à frente da sequência: pula para depois do maior usado
+                SequenciaProcesso.sincronizar(processo.ano)
+                descartar_bloco(processo.ano)
+            continue
+
+        if not automatico:
+            # ✅ fora de transação roda na hora; dentro (admin), depois do commit dela
+            transaction.on_commit(partial(SequenciaProcesso.avancar_ate, processo.ano, processo.numero_manual))
+        return processo
+
+    raise ValueError(f"Já existe um processo com o número {processo.numero_formatado}.")
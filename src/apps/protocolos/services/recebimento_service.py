@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from protocolos.forms import _normalize_numero_processo
+from protocolos.models import Departamento, MovimentacaoProcesso, Processo
+from protocolos.services.consulta_service import qs_estado_atual
+
+
+class Resultado:
+    RECEBIDO = "recebido"
+    JA_RECEBIDO = "ja_recebido"
+    INVALIDO = "invalido"
+    NAO_ENCONTRADO = "nao_encontrado"
+    ARQUIVADO = "arquivado"
+    SEM_SETOR = "sem_setor"
+    EXTERNO = "externo"
+    OUTRO_SETOR = "outro_setor"
+    SEM_PERMISSAO = "sem_permissao"
+
+
+def _resposta(status: str, mensagem: str, numero: str | None = None, **extra) -> dict:
+    return {"ok": status == Resultado.RECEBIDO, "status": status, "numero": numero, "mensagem": mensagem, **extra}
+
+
+def receber_por_numero(entrada: str, usuario, *, eh_admin: bool = False, setor_id: int | None = None) -> dict:
+    """
+    Recebimento pelo número (modo leitura: leitor de código de barras na mesa do setor).
+
+    Quantidade fixa de consultas, qualquer que seja o processo:
+    1) SELECT do processo pelo índice único, com setor atual e vínculo do usuário anotados;
+    2) UPDATE condicional (compare-and-set de recebido_em);
+    3) INSERT da movimentação RECEBIDO.
+    `setor_id` (opcional) restringe à mesa/setor escolhido na tela.
+    """
+    try:
+        numero = _normalize_numero_processo(entrada)
+    except ValidationError as e:
+        return _resposta(Resultado.INVALIDO, e.messages[0])
+
+    vinculo = Departamento.objects.filter(pk=OuterRef("setor_atual_id")).filter(
+        Q(responsavel_id=usuario.id)
+        | Q(substituto_id=usuario.id)
+        | Q(membros__user_id=usuario.id, membros__ativo=True)
+    )
+    ultima = MovimentacaoProcesso.objects.filter(processo=OuterRef("pk")).order_by("-registrado_em", "-id")
+    processo = (
+        qs_estado_atual()
+        .annotate(
+            tem_vinculo=Exists(vinculo),
+            ultima_mov_id=Subquery(ultima.values("id")[:1]),
+            ultima_mov_em=Subquery(ultima.values("registrado_em")[:1]),
+        )
+        .only("id", "numero_formatado", "assunto", "status", "recebido_em")
+        .filter(numero_formatado=numero, ano=Processo.ano_do_numero(numero))
+        .first()
+    )
+
+    if processo is None:
+        return _resposta(Resultado.NAO_ENCONTRADO, f"Processo {numero} não encontrado (ou está no arquivo).", numero)
+
+    extra = {"processo_id": processo.pk, "assunto": processo.assunto, "setor": processo.setor_atual}
+
+    if processo.status == Processo.Status.ARQUIVADO:
+        return _resposta(Resultado.ARQUIVADO, "Processo arquivado: não é possível receber.", numero, **extra)
+
+    if not processo.setor_atual_id:
+        return _resposta(Resultado.SEM_SETOR, "Processo ainda não foi encaminhado para nenhum setor.", numero, **extra)
+
+    if processo.setor_atual_tipo != Departamento.Tipo.INTERNO:
+        return _resposta(
+            Resultado.EXTERNO,
+            f"Processo está em órgão EXTERNO ({processo.setor_atual}). Registre o retorno externo.",
+            numero,
+            **extra,
+        )
+
+    if setor_id and processo.setor_atual_id != setor_id:
+        return _resposta(Resultado.OUTRO_SETOR, f"Processo está em outro setor ({processo.setor_atual}).", numero, **extra)
+
+    if not (eh_admin or processo.tem_vinculo):
+        return _resposta(Resultado.SEM_PERMISSAO, "Você não tem vínculo com o setor atual deste processo.", numero, **extra)
+
+    if processo.recebido_em is not None:
+        return _resposta(Resultado.JA_RECEBIDO, "Este processo já foi recebido neste setor.", numero, **extra)
+
+    agora = timezone.now()
+    with transaction.atomic():
+        # ✅ compare-and-set: duas leituras do mesmo código (ou dois balcões) -> só uma recebe
+        if not processo.receber_se_pendente(
+            usuario,
+            ultima_movimentacao_id=processo.ultima_mov_id,
+            ultima_registrado_em=processo.ultima_mov_em,
+            quando=agora,
+        ):
+            return _resposta(Resultado.JA_RECEBIDO, "Este processo já foi recebido por outro usuário.", numero, **extra)
+
+        MovimentacaoProcesso.objects.create(
+            processo_id=processo.pk,
+            tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.INTERNA,
+            acao=MovimentacaoProcesso.Acao.RECEBIDO,
+            departamento_origem_id=processo.setor_atual_id,
+            departamento_destino_id=processo.setor_atual_id,
+            observacao=f"Recebimento confirmado por {usuario.username} no setor {processo.setor_atual}.",
+            registrado_por=usuario,
+            registrado_em=agora,
+        )
+
+    return _resposta(Resultado.RECEBIDO, f"Processo {numero} recebido.", numero, **extra)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import zlib
+from datetime import datetime
+
+from protocolos.models import MovimentacaoProcesso, Processo, ProcessoSnapshot
+
+VERSAO_FORMATO = 1
+
+
+def _usuario(user) -> dict | None:
+    if not user:
+        return None
+    return {"id": user.pk, "username": user.username}
+
+
+def _departamento(depto) -> dict | None:
+    if not depto:
+        return None
+    return {"id": depto.pk, "nome": depto.nome, "sigla": depto.sigla, "tipo": depto.tipo}
+
+
+def _data(valor) -> str | None:
+    return valor.isoformat() if valor else None
+
+
+def montar_snapshot(processo: Processo) -> dict:
+    """
+    Monta o dossiê completo do processo com nomes já resolvidos.
+    O formato espelha os atributos usados nos templates (processo.tipo_processo.nome,
+    m.departamento_origem.nome, ...), então a mesma tela renderiza os dois casos.
+    """
+    processo = (
+        Processo.objects
+        .select_related("tipo_processo", "criado_por", "recebido_por", "arquivado_por", "responsavel_setor")
+        .get(pk=processo.pk)
+    )
+
+    movimentacoes = (
+        MovimentacaoProcesso.objects
+        .filter(processo_id=processo.pk)
+        .select_related("departamento_origem", "departamento_destino", "registrado_por")
+        .order_by("-registrado_em")
+    )
+
+    movs = [
+        {
+            "id": m.pk,
+            "tipo_tramitacao": m.tipo_tramitacao,
+            "acao": m.acao,
+            "departamento_origem": _departamento(m.departamento_origem),
+            "departamento_destino": _departamento(m.departamento_destino),
+            "observacao": m.observacao,
+            "registrado_em": _data(m.registrado_em),
+            "registrado_por": _usuario(m.registrado_por),
+        }
+        for m in movimentacoes
+    ]
+
+    # setor atual = destino da última movimentação (ou origem), como em utils.get_setor_atual_do_processo
+    setor_atual = None
+    if movs:
+        setor_atual = movs[0]["departamento_destino"] or movs[0]["departamento_origem"]
+
+    return {
+        "id": processo.pk,
+        "numero_formatado": processo.numero_formatado,
+        "ano": processo.ano,
+        "numero_manual": processo.numero_manual,
+        "tipo_processo": {"id": processo.tipo_processo_id, "nome": processo.tipo_processo.nome},
+        "assunto": processo.assunto,
+        "descricao": processo.descricao,
+        "prioridade": processo.prioridade,
+        "status": processo.status,
+        "criado_em": _data(processo.criado_em),
+        "criado_por": _usuario(processo.criado_por),
+        "recebido_em": _data(processo.recebido_em),
+        "recebido_por": _usuario(processo.recebido_por),
+        "arquivado_em": _data(processo.arquivado_em),
+        "arquivado_por": _usuario(processo.arquivado_por),
+        "interessados": [
+            {"id": p.pk, "nome": p.nome, "cpf": p.cpf, "cpf_formatado": p.cpf_formatado}
+            for p in processo.interessados.order_by("nome")
+        ],
+        "movimentacoes": movs,
+        "setor_atual": setor_atual,
+    }
+
+
+def compactar(dados: dict) -> bytes:
+    bruto = json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(bruto, 6)
+
+
+def gravar_snapshot(processo: Processo) -> ProcessoSnapshot:
+    """Gera (ou regenera) o snapshot de um processo ARQUIVADO."""
+    if processo.status != Processo.Status.ARQUIVADO:
+        raise ValueError("Snapshot só pode ser gerado para processo ARQUIVADO.")
+
+    snapshot, _ = ProcessoSnapshot.objects.update_or_create(
+        processo_id=processo.pk,
+        defaults={"dados": compactar(montar_snapshot(processo)), "versao_formato": VERSAO_FORMATO},
+    )
+    return snapshot
+
+
+def regenerar_snapshots(processo_ids) -> int:
+    """
+    Regenera os snapshots existentes dos processos depois que o dado de origem
+    mudou (edição no admin, interessado renomeado, movimentação corrigida).
+    Processo que deixou de ser ARQUIVADO perde o snapshot: a tela volta a ler as tabelas.
+    """
+    existentes = dict(
+        ProcessoSnapshot.objects
+        .filter(processo_id__in=set(processo_ids))
+        .values_list("processo_id", "processo__status")
+    )
+    for pk, status in existentes.items():
+        if status == Processo.Status.ARQUIVADO:
+            gravar_snapshot(Processo(pk=pk, status=status))
+        else:
+            ProcessoSnapshot.objects.filter(pk=pk).delete()
+    return len(existentes)
+
+
+def _restaurar_datas(valor):
+    """Converte de volta os campos *_em (ISO 8601) para datetime (filtro |date nos templates)."""
+    if isinstance(valor, dict):
+        return {
+            k: (datetime.fromisoformat(v) if k.endswith("_em") and isinstance(v, str) else _restaurar_datas(v))
+            for k, v in valor.items()
+        }
+    if isinstance(valor, list):
+        return [_restaurar_datas(v) for v in valor]
+    return valor
+
+
+def descompactar(dados: bytes) -> dict:
+    return _restaurar_datas(json.loads(zlib.decompress(bytes(dados)).decode("utf-8")))
+
+
+def carregar_snapshot(processo_id: int) -> dict | None:
+    """Lê o snapshot com uma única busca por chave primária (sem joins)."""
+    dados = (
+        ProcessoSnapshot.objects
+        .filter(pk=processo_id)
+        .values_list("dados", flat=True)
+        .first()
+    )
+    if dados is None:
+        return None
+    return descompactar(dados)
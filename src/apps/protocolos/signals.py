@@ -0,0 +1,115 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import versoes
+from .models import (
+    Departamento,
+    DepartamentoMembro,
+    MovimentacaoProcesso,
+    Pessoa,
+    Processo,
+    ProcessoInteressado,
+    TipoProcesso,
+)
+from .services import interessados_service, snapshot_service
+
+
+@receiver(post_save, sender=Departamento)
+@receiver(post_delete, sender=Departamento)
+def invalidar_catalogo_departamentos(sender, instance, **kwargs):
+    versoes.invalidar_catalogo_departamentos()
+    versoes.invalidar_caixa()  # responsável/substituto enxergam a caixa do setor
+
+
+@receiver(post_save, sender=DepartamentoMembro)
+@receiver(post_delete, sender=DepartamentoMembro)
+def invalidar_caixa_membros(sender, instance, **kwargs):
+    versoes.invalidar_caixa()
+
+
+@receiver(post_save, sender=TipoProcesso)
+@receiver(post_delete, sender=TipoProcesso)
+def invalidar_lista_processos_tipo(sender, instance, **kwargs):
+    versoes.invalidar_lista_processos()  # nome do tipo sai nas listagens da API
+
+
+@receiver(post_save, sender=Pessoa)
+@receiver(post_delete, sender=Pessoa)
+def invalidar_catalogo_pessoas(sender, instance, **kwargs):
+    versoes.invalidar_catalogo_pessoas()
+
+
+@receiver(post_save, sender=MovimentacaoProcesso)
+@receiver(post_delete, sender=MovimentacaoProcesso)
+def invalidar_estado_processo(sender, instance, **kwargs):
+    # ✅ suspensa (arquivo frio): quem suspendeu invalida o lote inteiro depois do commit
+    if interessados_service.sincronizacao_ativa():
+        versoes.invalidar_estado_processo(instance.processo_id)
+        snapshot_service.regenerar_snapshots([instance.processo_id])
+
+
+@receiver(post_save, sender=Processo)
+@receiver(post_delete, sender=Processo)
+def invalidar_versao_processo(sender, instance, **kwargs):
+    if interessados_service.sincronizacao_ativa():
+        versoes.invalidar_estado_processo(instance.pk)
+
+
+@receiver(post_save, sender=Processo)
+def regenerar_snapshot_processo(sender, instance, created, **kwargs):
+    # ✅ edição de processo arquivado (admin): o dossiê congelado acompanha
+    if not created and interessados_service.sincronizacao_ativa():
+        snapshot_service.regenerar_snapshots([instance.pk])
+
+
+# =============================================================================
+# Resumo desnormalizado dos interessados (Processo.interessados_resumo)
+# =============================================================================
+
+def _atualizar_resumo(processo_ids) -> None:
+    """Resumo + snapshot dos arquivados (os dois copiam nome/CPF dos interessados)."""
+    alterados = interessados_service.atualizar_resumo(processo_ids)
+    snapshot_service.regenerar_snapshots(alterados)
+
+
+@receiver(post_save, sender=ProcessoInteressado)
+@receiver(post_delete, sender=ProcessoInteressado)
+def sincronizar_resumo_vinculo(sender, instance, **kwargs):
+    if interessados_service.sincronizacao_ativa():
+        _atualizar_resumo([instance.processo_id])
+
+
+@receiver(m2m_changed, sender=Processo.interessados.through)
+def sincronizar_resumo_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if not interessados_service.sincronizacao_ativa():
+        return
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            _atualizar_resumo([instance.pk])
+        return
+
+    # lado da Pessoa (pessoa.processos.add/remove/clear): pk_set são processos
+    if action == "pre_clear":
+        instance._processos_resumo = interessados_service.processos_da_pessoa(instance.pk)
+    elif action in ("post_add", "post_remove"):
+        _atualizar_resumo(pk_set or [])
+    elif action == "post_clear":
+        _atualizar_resumo(getattr(instance, "_processos_resumo", []))
+
+
+@receiver(pre_save, sender=Pessoa)
+def guardar_identificacao_pessoa(sender, instance, **kwargs):
+    instance._identificacao_anterior = None
+    if instance.pk and interessados_service.sincronizacao_ativa():
+        instance._identificacao_anterior = (
+            Pessoa.objects.filter(pk=instance.pk).values_list("nome", "cpf").first()
+        )
+
+
+@receiver(post_save, sender=Pessoa)
+def propagar_identificacao_pessoa(sender, instance, created, **kwargs):
+    # ✅ só quando nome/CPF mudam: reescreve o resumo de todos os processos da pessoa (em lote)
+    anterior = getattr(instance, "_identificacao_anterior", None)
+    if created or anterior is None or anterior == (instance.nome, instance.cpf):
+        return
+    _atualizar_resumo(interessados_service.processos_da_pessoa(instance.pk))
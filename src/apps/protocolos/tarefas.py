@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from core.jobs import tarefa
+
+from .models import DocumentoGerado
+from .services import documentos_service
+from .services.notificacao_service import TAREFA_ENVIO, enviar_notificacoes_pendentes
+
+
+@tarefa(TAREFA_ENVIO)
+def enviar_notificacoes() -> dict:
+    return enviar_notificacoes_pendentes()
+
+
+@tarefa(documentos_service.TAREFA_GERAR, max_tentativas=3)
+def gerar_documento(documento_id: int) -> dict:
+    documento = DocumentoGerado.objects.filter(pk=documento_id).first()
+    if documento is None:
+        return {"ignorado": "documento removido"}
+    try:
+        documentos_service.gerar_documento(documento)
+    except Exception as e:
+        DocumentoGerado.objects.filter(pk=documento_id).update(status=DocumentoGerado.Status.FALHOU, erro=str(e))
+        raise
+    return {"quantidade": documento.quantidade}
@@ -1,3 +1,846 @@
-from django.test import TestCase
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import TokenAPI
+from core.models import Job
+
+from .models import (
+    Departamento,
+    DepartamentoMembro,
+    DocumentoGerado,
+    FluxoSetor,
+    MarcaProcessamento,
+    MovimentacaoProcesso,
+    NotificacaoEmail,
+    PermanenciaSetor,
+    Pessoa,
+    Processo,
+    ProcessoFrio,
+    SequenciaProcesso,
+    TipoProcesso,
+)
+from . import api, feed, versoes
+from .services import (
+    arquivo_frio_service,
+    caixa_service,
+    documentos_service,
+    fluxo_service,
+    notificacao_service,
+    particionamento_service,
+    permanencia_service,
+    processo_service,
+    snapshot_service,
+)
+from .services.numeracao_service import ano_corrente_2d
+
+User = get_user_model()
+
+# ✅ cache em memória: os testes não leem, gravam nem limpam o FileBasedCache de src/cache
+CACHE_DE_TESTE = override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+
+
+# =============================================================================
+# Cenário comum
+# =============================================================================
+
+@CACHE_DE_TESTE
+class Cenario(TestCase):
+    """PROTOCOLO GERAL, ARQUIVO, um setor interno com dois membros e um externo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@exemplo.gov.br", "x")
+        cls.u1 = User.objects.create_user("u1", "u1@exemplo.gov.br", "x")
+        cls.u2 = User.objects.create_user("u2", "u2@exemplo.gov.br", "x")
+
+        cls.pg = Departamento.objects.create(
+            nome="PROTOCOLO GERAL", tipo=Departamento.Tipo.INTERNO, eh_protocolo_geral=True, responsavel=cls.admin
+        )
+        cls.arq = Departamento.objects.create(
+            nome="ARQUIVO", tipo=Departamento.Tipo.INTERNO, eh_arquivo_geral=True, responsavel=cls.admin
+        )
+        cls.setor = Departamento.objects.create(nome="SETOR A", tipo=Departamento.Tipo.INTERNO, responsavel=cls.u1)
+        DepartamentoMembro.objects.create(departamento=cls.setor, user=cls.u1)
+        DepartamentoMembro.objects.create(departamento=cls.setor, user=cls.u2)
+        cls.externo = Departamento.objects.create(nome="EXTERNO X", tipo=Departamento.Tipo.EXTERNO)
+
+        cls.tipo = TipoProcesso.objects.create(nome="GERAL", descricao="Geral")
+        cls.pessoa = Pessoa.objects.create(nome="FULANO DE TAL", cpf="52998224725", telefone="81999999999")
+
+    def setUp(self):
+        cache.clear()
+
+    def novo_processo(self, numero: int = 1, ano: int = 26, **extra) -> Processo:
+        return Processo.criar_manual(
+            numero_manual=numero,
+            ano_2d=ano,
+            tipo_processo=self.tipo,
+            assunto=extra.pop("assunto", "Assunto"),
+            descricao=None,
+            criado_por=self.admin,
+            interessados=[self.pessoa],
+            **extra,
+        )
+
+
+# =============================================================================
+# user-026: origem atual em cache
+# =============================================================================
+
+class OrigemAtualTests(Cenario):
+    def test_troca_do_protocolo_geral_invalida_origem_em_cache(self):
+        processo = self.novo_processo()  # sem movimentação: sai do PROTOCOLO GERAL
+        self.assertEqual(versoes.origem_atual_id(processo.pk), self.pg.pk)
+
+        Departamento.objects.filter(pk=self.pg.pk).update(eh_protocolo_geral=False)
+        self.setor.eh_protocolo_geral = True
+        self.setor.save()
+
+        self.assertEqual(versoes.origem_atual_id(processo.pk), self.setor.pk)
+
+
+# =============================================================================
+# user-027: GET condicional da tela de consulta
+# =============================================================================
+
+class ProcessoViewEtagTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+        self.processo = self.novo_processo()
+        self.url = reverse("processo_view", args=[self.processo.pk])
+
+    def _etag(self):
+        self.client.get(self.url)  # primeira visita: ganha o cookie do CSRF
+        resposta = self.client.get(self.url)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta["ETag"]
+
+    def test_sem_mudanca_responde_304(self):
+        etag = self._etag()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_mensagem_pendente_nao_vira_304(self):
+        Processo.objects.filter(pk=self.processo.pk).update(status=Processo.Status.ARQUIVADO)
+        versoes.invalidar_estado_processo(self.processo.pk)
+        etag = self._etag()
+
+        self.client.post(reverse("processo_receber", args=[self.processo.pk]))
+        resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, "Processo arquivado: não é possível receber")
+
+    def test_renomear_interessado_muda_etag(self):
+        etag = self._etag()
+        self.pessoa.nome = "BELTRANO"
+        self.pessoa.save()
+
+        resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, "BELTRANO")
+
+
+# =============================================================================
+# user-028: snapshot de processo arquivado acompanha a origem
+# =============================================================================
+
+class SnapshotTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.processo = self.novo_processo()
+        self.processo.status = Processo.Status.ARQUIVADO
+        self.processo.save()
+        snapshot_service.gravar_snapshot(self.processo)
+
+    def test_renomear_pessoa_regenera_snapshot(self):
+        self.pessoa.nome = "BELTRANO"
+        self.pessoa.save()
+        dados = snapshot_service.carregar_snapshot(self.processo.pk)
+        self.assertEqual([i["nome"] for i in dados["interessados"]], ["BELTRANO"])
+
+    def test_edicao_do_processo_regenera_snapshot(self):
+        self.processo.assunto = "Assunto corrigido"
+        self.processo.save()
+        self.assertEqual(snapshot_service.carregar_snapshot(self.processo.pk)["assunto"], "Assunto corrigido")
+
+    def test_processo_reativado_perde_snapshot(self):
+        self.processo.status = Processo.Status.ATIVO
+        self.processo.save()
+        self.assertIsNone(snapshot_service.carregar_snapshot(self.processo.pk))
+
+
+# =============================================================================
+# user-029: número de processo no arquivo frio
+# =============================================================================
+
+class ArquivoFrioLoteTests(Cenario):
+    def _mover(self, movimentacoes: int) -> int:
+        """Consultas para mover dois processos com `movimentacoes` movimentações cada."""
+        ids = []
+        for _ in range(2):
+            processo = self.novo_processo(numero=len(ids) + 1 + 10 * movimentacoes, ano=19)
+            for _ in range(movimentacoes):
+                encaminhar(processo, self.pg, self.setor, self.admin)
+            ids.append(processo.pk)
+        Processo.objects.filter(pk__in=ids).update(status=Processo.Status.ARQUIVADO)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(arquivo_frio_service._mover_lote_para_frio(ids), 2)
+        return len(consultas)
+
+    def test_consultas_nao_crescem_com_as_movimentacoes(self):
+        self.assertEqual(self._mover(movimentacoes=10), self._mover(movimentacoes=1))
+
+    def test_versao_invalidada_depois_do_commit(self):
+        processo = self.novo_processo(numero=7, ano=19)
+        encaminhar(processo, self.pg, self.setor, self.admin)
+        Processo.objects.filter(pk=processo.pk).update(status=Processo.Status.ARQUIVADO)
+        versoes.invalidar_estado_processo(processo.pk)
+        quente = versoes.versao_processo(processo.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            arquivo_frio_service._mover_lote_para_frio([processo.pk])
+        self.assertNotEqual(versoes.versao_processo(processo.pk), quente)
+        self.assertTrue(versoes.versao_processo(processo.pk).startswith("frio-"))
+
+
+class ArquivoFrioNumeroTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.antigo = self.novo_processo(numero=5, ano=19)
+        Processo.objects.filter(pk=self.antigo.pk).update(status=Processo.Status.ARQUIVADO)
+        self.assertEqual(arquivo_frio_service.mover_para_arquivo_frio(ano_corte=2020), 1)
+
+    def test_numero_manual_do_arquivo_frio_nao_pode_ser_reusado(self):
+        with self.assertRaisesMessage(ValueError, "0005/19 (arquivo frio)"):
+            self.novo_processo(numero=5, ano=19)
+
+    def _abrir_pela_tela(self, numero: str):
+        self.client.force_login(self.admin)
+        dados = {
+            "numero_processo": numero, "cpf": self.pessoa.cpf, "tipo_processo": self.tipo.pk,
+            "assunto": "Pela tela", "prioridade": Processo.Prioridade.NORMAL,
+        }
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.post(reverse("processo_create"), dados)
+        frio = [q for q in consultas if ProcessoFrio._meta.db_table in q["sql"]]
+        return resposta, len(frio)
+
+    def test_tela_de_abertura_consulta_o_arquivo_frio_uma_vez(self):
+        resposta, consultas = self._abrir_pela_tela("0006/19")
+        self.assertEqual(resposta.status_code, 302)
+        self.assertEqual(consultas, 1)
+
+    def test_tela_de_abertura_mostra_o_numero_do_arquivo_frio_no_campo(self):
+        resposta, _ = self._abrir_pela_tela("0005/19")
+        self.assertEqual(resposta.status_code, 200)
+        self.assertFormError(resposta.context["form"], "numero_processo", "Já existe um processo com o número 0005/19 (arquivo frio).")
+        self.assertEqual(Processo.objects.filter(numero_formatado="0005/19").count(), 0)
+
+    def test_restaurar_com_numero_em_uso_mostra_erro(self):
+        # número reaproveitado por fora da checagem (ex.: dados antigos)
+        Processo.objects.create(
+            ano=19, numero_manual=5, numero_formatado="0005/19", tipo_processo=self.tipo,
+            assunto="Reuso", criado_por=self.admin,
+        )
+        self.client.force_login(self.admin)
+        resposta = self.client.post(
+            reverse("processo_restaurar_arquivo_frio", args=[self.antigo.pk]), follow=True
+        )
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, "Número já em uso nas tabelas quentes: 0005/19")
+        self.assertTrue(ProcessoFrio.objects.filter(pk=self.antigo.pk).exists())
+
+
+# =============================================================================
+# user-030: recebimento concorrente (compare-and-set)
+# =============================================================================
+
+def encaminhar(processo, origem, destino, usuario) -> MovimentacaoProcesso:
+    """Mesmo efeito do encaminhamento da tela: nova chegada e recebido_* zerados."""
+    mov = MovimentacaoProcesso.objects.create(
+        processo=processo,
+        tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.INTERNA,
+        acao=MovimentacaoProcesso.Acao.ENCAMINHADO,
+        departamento_origem=origem,
+        departamento_destino=destino,
+        registrado_por=usuario,
+    )
+    Processo.objects.filter(pk=processo.pk).update(recebido_em=None, recebido_por=None)
+    processo.refresh_from_db()
+    return mov
+
+
+class ReceberTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.processo = self.novo_processo()
+        self.outro = Departamento.objects.create(nome="SETOR B", tipo=Departamento.Tipo.INTERNO, responsavel=self.admin)
+
+    def test_clique_velho_nao_recebe_em_setor_que_ja_nao_tem_o_processo(self):
+        vista = encaminhar(self.processo, self.pg, self.setor, self.admin)
+
+        # B recebe em X e encaminha para Y: recebido_em volta a nulo
+        self.assertTrue(self.processo.receber_se_pendente(
+            self.u2, ultima_movimentacao_id=vista.pk, ultima_registrado_em=vista.registrado_em
+        ))
+        encaminhar(self.processo, self.setor, self.outro, self.u2)
+
+        # o clique atrasado de X (viu a chegada em X) não passa
+        self.assertFalse(self.processo.receber_se_pendente(
+            self.u1, ultima_movimentacao_id=vista.pk, ultima_registrado_em=vista.registrado_em
+        ))
+        self.processo.refresh_from_db()
+        self.assertIsNone(self.processo.recebido_em)
+
+    def test_formulario_de_outro_setor_nao_recebe(self):
+        encaminhar(self.processo, self.pg, self.outro, self.admin)
+        self.client.force_login(self.admin)
+        self.client.post(reverse("processo_receber", args=[self.processo.pk]), {"setor": self.setor.pk})
+
+        self.processo.refresh_from_db()
+        self.assertIsNone(self.processo.recebido_em)
+        self.assertFalse(self.processo.movimentacoes.filter(acao=MovimentacaoProcesso.Acao.RECEBIDO, departamento_destino=self.outro).exists())
+
+
+@CACHE_DE_TESTE
+class ReceberConcorrenteTests(TransactionTestCase):
+    """50 clientes recebendo o mesmo processo ao mesmo tempo: exatamente um recebimento."""
+
+    CLIENTES = 50
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("SQLite em memória não aceita escritas concorrentes (use MySQL ou SQLite em arquivo).")
+        cache.clear()
+        Cenario.setUpTestData.__func__(self)
+        self.processo = Cenario.novo_processo(self)
+        encaminhar(self.processo, self.pg, self.setor, self.admin)
+
+    def test_cinquenta_clientes_um_recebimento(self):
+        url = reverse("processo_receber", args=[self.processo.pk])
+        largada = threading.Barrier(self.CLIENTES)
+        status, erros = [], []
+
+        def receber():
+            try:
+                cliente = Client()
+                cliente.force_login(self.u1)
+                largada.wait(timeout=30)
+                status.append(cliente.post(url, {"setor": self.setor.pk}).status_code)
+            except Exception as e:  # noqa: BLE001 - o teste conta qualquer falha
+                largada.abort()
+                erros.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=receber) for _ in range(self.CLIENTES)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(erros, [])
+        self.assertEqual(status, [302] * self.CLIENTES)
+        recebidos = MovimentacaoProcesso.objects.filter(
+            processo=self.processo, acao=MovimentacaoProcesso.Acao.RECEBIDO, departamento_destino=self.setor
+        )
+        self.assertEqual(recebidos.count(), 1)
+
+
+# =============================================================================
+# user-031: numeração automática x números manuais
+# =============================================================================
+
+def abrir_automatico(caso) -> Processo:
+    processo = Processo(ano=ano_corrente_2d(), tipo_processo=caso.tipo, assunto="Assunto", criado_por=caso.admin)
+    return processo_service.abrir_processo(processo, interessados=[caso.pessoa], usuario=caso.admin)
+
+
+class NumeracaoTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.ano = ano_corrente_2d()
+
+    def test_numero_manual_a_frente_avanca_a_sequencia(self):
+        self.assertEqual(abrir_automatico(self).numero_manual, 1)
+        self.novo_processo(numero=50, ano=self.ano)
+        self.assertEqual(SequenciaProcesso.objects.get(ano=self.ano).ultimo_numero, 50)
+        self.assertEqual(abrir_automatico(self).numero_manual, 51)
+
+    def test_colisao_com_numero_gravado_por_fora_sincroniza_a_sequencia(self):
+        abrir_automatico(self)
+        for numero in (2, 3, 4, 5):  # carga direta, sem passar pela sequência
+            Processo.objects.create(
+                ano=self.ano, numero_manual=numero, numero_formatado=Processo.format_numero(numero, self.ano),
+                tipo_processo=self.tipo, assunto="Carga", criado_por=self.admin,
+            )
+        self.assertEqual(abrir_automatico(self).numero_manual, 6)
+
+    def test_erro_que_nao_e_duplicidade_nao_vira_numero_duplicado(self):
+        processo = Processo(ano=self.ano, numero_manual=7, tipo_processo=self.tipo, assunto=None, criado_por=self.admin)
+        with self.assertRaises(IntegrityError):
+            processo_service.abrir_processo(processo, interessados=[self.pessoa], usuario=self.admin)
+
+
+@CACHE_DE_TESTE
+class NumeracaoConcorrenteTests(TransactionTestCase):
+    """20 aberturas automáticas simultâneas: 20 números distintos, nenhuma falha."""
+
+    CLIENTES = 20
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("SQLite em memória não aceita escritas concorrentes (use MySQL ou SQLite em arquivo).")
+        cache.clear()
+        Cenario.setUpTestData.__func__(self)
+
+    def test_vinte_aberturas_simultaneas(self):
+        largada = threading.Barrier(self.CLIENTES)
+        numeros, erros = [], []
+
+        def abrir():
+            try:
+                largada.wait(timeout=30)
+                numeros.append(abrir_automatico(self).numero_manual)
+            except Exception as e:  # noqa: BLE001 - o teste conta qualquer falha
+                largada.abort()
+                erros.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=abrir) for _ in range(self.CLIENTES)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(erros, [])
+        self.assertEqual(sorted(numeros), list(range(1, self.CLIENTES + 1)))
+
+
+# =============================================================================
+# user-032: abertura pelo admin
+# =============================================================================
+
+class ProcessoAdminTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:protocolos_processo_add")
+
+    def _dados(self, **extra):
+        return {
+            "ano": 26, "numero_manual": 9, "tipo_processo": self.tipo.pk, "assunto": "Pelo admin",
+            "prioridade": Processo.Prioridade.NORMAL, "status": Processo.Status.ATIVO,
+            "criado_por": self.admin.pk, **extra,
+        }
+
+    def test_sem_protocolo_geral_mostra_erro_no_formulario(self):
+        Departamento.objects.filter(pk=self.pg.pk).update(eh_protocolo_geral=False)
+        resposta = self.client.post(self.url, self._dados())
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, "PROTOCOLO GERAL")
+        self.assertFalse(Processo.objects.exists())
+
+    def test_campos_gravados_pela_abertura_sao_somente_leitura(self):
+        formulario = self.client.get(self.url)
+        for campo in ("numero_formatado", "recebido_em_0", "recebido_por"):
+            self.assertNotContains(formulario, f'name="{campo}"')
+
+    def test_campos_gravados_pela_abertura_nao_sao_sobrescritos(self):
+        resposta = self.client.post(self.url, self._dados(
+            numero_formatado="9999/99", recebido_em_0="01/01/2020", recebido_em_1="10:00:00", recebido_por=self.u2.pk,
+        ))
+        self.assertEqual(resposta.status_code, 302)
+        processo = Processo.objects.get()
+        self.assertEqual(processo.numero_formatado, "0009/26")
+        self.assertEqual(processo.recebido_por, self.admin)
+        self.assertEqual(processo.recebido_em.year, processo.criado_em.year)
+        self.assertTrue(processo.movimentacoes.filter(departamento_destino=self.pg).exists())
+
+
+    def test_avanco_da_sequencia_fica_para_depois_da_transacao_do_admin(self):
+        SequenciaProcesso.objects.create(ano=26, ultimo_numero=3)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(self.client.post(self.url, self._dados(numero_manual=50)).status_code, 302)
+            # dentro da transação do admin a linha do ano não é tocada (nem travada)
+            self.assertEqual(SequenciaProcesso.objects.get(ano=26).ultimo_numero, 3)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(SequenciaProcesso.objects.get(ano=26).ultimo_numero, 50)
+
+
+# =============================================================================
+# user-034: outbox de e-mail
+# =============================================================================
+
+class NotificacaoTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.processo = self.novo_processo()
+
+    def test_responsavel_e_substituto_recebem_aviso(self):
+        u3 = User.objects.create_user("u3", "u3@exemplo.gov.br", "x")
+        destino = Departamento.objects.create(
+            nome="SETOR C", tipo=Departamento.Tipo.INTERNO, responsavel=self.admin, substituto=self.u2
+        )
+        DepartamentoMembro.objects.create(departamento=destino, user=self.u1)
+        DepartamentoMembro.objects.create(departamento=destino, user=self.u2)
+
+        mov = encaminhar(self.processo, self.pg, destino, u3)
+        self.assertEqual(notificacao_service.registrar_notificacoes_chegada(self.processo, mov), 3)
+        self.assertEqual(
+            sorted(NotificacaoEmail.objects.values_list("destinatario", flat=True)),
+            ["admin@exemplo.gov.br", "u1@exemplo.gov.br", "u2@exemplo.gov.br"],
+        )
+
+    def test_smtp_fora_do_ar_conta_tentativa_e_reagenda(self):
+        mov = encaminhar(self.processo, self.pg, self.setor, self.admin)
+        notificacao_service.registrar_notificacoes_chegada(self.processo, mov)
+        NotificacaoEmail.objects.update(proxima_tentativa=mov.registrado_em)
+
+        conexao = mock.Mock()
+        conexao.open.side_effect = ConnectionRefusedError("SMTP fora do ar")
+        with mock.patch.object(notificacao_service, "get_connection", return_value=conexao):
+            resultado = notificacao_service.enviar_notificacoes_pendentes()
+
+        self.assertEqual(resultado, {"enviados": 0, "falhas": 2})
+        for aviso in NotificacaoEmail.objects.all():
+            self.assertEqual(aviso.status, NotificacaoEmail.Status.PENDENTE)
+            self.assertEqual(aviso.tentativas, 1)
+            self.assertIn("SMTP fora do ar", aviso.erro)
+            self.assertGreater(aviso.proxima_tentativa, mov.registrado_em)
+        self.assertTrue(Job.objects.filter(chave_pendente=notificacao_service.TAREFA_ENVIO).exists())
+
+
+# =============================================================================
+# user-035: feed SSE com commits fora da ordem dos ids
+# =============================================================================
+
+class FeedTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.processo = self.novo_processo()
+        self.chegada = encaminhar(self.processo, self.pg, self.setor, self.admin)
+
+    def test_movimentacao_comitada_depois_de_id_maior_ainda_aparece(self):
+        ids = [ev["id"] for ev in feed.buscar_eventos(depois_de=self.chegada.pk + 100)]
+        self.assertIn(self.chegada.pk, ids)
+
+    def test_notificador_distribui_cada_evento_uma_vez(self):
+        notificador = feed.NotificadorCaixaEntrada()
+        notificador._ultimo_id = 0
+        atrasado, novo = {"id": 8, "setor_id": 1}, {"id": 10, "setor_id": 1}
+
+        self.assertEqual(notificador._novos([novo]), [novo])
+        self.assertEqual(notificador._novos([atrasado, novo]), [atrasado])
+        self.assertEqual(notificador._novos([atrasado, novo]), [])
+        self.assertEqual(notificador._ultimo_id, 10)
+
+    def test_cursor_do_evento_sse_nao_regride(self):
+        texto = feed.formatar_evento({"id": 8, "tipo": "chegada"}, cursor=10)
+        self.assertTrue(texto.startswith("id: 10\n"))
+        self.assertIn('"id": 8', texto)
+
+
+# =============================================================================
+# user-036: API JSON (serialização e ETag)
+# =============================================================================
+
+class ApiTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.processo = self.novo_processo()
+        _token, chave = TokenAPI.gerar(user=self.admin, nome="testes")
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {chave}"}
+        self.url = reverse("api_v1_processos")
+
+    def test_lista_sem_mudanca_responde_304_sem_consultar_processos(self):
+        etag = self.client.get(self.url, **self.auth)["ETag"]
+        with self.assertNumQueries(1):  # só o token
+            resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(resposta.status_code, 304)
+
+    def test_alteracao_de_processo_muda_etag_da_lista(self):
+        etag = self.client.get(self.url, **self.auth)["ETag"]
+        self.processo.assunto = "Assunto novo"
+        self.processo.save()
+        resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()["results"][0]["assunto"], "Assunto novo")
+
+    def test_interessados_restritos_a_admin_e_protocolista(self):
+        _token, chave = TokenAPI.gerar(user=self.u1, nome="consulta")  # papel CONSULTA
+        consulta = {"HTTP_AUTHORIZATION": f"Token {chave}"}
+
+        resposta = self.client.get(self.url, {"fields": "numero,interessados"}, **consulta)
+        self.assertEqual(resposta.status_code, 403)
+        resposta = self.client.get(self.url, {"fields": "numero,interessados"}, **self.auth)
+        self.assertEqual(resposta.json()["results"][0]["interessados"][0]["cpf"], self.pessoa.cpf)
+
+    def test_busca_por_cpf_do_interessado_restrita(self):
+        _token, chave = TokenAPI.gerar(user=self.u1, nome="consulta")
+        consulta = {"HTTP_AUTHORIZATION": f"Token {chave}"}
+
+        for q in (self.pessoa.cpf, "FULANO"):
+            self.assertEqual(self.client.get(self.url, {"q": q}, **consulta).json()["results"], [])
+            self.assertEqual(len(self.client.get(self.url, {"q": q}, **self.auth).json()["results"]), 1)
+
+    def test_datas_saem_no_formato_do_django_com_ou_sem_orjson(self):
+        dados = {"em": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc), "valor": Decimal("1.50")}
+        esperado = b'{"em":"2026-01-02T03:04:05.678Z","valor":"1.50"}'
+        self.assertEqual(api._dumps(dados), esperado)
+        with mock.patch.object(api, "orjson", None):
+            self.assertEqual(api._dumps(dados), esperado)
+
+
+# =============================================================================
+# user-039: documentos para impressão (guia de remessa, etiquetas)
+# =============================================================================
+
+class DocumentosTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.outro = Departamento.objects.create(nome="SETOR B", tipo=Departamento.Tipo.INTERNO, responsavel=self.admin)
+        self.pendente = self.novo_processo(1)
+        encaminhar(self.pendente, self.pg, self.setor, self.admin)
+        self.seguiu = self.novo_processo(2)  # passou pelo setor e já foi para outro
+        encaminhar(self.seguiu, self.pg, self.setor, self.admin)
+        encaminhar(self.seguiu, self.setor, self.outro, self.admin)
+        self.recebido = self.novo_processo(3)
+        encaminhar(self.recebido, self.pg, self.setor, self.admin)
+        Processo.objects.filter(pk=self.recebido.pk).update(recebido_em=timezone.now(), recebido_por=self.u1)
+
+    def _linhas(self, tipo, parametros) -> list[dict]:
+        documento = DocumentoGerado(tipo=tipo, parametros=parametros, solicitado_por=self.admin)
+        return list(documentos_service._linhas(documento))
+
+    def test_guia_so_com_pendentes_cuja_ultima_movimentacao_e_o_encaminhamento(self):
+        linhas = self._linhas(DocumentoGerado.Tipo.GUIA_REMESSA, {"origem": self.pg.pk, "destino": self.setor.pk})
+        self.assertEqual([l["processo_id"] for l in linhas], [self.pendente.pk])
+        self.assertEqual(linhas[0]["interessado"], self.pessoa.nome)
+
+    def test_subconsulta_da_ultima_movimentacao_restrita_aos_candidatos(self):
+        sql = str(documentos_service._qs_ultimas_movimentacoes([self.pendente.pk]).query)
+        self.assertIn(f"IN ({self.pendente.pk})", sql)
+
+    def test_etiquetas_trazem_a_ultima_movimentacao_de_cada_processo(self):
+        linhas = self._linhas(DocumentoGerado.Tipo.ETIQUETAS, {"processos": [self.pendente.pk, self.seguiu.pk]})
+        self.assertEqual(
+            {l["processo_id"]: l["departamento_destino__nome"] for l in linhas},
+            {self.pendente.pk: self.setor.nome, self.seguiu.pk: self.outro.nome},
+        )
+        self.assertTrue(all("<svg" in l["codigo_barras"] for l in linhas))
+
+
+# =============================================================================
+# user-041: contador da caixa de entrada no menu
+# =============================================================================
+
+class ContadorCaixaTests(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.processo = self.novo_processo()
+
+    def test_contador_sai_do_cache_ate_a_caixa_mudar(self):
+        self.assertEqual(caixa_service.total_pendentes_do_menu(self.u1, eh_admin=False), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(caixa_service.total_pendentes_do_menu(self.u1, eh_admin=False), 0)
+
+        encaminhar(self.processo, self.pg, self.setor, self.admin)
+        self.assertEqual(caixa_service.total_pendentes_do_menu(self.u1, eh_admin=False), 1)
+
+    def test_entrar_no_setor_atualiza_o_contador(self):
+        u3 = User.objects.create_user("u3", "u3@exemplo.gov.br", "x")
+        encaminhar(self.processo, self.pg, self.setor, self.admin)
+        self.assertEqual(caixa_service.total_pendentes_do_menu(u3, eh_admin=False), 0)
+
+        DepartamentoMembro.objects.create(departamento=self.setor, user=u3)
+        self.assertEqual(caixa_service.total_pendentes_do_menu(u3, eh_admin=False), 1)
+
+
+# =============================================================================
+# user-044: particionamento remove constraints só no comando
+# =============================================================================
+
+class ParticionamentoTests(Cenario):
+    def test_sem_particionar_numero_formatado_continua_unico_no_banco(self):
+        self.novo_processo(numero=1, ano=26)
+        with self.assertRaises(IntegrityError):
+            Processo.objects.create(
+                ano=25, numero_manual=99, numero_formatado="0001/26", tipo_processo=self.tipo,
+                assunto="Inconsistente", criado_por=self.admin,
+            )
+
+    def test_particionar_remove_fks_e_unique_antes_do_alter(self):
+        tabela_processo = particionamento_service.PROCESSO.tabela
+        tabela_mov = particionamento_service.MOVIMENTACAO.tabela
+        fks = {
+            tabela_processo: [(tabela_processo, "fk_tipo"), (tabela_mov, "fk_mov_processo")],
+            tabela_mov: [(tabela_mov, "fk_mov_processo")],
+        }
+        unicos = {
+            tabela_processo: [("uniq_numero_formatado", ["numero_formatado"])],
+            tabela_mov: [],
+        }
+        with (
+            mock.patch.object(particionamento_service.connection, "vendor", "mysql"),
+            mock.patch.object(particionamento_service, "particoes", return_value=[]),
+            mock.patch.object(particionamento_service, "_faixa_dos_dados", return_value=(None, None)),
+            mock.patch.object(particionamento_service, "_fks", side_effect=lambda e: fks[e.tabela]),
+            mock.patch.object(
+                particionamento_service, "_unicos_sem_particao", side_effect=lambda e: unicos[e.tabela]
+            ),
+        ):
+            comandos = particionamento_service.planejar(particionar=True, anos_futuros=1)
+
+        remocoes = [c for c in comandos if "PARTITION BY" not in c]
+        self.assertEqual(len(remocoes), 3)  # FK entre as duas tabelas só uma vez
+        self.assertIn("DROP FOREIGN KEY", remocoes[0])
+        self.assertIn('DROP INDEX "uniq_numero_formatado", ADD INDEX "uniq_numero_formatado"', remocoes[2])
+        self.assertTrue(all("PARTITION BY" in c for c in comandos[3:]))
+        self.assertEqual(len(comandos), 5)
+
+
+# =============================================================================
+# user-049: permanência por setor (incremental)
+# =============================================================================
+
+class Analise(Cenario):
+    def setUp(self):
+        super().setUp()
+        self.agora = timezone.now()
+
+    def movimentar(self, processo, *, ha: int, pk: int | None = None, destino=None) -> MovimentacaoProcesso:
+        """Encaminhamento registrado `ha` segundos atrás (pk explícito: id fora da ordem do commit)."""
+        return MovimentacaoProcesso.objects.create(
+            pk=pk,
+            processo=processo,
+            tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.INTERNA,
+            acao=MovimentacaoProcesso.Acao.ENCAMINHADO,
+            departamento_origem=self.pg,
+            departamento_destino=destino or self.setor,
+            registrado_por=self.admin,
+            registrado_em=self.agora - timedelta(seconds=ha),
+        )
+
+
+class PermanenciaIncrementalTests(Analise):
+    def _atualizar(self, atraso: int) -> dict:
+        with mock.patch.object(permanencia_service, "ATRASO_COMMIT", atraso):
+            return permanencia_service.atualizar()
+
+    def test_movimentacao_de_id_menor_comitada_depois_entra_na_rodada_seguinte(self):
+        a, b = self.novo_processo(1), self.novo_processo(2)
+        self.movimentar(a, ha=120, pk=10_000)
+        self.assertEqual(self._atualizar(60)["processos"], 1)
+
+        # registrada antes da rodada, mas só visível (commit) depois dela, com id menor
+        self.movimentar(b, ha=30, pk=9_999)
+        self.assertEqual(self._atualizar(0)["processos"], 1)
+        self.assertTrue(PermanenciaSetor.objects.filter(processo=b, setor=self.setor).exists())
+
+    def test_movimentacao_recente_fica_para_a_proxima_rodada(self):
+        mov = self.movimentar(self.novo_processo(), ha=10)
+        self.assertEqual(self._atualizar(60)["processos"], 0)
+        self.assertLess(MarcaProcessamento.objects.get(nome=permanencia_service.MARCA).ultimo_em, mov.registrado_em)
+        self.assertEqual(self._atualizar(0)["processos"], 1)
+        self.assertEqual(self._atualizar(0)["processos"], 0)
+
+
+# =============================================================================
+# user-050: matriz de fluxo entre setores (incremental)
+# =============================================================================
+
+class FluxoIncrementalTests(Analise):
+    def _atualizar(self, atraso: int, **kwargs) -> dict:
+        with mock.patch.object(fluxo_service, "ATRASO_COMMIT", atraso):
+            return fluxo_service.atualizar(**kwargs)
+
+    def _agregado(self) -> dict:
+        return {
+            (f.mes, f.origem_id, f.destino_id, f.tipo_tramitacao, f.acao): (f.quantidade, f.medidas, f.soma_ms, f.histograma)
+            for f in FluxoSetor.objects.all()
+        }
+
+    def test_rodadas_incrementais_somam_o_mesmo_que_reprocessar(self):
+        processo = self.novo_processo()
+        outro = Departamento.objects.create(nome="SETOR B", tipo=Departamento.Tipo.INTERNO, responsavel=self.admin)
+        self.movimentar(processo, ha=300)
+        self.movimentar(processo, ha=200, destino=outro)
+        self.assertEqual(self._atualizar(0, lote=1)["movimentacoes"], 2)
+        self.movimentar(processo, ha=100)
+        self.movimentar(self.novo_processo(2), ha=50)
+        self.assertEqual(self._atualizar(0, lote=1)["movimentacoes"], 2)
+        self.assertEqual(self._atualizar(0)["movimentacoes"], 0)
+
+        incremental = self._agregado()
+        self.assertEqual(sum(quantidade for quantidade, *_ in incremental.values()), 4)
+        self._atualizar(0, reprocessar=True)
+        self.assertEqual(self._agregado(), incremental)
+
+    def test_lote_nao_pula_movimentacoes_do_mesmo_instante(self):
+        movs = [self.movimentar(self.novo_processo(n), ha=60) for n in (1, 2, 3)]
+        MovimentacaoProcesso.objects.filter(pk__in=[m.pk for m in movs]).update(registrado_em=movs[0].registrado_em)
+        self.assertEqual(self._atualizar(0, lote=2)["movimentacoes"], 3)
+        self.assertEqual(sum(q for q, *_ in self._agregado().values()), 3)
+
+    def test_movimentacao_de_id_menor_comitada_depois_entra_na_rodada_seguinte(self):
+        self.movimentar(self.novo_processo(1), ha=120, pk=10_000)
+        self.assertEqual(self._atualizar(60)["movimentacoes"], 1)
+
+        # registrada antes da rodada, mas só visível (commit) depois dela, com id menor
+        self.movimentar(self.novo_processo(2), ha=30, pk=9_999)
+        self.assertEqual(self._atualizar(60)["movimentacoes"], 0)  # ainda dentro do atraso
+        self.assertEqual(self._atualizar(0)["movimentacoes"], 1)
+        self.assertEqual(sum(q for q, *_ in self._agregado().values()), 2)
+
+    def test_empate_de_horario_usa_o_id_para_achar_a_anterior(self):
+        processo = self.novo_processo()
+        primeira = self.movimentar(processo, ha=100)
+        segunda = self.movimentar(processo, ha=100, destino=self.arq)
+        MovimentacaoProcesso.objects.filter(pk=segunda.pk).update(registrado_em=primeira.registrado_em)
+        self._atualizar(0)
+
+        # a primeira não tem anterior (sem medida); a segunda mede 0 ms desde a primeira
+        fluxos = {f.destino_id: (f.quantidade, f.medidas, f.soma_ms) for f in FluxoSetor.objects.all()}
+        self.assertEqual(fluxos, {self.setor.pk: (1, 0, 0), self.arq.pk: (1, 1, 0)})
+
+    def test_mediana_do_agregado(self):
+        processo = self.novo_processo()
+        for ha in (1000, 900, 700, 400):  # intervalos de 100, 200 e 300 s
+            self.movimentar(processo, ha=ha)
+        self._atualizar(0, lote=2)
+
+        linha, = fluxo_service.matriz()
+        self.assertEqual((linha["quantidade"], linha["media_ms"]), (4, 200_000))
+        self.assertAlmostEqual(linha["mediana_ms"], 200_000, delta=200_000 * 0.1)
+
+
+class MedianaHistogramaTests(SimpleTestCase):
+    def test_mediana_dentro_do_erro_da_faixa(self):
+        for valores in ([1500], [10, 20, 30], [100, 250, 900, 4000], list(range(1, 1000, 7)), [5000] * 3 + [10] * 2):
+            histograma = Counter(fluxo_service._faixa(v) for v in valores)
+            exata = sorted(valores)[(len(valores) - 1) // 2]
+            self.assertAlmostEqual(fluxo_service._mediana(histograma), exata, delta=exata * 0.1)
+
+    def test_histogramas_somados_dao_a_mediana_do_conjunto(self):
+        soma = fluxo_service._Soma()
+        soma.somar(2, 2, 300, {str(fluxo_service._faixa(100)): 1, str(fluxo_service._faixa(200)): 1})
+        soma.somar(1, 1, 90_000, {str(fluxo_service._faixa(90_000)): 1})
+        self.assertEqual(soma.tempos()["media_ms"], 30_100)
+        self.assertAlmostEqual(soma.tempos()["mediana_ms"], 200, delta=20)
+
+    def test_sem_medidas(self):
+        self.assertEqual(fluxo_service._Soma().tempos(), {"media_ms": None, "mediana_ms": None})
@@ -6,6 +6,7 @@ urlpatterns = [
     # Home/Dashboards
     path("", views.home, name="home"),
     path("dashboard/admin/", views.dashboard_admin, name="dashboard_admin"),
+    path("dashboard/admin/fluxo/", views.dashboard_fluxo, name="dashboard_fluxo"),
     path("dashboard/", views.dashboard_user, name="dashboard_user"),
 
     # ✅ Setores multiusuário (ex.: Folha) - atribuição dentro do setor
@@ -17,6 +18,11 @@ urlpatterns = [
     path("processos/novo/", views.processo_create, name="processo_create"),
     path("processos/<int:pk>/", views.processo_detail, name="processo_detail"),
     path("processos/<int:pk>/visualizar/", views.processo_view, name="processo_view"),
+    path(
+        "processos/<int:pk>/restaurar-arquivo-frio/",
+        views.processo_restaurar_arquivo_frio,
+        name="processo_restaurar_arquivo_frio",
+    ),
 
     # AJAX destinos (para atualizar o select conforme tipo/ação)
     path(
@@ -37,6 +43,14 @@ urlpatterns = [
 
     # Caixa
     path("caixa/", views.caixa_entrada, name="caixa_entrada"),
+    path("caixa/setor/<int:setor_id>/<slug:secao>/", views.caixa_entrada_secao, name="caixa_entrada_secao"),
+    path("caixa/eventos/", views.caixa_entrada_eventos, name="caixa_entrada_eventos"),
+    path("caixa/leitura/", views.caixa_leitura, name="caixa_leitura"),
+    path("caixa/leitura/receber/", views.caixa_leitura_receber, name="caixa_leitura_receber"),
+
+    # Etiquetas / guias de remessa
+    path("documentos/", views.documentos, name="documentos"),
+    path("documentos/<int:pk>/arquivo/", views.documento_arquivo, name="documento_arquivo"),
 
     # Pessoas (Requerentes)
     path("pessoas/", views.pessoas_list, name="pessoas_list"),
@@ -0,0 +1,195 @@
+# apps/protocolos/versoes.py
+from __future__ import annotations
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Max
+
+from .models import Departamento, MovimentacaoProcesso, Processo, ProcessoFrio
+
+CHAVE_CATALOGO_DEPARTAMENTOS = "protocolos:catalogo:departamentos"
+CHAVE_CATALOGO_PESSOAS = "protocolos:catalogo:pessoas"
+# ✅ com a versão do catálogo de departamentos: o signal de Departamento (save/delete)
+# invalida todas as origens de uma vez (ex.: a marca de PROTOCOLO GERAL mudou de setor)
+CHAVE_ORIGEM_PROCESSO = "protocolos:processo:{pk}:origem:{catalogo}"
+CHAVE_VERSAO_PROCESSO = "protocolos:processo:{pk}:versao"
+CHAVE_VERSAO_CAIXA = "protocolos:caixa:versao"
+CHAVE_VERSAO_LISTA_PROCESSOS = "protocolos:processos:versao"
+
+# Processo ativo: a versão expira sozinha (segurança contra UPDATE fora do ORM)
+VERSAO_PROCESSO_TIMEOUT = 60 * 60
+
+# Origens de catálogos antigos ficam órfãs no cache: expiram sozinhas
+ORIGEM_PROCESSO_TIMEOUT = 60 * 60 * 24
+
+# Sem origem conhecida (processo sem movimentação e sem PROTOCOLO GERAL)
+SEM_ORIGEM = 0
+
+
+# =============================================================================
+# Versões de catálogo
+# =============================================================================
+
+def _versao(chave: str) -> str:
+    """
+    Retorna a versão atual de um catálogo.
+    Se a chave não existir (cache limpo/expirado), cria uma nova versão:
+    os clientes perdem o cache uma vez, mas nunca recebem dado velho.
+    """
+    versao = cache.get(chave)
+    if versao is None:
+        versao = str(time.time_ns())
+        cache.add(chave, versao, timeout=None)
+        versao = cache.get(chave, versao)
+    return versao
+
+
+def _nova_versao(chave: str) -> None:
+    cache.set(chave, str(time.time_ns()), timeout=None)
+
+
+def versao_catalogo_departamentos() -> str:
+    return _versao(CHAVE_CATALOGO_DEPARTAMENTOS)
+
+
+def invalidar_catalogo_departamentos() -> None:
+    _nova_versao(CHAVE_CATALOGO_DEPARTAMENTOS)
+
+
+def versao_catalogo_pessoas() -> str:
+    return _versao(CHAVE_CATALOGO_PESSOAS)
+
+
+def invalidar_catalogo_pessoas() -> None:
+    _nova_versao(CHAVE_CATALOGO_PESSOAS)
+
+
+def versao_caixa() -> str:
+    """Muda a cada alteração que pode mexer nos pendentes de recebimento (contador do menu)."""
+    return _versao(CHAVE_VERSAO_CAIXA)
+
+
+def invalidar_caixa() -> None:
+    _nova_versao(CHAVE_VERSAO_CAIXA)
+
+
+def versao_lista_processos() -> str:
+    """
+    Muda a cada alteração de qualquer processo (listagens e consultas em lote da API).
+
+    Versão única, sem recorte por setor/status: uma página filtrada também muda quando
+    um processo sai ou entra nela, e o recorte exigiria invalidar o escopo antigo e o
+    novo em cada tramitação. Com isso o ETag das listagens só economiza enquanto a
+    taxa de escrita é baixa (noite, fim de semana, consulta repetida no mesmo minuto);
+    no expediente quase todo If-None-Match chega com versão vencida e a consulta roda.
+    O detalhe do processo (versao_processo) não depende dela.
+    """
+    return _versao(CHAVE_VERSAO_LISTA_PROCESSOS)
+
+
+def invalidar_lista_processos() -> None:
+    _nova_versao(CHAVE_VERSAO_LISTA_PROCESSOS)
+
+
+# =============================================================================
+# Estado do processo (origem = setor atual para tramitar)
+# =============================================================================
+
+def _chave_origem(processo_id: int) -> str:
+    return CHAVE_ORIGEM_PROCESSO.format(pk=processo_id, catalogo=versao_catalogo_departamentos())
+
+
+def origem_atual_id(processo_id: int) -> int:
+    """
+    Id do setor de onde o processo sai na próxima tramitação
+    (mesma regra de MovimentacaoForm._inferir_origem).
+    Fica em cache até a próxima movimentação do processo ou alteração de Departamento.
+    """
+    chave = _chave_origem(processo_id)
+    origem_id = cache.get(chave)
+    if origem_id is not None:
+        return origem_id
+
+    last = (
+        MovimentacaoProcesso.objects
+        .filter(processo_id=processo_id)
+        .order_by("-registrado_em")
+        .values_list("departamento_destino_id", "departamento_origem_id")
+        .first()
+    )
+    if last:
+        origem_id = last[0] or last[1]
+    else:
+        origem_id = (
+            Departamento.objects
+            .filter(eh_protocolo_geral=True, tipo=Departamento.Tipo.INTERNO, ativo=True)
+            .values_list("id", flat=True)
+            .first()
+        ) or SEM_ORIGEM
+
+    cache.set(chave, origem_id, timeout=ORIGEM_PROCESSO_TIMEOUT)
+    return origem_id
+
+
+def versao_processo(processo_id: int) -> str | None:
+    """
+    Versão do processo = última movimentação + carimbo de alteração do Processo.
+    Retorna None se o processo não existir (nem no arquivo frio).
+    ARQUIVADO nunca muda: fica em cache sem expiração.
+    """
+    chave = CHAVE_VERSAO_PROCESSO.format(pk=processo_id)
+    versao = cache.get(chave)
+    if versao is not None:
+        return versao
+
+    row = (
+        Processo.objects
+        .filter(pk=processo_id)
+        .annotate(ultima_mov_id=Max("movimentacoes__id"))
+        .values_list("ultima_mov_id", "atualizado_em", "status")
+        .first()
+    )
+    if not row:
+        # ✅ arquivo frio: nunca muda enquanto estiver lá (restaurar invalida a chave)
+        movido_em = ProcessoFrio.objects.filter(pk=processo_id).values_list("movido_em", flat=True).first()
+        if movido_em is None:
+            return None
+        versao = f"frio-{movido_em.timestamp()}"
+        cache.set(chave, versao, timeout=None)
+        return versao
+
+    ultima_mov_id, atualizado_em, status = row
+    versao = f"{ultima_mov_id or 0}-{atualizado_em.timestamp() if atualizado_em else 0}"
+
+    timeout = None if status == Processo.Status.ARQUIVADO else VERSAO_PROCESSO_TIMEOUT
+    cache.set(chave, versao, timeout=timeout)
+    return versao
+
+
+def invalidar_estado_processo(processo_id: int) -> None:
+    invalidar_processos([processo_id])
+    invalidar_caixa()
+
+
+def invalidar_processos(processo_ids) -> None:
+    """
+    Só as versões dos processos (alterações que não mexem em pendências, ex.: interessados).
+    Também vira a versão global das listagens (ver versao_lista_processos).
+    """
+    chaves = []
+    for pk in processo_ids:
+        chaves += [_chave_origem(pk), CHAVE_VERSAO_PROCESSO.format(pk=pk)]
+    cache.delete_many(chaves)
+    invalidar_lista_processos()
+
+
+# =============================================================================
+# ETag
+# =============================================================================
+
+def etag(*partes) -> str:
+    """Gera um ETag curto e estável a partir das partes informadas."""
+    bruto = "|".join(str(p) for p in partes)
+    return hashlib.sha1(bruto.encode("utf-8")).hexdigest()[:20]
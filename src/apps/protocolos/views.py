@@ -1,17 +1,24 @@
 # apps/protocolos/views.py
 from __future__ import annotations
 
-from collections import defaultdict
 import re
+from datetime import date
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
 from django.db.models import OuterRef, Subquery, Q, Count
-from django.http import HttpResponseForbidden, JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
-from django.views.decorators.http import require_GET, require_POST
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
+
+from core.db_router import leitura_na_replica
 
 from .forms import (
     MovimentacaoForm,
@@ -27,9 +34,26 @@ from .models import (
     TipoProcesso,
     Departamento,
     DepartamentoMembro,
+    DocumentoGerado,
     Pessoa,
 )
-from .utils import setor_esta_pendente_de_recebimento
+from .services.arquivo_frio_service import (
+    buscar_no_arquivo_frio,
+    carregar_snapshot_frio,
+    restaurar_do_arquivo_frio,
+)
+from .services import caixa_service, fluxo_service
+from .services.consulta_service import resolver_numeros
+from .services.documentos_service import solicitar_etiquetas, solicitar_guia_remessa
+from .services.notificacao_service import registrar_notificacoes_chegada
+from .services.processo_service import abrir_processo, get_protocolo_geral
+from .services.recebimento_service import receber_por_numero
+from .services.snapshot_service import carregar_snapshot, gravar_snapshot
+from .utils import get_ultima_movimentacao, setor_esta_pendente_de_recebimento
+from . import feed, projecoes, versoes
+
+CATALOGO_MAX_AGE = getattr(settings, "CATALOGO_CACHE_MAX_AGE", 300)
+HISTORICO_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 # =============================================================================
@@ -86,6 +110,11 @@ def _usuario_tem_vinculo_com_setor(user, setor: Departamento) -> bool:
     return setor.membros.filter(user_id=user.id, ativo=True).exists()
 
 
+def _qs_setores_do_usuario(user):
+    """Setores INTERNOS ativos onde o usuário é responsável, substituto ou membro ativo."""
+    return caixa_service.qs_setores_do_usuario(user)
+
+
 def _aplicar_efeitos_movimentacao_no_processo(processo: Processo, mov: MovimentacaoProcesso) -> None:
     """
     Mantém o Processo consistente com a movimentação recém-criada.
@@ -93,7 +122,12 @@ def _aplicar_efeitos_movimentacao_no_processo(processo: Processo, mov: Movimenta
     """
     if mov.acao == MovimentacaoProcesso.Acao.ARQUIVADO:
         processo.status = Processo.Status.ARQUIVADO
-        processo.save(update_fields=["status"])
+        processo.arquivado_em = mov.registrado_em or timezone.now()
+        processo.arquivado_por = mov.registrado_por
+        processo.save(update_fields=["status", "arquivado_em", "arquivado_por"])
+
+        # ✅ dossiê congelado: a partir daqui a consulta lê só o snapshot
+        gravar_snapshot(processo)
         return
 
     if mov.acao in (MovimentacaoProcesso.Acao.ENCAMINHADO, MovimentacaoProcesso.Acao.DEVOLVIDO):
@@ -101,6 +135,9 @@ def _aplicar_efeitos_movimentacao_no_processo(processo: Processo, mov: Movimenta
         if hasattr(processo, "responsavel_setor"):
             processo.responsavel_setor = None
 
+        # ✅ outbox de e-mail na mesma transação (enviado depois pelo worker)
+        registrar_notificacoes_chegada(processo, mov)
+
         # ao encaminhar interno, zera recebido_*
         if mov.tipo_tramitacao == MovimentacaoProcesso.TipoTramitacao.INTERNA:
             processo.recebido_em = None
@@ -139,19 +176,17 @@ def home(request):
 # Processos - Listagem
 # =============================================================================
 
+@leitura_na_replica
 @login_required
 def processos_list(request):
-    qs = (
-        _qs_processos_com_setor_atual()
-        .prefetch_related("interessados")
-        .order_by("-criado_em")
-    )
+    qs = projecoes.qs_linhas().order_by("-criado_em")
 
     q = (request.GET.get("q") or "").strip()
     tipo = (request.GET.get("tipo") or "").strip()
     setor = (request.GET.get("setor") or "").strip()
     status = (request.GET.get("status") or "").strip()
     prioridade = (request.GET.get("prioridade") or "").strip()
+    incluir_arquivo = (request.GET.get("arquivo") or "").strip() == "1"
 
     if q:
         digits = re.sub(r"\D+", "", q)
@@ -181,21 +216,32 @@ def processos_list(request):
     tipos = TipoProcesso.objects.filter(ativo=True).order_by("nome")
     setores = Departamento.objects.filter(ativo=True).order_by("nome")
 
-    processos = list(qs)
-    for p in processos:
-        pendente, _setor_atual = setor_esta_pendente_de_recebimento(p)
-        p.pendente_recebimento = pendente
+    # ✅ linhas enxutas (só as colunas da tabela + interessados concatenados)
+    processos = projecoes.linhas(qs, interessados=True)
+
+    # ✅ arquivo frio: só quando pedido explicitamente (não tem setor atual nem status ATIVO)
+    processos_frios = []
+    if incluir_arquivo and not setor and status != Processo.Status.ATIVO:
+        processos_frios = buscar_no_arquivo_frio(q=q, tipo=tipo, prioridade=prioridade)
 
     return render(
         request,
         "protocolos/processos_list.html",
         {
             "processos": processos,
+            "processos_frios": processos_frios,
             "tipos": tipos,
             "setores": setores,
             "status_choices": Processo.Status.choices,
             "prioridade_choices": Processo.Prioridade.choices,
-            "f": {"q": q, "tipo": tipo, "setor": setor, "status": status, "prioridade": prioridade},
+            "f": {
+                "q": q,
+                "tipo": tipo,
+                "setor": setor,
+                "status": status,
+                "prioridade": prioridade,
+                "arquivo": "1" if incluir_arquivo else "",
+            },
         },
     )
 
@@ -238,16 +284,32 @@ def processo_receber(request, pk: int):
     if not (eh_admin or tem_vinculo):
         return HttpResponseForbidden("Você não tem permissão para receber este processo neste setor.")
 
+    # ✅ o formulário manda o setor que o usuário viu: página velha não recebe em outro setor
+    setor_visto = (request.POST.get("setor") or "").strip()
+    if setor_visto.isdigit() and int(setor_visto) != setor_atual.pk:
+        messages.warning(request, f"O processo mudou de setor (agora em {setor_atual.nome}); recebimento não registrado.")
+        return redirect("processo_detail", pk=processo.pk)
+
     if not pendente:
         messages.info(request, "Este processo já foi recebido neste setor.")
         return redirect("processo_detail", pk=processo.pk)
 
+    ultima = get_ultima_movimentacao(processo)
+    agora = timezone.now()
     with transaction.atomic():
-        processo.recebido_em = timezone.now()
-        processo.recebido_por = request.user
-        processo.save(update_fields=["recebido_em", "recebido_por"])
+        # ✅ compare-and-set: dois cliques simultâneos -> só um recebe; movimentação
+        # registrada depois desta leitura (encaminhado para outro setor) também barra
+        if not processo.receber_se_pendente(
+            request.user,
+            ultima_movimentacao_id=ultima.pk,
+            ultima_registrado_em=ultima.registrado_em,
+            quando=agora,
+        ):
+            messages.info(request, "Este processo já foi recebido por outro usuário neste setor.")
+            return redirect("processo_detail", pk=processo.pk)
 
-        mov = MovimentacaoProcesso.objects.create(
+        # recebido_* já gravados pelo UPDATE condicional (mesmo efeito de _aplicar_efeitos...)
+        MovimentacaoProcesso.objects.create(
             processo=processo,
             tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.INTERNA,
             acao=MovimentacaoProcesso.Acao.RECEBIDO,
@@ -255,11 +317,9 @@ def processo_receber(request, pk: int):
             departamento_destino=setor_atual,
             observacao=f"Recebimento confirmado por {request.user.username} no setor {setor_atual.nome}.",
             registrado_por=request.user,
-            registrado_em=timezone.now(),
+            registrado_em=agora,
         )
 
-        _aplicar_efeitos_movimentacao_no_processo(processo, mov)
-
     messages.success(request, f"Processo {processo.numero_formatado} recebido com sucesso.")
     return redirect("caixa_entrada")
 
@@ -382,8 +442,12 @@ def processo_pegar_setor(request, pk: int):
         messages.error(request, "Este processo já está atribuído a outro servidor.")
         return redirect("processo_detail", pk=processo.pk)
 
-    processo.responsavel_setor = request.user
-    processo.save(update_fields=["responsavel_setor"])
+    # ✅ compare-and-set sobre o responsável visto acima (e ainda recebido no setor)
+    if not processo.trocar_responsavel_setor(request.user, esperado_id=atual_id, exigir_recebido=True):
+        messages.error(request, "Este processo acabou de ser atribuído (ou movimentado) por outro servidor.")
+        return redirect("processo_detail", pk=processo.pk)
+
+    versoes.invalidar_estado_processo(processo.pk)
     messages.success(request, "Processo atribuído a você.")
     return redirect("processo_detail", pk=processo.pk)
 
@@ -413,8 +477,11 @@ def processo_liberar_setor(request, pk: int):
     if not eh_admin and atual_id != request.user.id:
         return HttpResponseForbidden("Somente o responsável (ou ADMIN) pode liberar este processo.")
 
-    processo.responsavel_setor = None
-    processo.save(update_fields=["responsavel_setor"])
+    if not processo.trocar_responsavel_setor(None, esperado_id=atual_id):
+        messages.info(request, "A atribuição deste processo acabou de ser alterada por outro usuário.")
+        return redirect("processo_detail", pk=processo.pk)
+
+    versoes.invalidar_estado_processo(processo.pk)
     messages.success(request, "Atribuição removida. Processo disponível no setor.")
     return redirect("processo_detail", pk=processo.pk)
 
@@ -581,6 +648,7 @@ def processo_detail(request, pk: int):
             "pode_receber": pode_receber,
             "em_setor_externo": em_setor_externo,
             "setores_internos": setores_internos,
+            "destinos_versao": _destinos_versao(processo.pk),
 
             # ✅ Multiusuário
             "responsavel_setor": responsavel_setor,
@@ -591,16 +659,71 @@ def processo_detail(request, pk: int):
     )
 
 
+def _processo_view_etag(request, pk: int):
+    """
+    ETag da tela de consulta: versão do processo (última movimentação +
+    atualizado_em) + o que o layout traz do usuário: id, contador da caixa de
+    entrada e cookie do CSRF (o token dos formulários da página).
+    Com mensagem flash pendente não há ETag: um 304 esconderia a mensagem.
+    """
+    if len(messages.get_messages(request)):
+        return None
+    versao = versoes.versao_processo(pk)
+    if versao is None:
+        return None
+    return versoes.etag(
+        "processo_view",
+        pk,
+        versao,
+        request.user.pk,
+        versoes.versao_caixa(),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+    )
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_processo_view_etag)
 def processo_view(request, pk: int):
-    processo = get_object_or_404(
-        Processo.objects.select_related("tipo_processo", "criado_por", "recebido_por", "responsavel_setor")
-        .prefetch_related("interessados", "movimentacoes"),
-        pk=pk,
-    )
+    # ✅ ARQUIVADO: uma busca por chave primária no snapshot, sem joins
+    snapshot = carregar_snapshot(pk)
+    em_arquivo_frio = False
+
+    processo = None
+    if snapshot is None:
+        processo = (
+            Processo.objects.select_related("tipo_processo", "criado_por", "recebido_por", "responsavel_setor")
+            .prefetch_related("interessados")
+            .filter(pk=pk)
+            .first()
+        )
+        if processo is None:
+            # ✅ caminho explícito do arquivo frio (processos antigos movidos para fora das tabelas quentes)
+            snapshot = carregar_snapshot_frio(pk)
+            if snapshot is None:
+                raise Http404("Processo não encontrado.")
+            em_arquivo_frio = True
+
+    if snapshot is not None:
+        return render(
+            request,
+            "protocolos/processo_view.html",
+            {
+                "processo": snapshot,
+                "interessados": snapshot["interessados"],
+                "movimentacoes": snapshot["movimentacoes"],
+                "setor_atual": snapshot["setor_atual"],
+                "pendente_recebimento": False,
+                "em_arquivo_frio": em_arquivo_frio,
+                "pode_restaurar": em_arquivo_frio and _somente_admin(request.user),
+                "versao": versoes.versao_processo(pk),
+                "historico_cache_timeout": HISTORICO_CACHE_TIMEOUT,
+            },
+        )
 
     pendente_recebimento, setor_atual = setor_esta_pendente_de_recebimento(processo)
 
+    # ✅ lazy: com o fragmento do histórico em cache, esta query nem é executada
     movimentacoes = processo.movimentacoes.select_related(
         "departamento_origem", "departamento_destino", "registrado_por"
     ).order_by("-registrado_em")
@@ -610,117 +733,270 @@ def processo_view(request, pk: int):
         "protocolos/processo_view.html",
         {
             "processo": processo,
+            "interessados": processo.interessados.all(),
             "movimentacoes": movimentacoes,
             "setor_atual": setor_atual,
             "pendente_recebimento": pendente_recebimento,
+            "versao": versoes.versao_processo(processo.pk),
+            "historico_cache_timeout": HISTORICO_CACHE_TIMEOUT,
         },
     )
 
 
+@require_POST
+@login_required
+def processo_restaurar_arquivo_frio(request, pk: int):
+    """Traz um processo do arquivo frio de volta às tabelas quentes (ex.: revisão jurídica)."""
+    if not _somente_admin(request.user):
+        return HttpResponseForbidden("Somente ADMIN pode restaurar processos do arquivo frio.")
+
+    try:
+        restaurados = restaurar_do_arquivo_frio([pk])
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect("processo_view", pk=pk)
+    if not restaurados:
+        raise Http404("Processo não encontrado no arquivo frio.")
+
+    messages.success(request, "Processo restaurado do arquivo frio.")
+    return redirect("processo_view", pk=pk)
+
+
 # =============================================================================
 # Caixa de Entrada
 # =============================================================================
 
+@leitura_na_replica
 @login_required
 def caixa_entrada(request):
-    papel = _papel_usuario(request.user)
-    eh_admin = (papel == "ADMIN")
-
-    setores_ids = []
-    setores_map = {}
+    """
+    Primeira carga só com as contagens por setor (uma consulta agrupada);
+    as listas de cada setor vêm depois, paginadas, por caixa_entrada_secao.
+    """
+    eh_admin = _somente_admin(request.user)
 
+    setores_ids = None
     if not eh_admin:
-        setores = (
-            Departamento.objects
-            .filter(tipo=Departamento.Tipo.INTERNO, ativo=True)
-            .filter(
-                Q(responsavel_id=request.user.id)
-                | Q(substituto_id=request.user.id)
-                | Q(membros__user_id=request.user.id, membros__ativo=True)
-            )
-            .distinct()
-            .order_by("nome")
-        )
-
-        setores_ids = list(set(setores.values_list("id", flat=True)))
-        setores_map = {s.id: s for s in setores}
-
+        setores_ids = list(_qs_setores_do_usuario(request.user).values_list("id", flat=True))
         if not setores_ids:
             return render(
                 request,
                 "protocolos/caixa_entrada.html",
-                {
-                    "eh_admin": False,
-                    "pendentes_por_setor": [],
-                    "no_setor_por_setor": [],
-                    "setores_usuario": [],
-                },
+                {"eh_admin": False, "pendentes_por_setor": [], "no_setor_por_setor": [], "setores_usuario": []},
             )
 
-    qs = (
-        _qs_processos_com_setor_atual()
-        .prefetch_related("interessados")
-        .order_by("-criado_em")
+    contagens = caixa_service.contar_por_setor(request.user, eh_admin=eh_admin, setores_ids=setores_ids)
+    setores = Departamento.objects.filter(id__in=contagens.keys() if eh_admin else setores_ids).order_by("nome")
+
+    pendentes_por_setor = []
+    no_setor_por_setor = []
+    for setor in setores:
+        qtd = contagens.get(setor.id, {"pendentes": 0, "no_setor": 0})
+        pendentes, no_setor = qtd["pendentes"], qtd["no_setor"]
+        # órgão EXTERNO não tem recebimento
+        if setor.tipo != Departamento.Tipo.INTERNO:
+            pendentes, no_setor = 0, pendentes + no_setor
+
+        if pendentes:
+            pendentes_por_setor.append({"setor": setor, "qtd": pendentes})
+        if no_setor:
+            no_setor_por_setor.append({"setor": setor, "qtd": no_setor})
+
+    return render(
+        request,
+        "protocolos/caixa_entrada.html",
+        {
+            "eh_admin": eh_admin,
+            "pendentes_por_setor": pendentes_por_setor,
+            "no_setor_por_setor": no_setor_por_setor,
+            "setores_usuario": list(setores) if not eh_admin else [],
+            "secao_pendentes": caixa_service.SECAO_PENDENTES,
+            "secao_no_setor": caixa_service.SECAO_NO_SETOR,
+        },
     )
 
-    if not eh_admin:
-        qs = qs.filter(setor_atual_id__in=setores_ids)
 
-        # ✅ MOSTRA APENAS:
-        # - processos sem responsável no setor (disponíveis)
-        # - processos atribuídos a mim
-        qs = qs.filter(Q(responsavel_setor__isnull=True) | Q(responsavel_setor_id=request.user.id))
+@leitura_na_replica
+@require_GET
+@login_required
+def caixa_entrada_secao(request, setor_id: int, secao: str):
+    """Fragmento HTML (linhas da tabela) de uma seção de um setor, paginado (?pagina=N)."""
+    if secao not in (caixa_service.SECAO_PENDENTES, caixa_service.SECAO_NO_SETOR):
+        raise Http404
 
-    processos = list(qs)
+    eh_admin = _somente_admin(request.user)
+    setor = get_object_or_404(Departamento, pk=setor_id)
+    if not eh_admin and not _qs_setores_do_usuario(request.user).filter(pk=setor.pk).exists():
+        return HttpResponseForbidden("Você não tem vínculo com este setor.")
 
-    pendentes_dict = defaultdict(list)
-    no_setor_dict = defaultdict(list)
+    pagina = request.GET.get("pagina") or "1"
+    pagina = int(pagina) if pagina.isdigit() else 1
+    itens, tem_mais = caixa_service.pagina_da_secao(request.user, setor, secao, eh_admin=eh_admin, pagina=pagina)
 
-    for p in processos:
-        pendente, setor_atual = setor_esta_pendente_de_recebimento(p)
-        if not setor_atual:
-            continue
+    return render(
+        request,
+        "protocolos/caixa_entrada/linhas.html",
+        {
+            "itens": itens,
+            "setor": setor,
+            "secao": secao,
+            "pendentes": secao == caixa_service.SECAO_PENDENTES,
+            "eh_admin": eh_admin,
+            "proxima_pagina": pagina + 1 if tem_mais else None,
+        },
+    )
 
-        p.pendente_recebimento = pendente
 
-        if pendente:
-            pendentes_dict[setor_atual.id].append(p)
-        else:
-            no_setor_dict[setor_atual.id].append(p)
+# =============================================================================
+# ✅ Caixa de Entrada - feed ao vivo (SSE, requer ASGI)
+# =============================================================================
+
+def _setores_do_feed(user) -> frozenset | None:
+    if _papel_usuario(user) == "ADMIN":
+        return None
+    return frozenset(_qs_setores_do_usuario(user).values_list("id", flat=True))
+
+
+@require_GET
+@login_required
+async def caixa_entrada_eventos(request):
+    """
+    Server-Sent Events: "chegada" e "recebido" nos setores do usuário.
+    Sob WSGI responde 204 (o EventSource do navegador não reconecta).
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    setores = await sync_to_async(_setores_do_feed)(user)
+    if setores is not None and not setores:
+        return HttpResponse(status=204)
+
+    ultimo_visto = request.headers.get("Last-Event-ID", "")
+    ultimo_visto = int(ultimo_visto) if ultimo_visto.isdigit() else None
+
+    response = StreamingHttpResponse(
+        feed.stream_eventos(setores, ultimo_visto),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: não bufferizar o stream
+    return response
+
+
+# =============================================================================
+# ✅ Caixa de Entrada - modo leitura (código de barras na mesa do setor)
+# =============================================================================
+
+@login_required
+def caixa_leitura(request):
+    eh_admin = _papel_usuario(request.user) == "ADMIN"
+    setores = (
+        Departamento.objects.filter(tipo=Departamento.Tipo.INTERNO, ativo=True)
+        if eh_admin
+        else _qs_setores_do_usuario(request.user)
+    ).order_by("nome")
+
+    return render(request, "protocolos/caixa_leitura.html", {"setores": setores, "eh_admin": eh_admin})
+
+
+@require_POST
+@login_required
+def caixa_leitura_receber(request):
+    """Recebe pelo número lido (POST numero=, setor= opcional) e responde um JSON curto."""
+    setor = (request.POST.get("setor") or "").strip()
+    resultado = receber_por_numero(
+        request.POST.get("numero") or "",
+        request.user,
+        eh_admin=_papel_usuario(request.user) == "ADMIN",
+        setor_id=int(setor) if setor.isdigit() else None,
+    )
+    return JsonResponse(resultado)
+
+
+# =============================================================================
+# ✅ Etiquetas e guias de remessa (gerados em segundo plano pelo worker)
+# =============================================================================
 
-    if eh_admin:
-        all_setores_ids = set(list(pendentes_dict.keys()) + list(no_setor_dict.keys()))
-        if all_setores_ids:
-            setores = Departamento.objects.filter(id__in=all_setores_ids).order_by("nome")
-            setores_map = {s.id: s for s in setores}
+def _pedir_etiquetas(request) -> None:
+    entradas = [n for n in re.split(r"[\s,;]+", request.POST.get("numeros") or "") if n]
+    ids: list[int] = []
 
-    def ordenar_por_nome(item):
-        setor_id, _lista = item
-        setor = setores_map.get(setor_id)
-        return (setor.nome if setor else "")
+    if entradas:
+        resultados = resolver_numeros(entradas)
+        ids += [r["id"] for r in resultados if r["encontrado"] and not r["arquivo_frio"]]
+        ignorados = [r["entrada"] for r in resultados if not r["encontrado"] or r["arquivo_frio"]]
+        if ignorados:
+            messages.warning(request, f"Ignorados (não encontrados ou no arquivo): {', '.join(ignorados[:20])}")
 
-    pendentes_por_setor = [
-        {"setor": setores_map.get(setor_id), "itens": lista, "qtd": len(lista)}
-        for setor_id, lista in sorted(pendentes_dict.items(), key=ordenar_por_nome)
-    ]
+    criados_em = parse_date(request.POST.get("criados_em") or "")
+    if criados_em:
+        ids += list(Processo.objects.filter(criado_em__date=criados_em).values_list("id", flat=True))
 
-    no_setor_por_setor = [
-        {"setor": setores_map.get(setor_id), "itens": lista, "qtd": len(lista)}
-        for setor_id, lista in sorted(no_setor_dict.items(), key=ordenar_por_nome)
-    ]
+    documento = solicitar_etiquetas(ids, request.user)
+    messages.success(request, f"Etiquetas solicitadas ({documento.titulo}). O arquivo aparece abaixo quando ficar pronto.")
+
+
+def _pedir_guia(request, setores_origem) -> None:
+    origem = setores_origem.filter(pk=request.POST.get("origem") or 0).first()
+    destino = Departamento.objects.filter(
+        pk=request.POST.get("destino") or 0, tipo=Departamento.Tipo.INTERNO, ativo=True
+    ).first()
+    if not origem or not destino:
+        raise ValueError("Escolha um setor de origem (com vínculo) e um destino.")
+
+    documento = solicitar_guia_remessa(origem, destino, request.user)
+    messages.success(request, f"Guia de remessa solicitada ({documento.titulo}).")
+
+
+@login_required
+def documentos(request):
+    eh_admin = _somente_admin(request.user)
+    pode_etiquetas = _somente_admin_ou_protocolista(request.user)
+    setores_origem = (
+        Departamento.objects.filter(tipo=Departamento.Tipo.INTERNO, ativo=True)
+        if eh_admin
+        else _qs_setores_do_usuario(request.user)
+    ).order_by("nome")
+
+    if request.method == "POST":
+        acao = request.POST.get("acao")
+        try:
+            if acao == "etiquetas":
+                if not pode_etiquetas:
+                    return HttpResponseForbidden("Somente ADMIN/PROTOCOLISTA podem gerar etiquetas.")
+                _pedir_etiquetas(request)
+            elif acao == "guia":
+                _pedir_guia(request, setores_origem)
+        except ValueError as e:
+            messages.error(request, str(e))
+        return redirect("documentos")
 
     return render(
         request,
-        "protocolos/caixa_entrada.html",
+        "protocolos/documentos.html",
         {
-            "eh_admin": eh_admin,
-            "pendentes_por_setor": pendentes_por_setor,
-            "no_setor_por_setor": no_setor_por_setor,
-            "setores_usuario": list(setores_map.values()) if not eh_admin else [],
+            "pode_etiquetas": pode_etiquetas,
+            "setores_origem": setores_origem,
+            "setores_destino": Departamento.objects.filter(tipo=Departamento.Tipo.INTERNO, ativo=True).order_by("nome"),
+            "documentos": DocumentoGerado.objects.filter(solicitado_por=request.user)[:30],
+            "hoje": timezone.localdate(),
         },
     )
 
 
+@require_GET
+@login_required
+def documento_arquivo(request, pk: int):
+    documento = get_object_or_404(DocumentoGerado, pk=pk)
+    if documento.solicitado_por_id != request.user.id and not _somente_admin(request.user):
+        return HttpResponseForbidden("Este documento foi solicitado por outro usuário.")
+    if documento.status != DocumentoGerado.Status.PRONTO or not documento.arquivo:
+        raise Http404("Documento ainda não está pronto.")
+
+    return FileResponse(documento.arquivo.open("rb"), content_type="text/html; charset=utf-8")
+
+
 # =============================================================================
 # Processo - Create (PROTOCOLO GERAL)
 # =============================================================================
@@ -730,11 +1006,7 @@ def processo_create(request):
     if not _somente_admin_ou_protocolista(request.user):
         return HttpResponseForbidden("Você não tem permissão para criar processos.")
 
-    protocolo_geral = Departamento.objects.filter(
-        eh_protocolo_geral=True,
-        tipo=Departamento.Tipo.INTERNO,
-        ativo=True,
-    ).first()
+    protocolo_geral = get_protocolo_geral()
 
     if not protocolo_geral:
         messages.error(request, 'Departamento marcado como "PROTOCOLO GERAL" não encontrado (INTERNO/ativo).')
@@ -746,61 +1018,54 @@ def processo_create(request):
     if request.method == "POST":
         form = ProcessoCreateForm(request.POST)
         if form.is_valid():
-            cpf = form.cleaned_data["cpf"]
-
-            pessoa = Pessoa.objects.filter(cpf=cpf, ativo=True).first()
+            # ✅ pessoa já carregada em clean_cpf (sem segunda consulta)
+            pessoa = form.pessoa_encontrada
             if not pessoa:
                 pessoa_status = "nao_encontrada"
                 messages.error(request, "Pessoa não encontrada. Cadastre o requerente para continuar.")
                 return render(
                     request,
                     "protocolos/processo_form.html",
-                    {"form": form, "pessoa": None, "pessoa_status": pessoa_status},
+                    {
+                        "form": form,
+                        "pessoa": None,
+                        "pessoa_status": pessoa_status,
+                        "pessoas_versao": versoes.versao_catalogo_pessoas(),
+                    },
                 )
 
             pessoa_status = "ok"
 
-            tipo_processo = form.cleaned_data["tipo_processo"]
-            assunto = form.cleaned_data["assunto"]
-            descricao = form.cleaned_data["descricao"]
-            prioridade = form.cleaned_data["prioridade"]
-
-            numero_manual = form.numero_int
-            ano_2d = form.ano_int
-
-            numero_formatado = Processo.format_numero(numero_manual, ano_2d)
+            processo = Processo(
+                ano=form.ano_int,
+                numero_manual=form.numero_int,  # None -> numeração automática
+                tipo_processo=form.cleaned_data["tipo_processo"],
+                assunto=form.cleaned_data["assunto"],
+                descricao=form.cleaned_data["descricao"],
+                prioridade=form.cleaned_data["prioridade"],
+                criado_por=request.user,
+            )
 
-            with transaction.atomic():
-                processo = Processo.objects.create(
-                    ano=ano_2d,
-                    numero_manual=numero_manual,
-                    numero_formatado=numero_formatado,
-                    tipo_processo=tipo_processo,
-                    assunto=assunto,
-                    descricao=descricao,
-                    criado_por=request.user,
-                    prioridade=prioridade,
+            try:
+                abrir_processo(
+                    processo,
+                    interessados=[pessoa],
+                    usuario=request.user,
+                    protocolo_geral=protocolo_geral,
                 )
-                processo.interessados.add(pessoa)
-
-                mov = MovimentacaoProcesso.objects.create(
-                    processo=processo,
-                    tipo_tramitacao=MovimentacaoProcesso.TipoTramitacao.INTERNA,
-                    acao=MovimentacaoProcesso.Acao.RECEBIDO,
-                    departamento_origem=protocolo_geral,
-                    departamento_destino=protocolo_geral,
-                    observacao="Processo criado no PROTOCOLO GERAL.",
-                    registrado_por=request.user,
-                    registrado_em=timezone.now(),
+            except ValueError as e:
+                form.add_error("numero_processo", str(e))
+                return render(
+                    request,
+                    "protocolos/processo_form.html",
+                    {
+                        "form": form,
+                        "pessoa": pessoa,
+                        "pessoa_status": pessoa_status,
+                        "pessoas_versao": versoes.versao_catalogo_pessoas(),
+                    },
                 )
 
-                processo.recebido_em = timezone.now()
-                processo.recebido_por = request.user
-                processo.responsavel_setor = None
-                processo.save(update_fields=["recebido_em", "recebido_por", "responsavel_setor"])
-
-                _aplicar_efeitos_movimentacao_no_processo(processo, mov)
-
             messages.success(request, f"Processo {processo.numero_formatado} criado com sucesso.")
             return redirect("processo_detail", pk=processo.pk)
 
@@ -811,7 +1076,12 @@ def processo_create(request):
     return render(
         request,
         "protocolos/processo_form.html",
-        {"form": form, "pessoa": pessoa, "pessoa_status": pessoa_status},
+        {
+            "form": form,
+            "pessoa": pessoa,
+            "pessoa_status": pessoa_status,
+            "pessoas_versao": versoes.versao_catalogo_pessoas(),
+        },
     )
 
 
@@ -819,8 +1089,17 @@ def processo_create(request):
 # API AJAX - Lookup Pessoa (CPF ou Nome)
 # =============================================================================
 
+def _pessoa_lookup_etag(request):
+    if not _somente_admin_ou_protocolista(request.user):
+        return None
+    q = (request.GET.get("q") or "").strip()
+    return versoes.etag("pessoas", versoes.versao_catalogo_pessoas(), q)
+
+
 @require_GET
 @login_required
+@cache_control(private=True, max_age=CATALOGO_MAX_AGE)
+@condition(etag_func=_pessoa_lookup_etag)
 def pessoa_lookup(request):
     if not _somente_admin_ou_protocolista(request.user):
         return JsonResponse({"results": []}, status=403)
@@ -840,7 +1119,7 @@ def pessoa_lookup(request):
 
     qs = qs.order_by("nome")[:10]
 
-    results = [{"id": p.id, "nome": p.nome, "cpf": p.cpf} for p in qs]
+    results = [{"id": p_id, "nome": nome, "cpf": cpf} for p_id, nome, cpf in qs.values_list("id", "nome", "cpf")]
     return JsonResponse({"results": results})
 
 
@@ -848,6 +1127,7 @@ def pessoa_lookup(request):
 # Pessoas (Requerentes)
 # =============================================================================
 
+@leitura_na_replica
 @login_required
 def pessoas_list(request):
     if not _somente_admin_ou_protocolista(request.user):
@@ -937,6 +1217,7 @@ def pessoa_toggle_ativo(request, pk: int):
 # Dashboards
 # =============================================================================
 
+@leitura_na_replica
 @login_required
 def dashboard_admin(request):
     papel = _papel_usuario(request.user)
@@ -949,14 +1230,9 @@ def dashboard_admin(request):
     ativos = qs.filter(status=Processo.Status.ATIVO).count()
     arquivados = qs.filter(status=Processo.Status.ARQUIVADO).count()
 
-    pendentes = 0
-    ultimos = list(qs.prefetch_related("interessados").order_by("-criado_em")[:8])
-
-    processos = list(qs.order_by("-criado_em")[:300])
-    for p in processos:
-        pend, _setor = setor_esta_pendente_de_recebimento(p)
-        if pend:
-            pendentes += 1
+    # ✅ pendentes de todo o sistema numa contagem (antes: laço nos 300 últimos)
+    pendentes = caixa_service.total_pendentes(request.user, eh_admin=True)
+    ultimos = projecoes.linhas(projecoes.qs_linhas().order_by("-criado_em"), limite=8, interessados=True)
 
     por_status = qs.values("status").annotate(qtd=Count("id")).order_by("status")
     por_prioridade = qs.values("prioridade").annotate(qtd=Count("id")).order_by("prioridade")
@@ -982,12 +1258,13 @@ def dashboard_admin(request):
     )
 
 
+@leitura_na_replica
 @login_required
 def dashboard_user(request):
     papel = _papel_usuario(request.user)
     eh_admin = (papel == "ADMIN")
 
-    qs = _qs_processos_com_setor_atual()
+    qs = projecoes.qs_linhas()
 
     setores = (
         Departamento.objects
@@ -1010,20 +1287,18 @@ def dashboard_user(request):
     pendentes = []
     no_setor = []
 
-    processos = list(qs.prefetch_related("interessados").order_by("-criado_em")[:300])
+    processos = projecoes.linhas(qs.order_by("-criado_em"), limite=300)
 
     for p in processos:
-        pend, setor_atual = setor_esta_pendente_de_recebimento(p)
-        if not setor_atual:
+        if not p.setor_atual_id:
             continue
-        p.pendente_recebimento = pend
 
-        if pend:
+        if p.pendente_recebimento:
             pendentes.append(p)
         else:
             no_setor.append(p)
 
-    ultimos = list(qs.prefetch_related("interessados").order_by("-criado_em")[:8])
+    ultimos = processos[:8]
 
     return render(
         request,
@@ -1044,6 +1319,44 @@ def dashboard_user(request):
     )
 
 
+def _mes_do_parametro(valor: str):
+    """AAAA-MM ou AAAA-MM-DD -> date (None se vazio/inválido)."""
+    valor = (valor or "").strip()
+    try:
+        return parse_date(f"{valor}-01" if len(valor) == 7 else valor)
+    except ValueError:
+        return None
+
+
+@require_GET
+@leitura_na_replica
+@login_required
+def dashboard_fluxo(request):
+    """
+    JSON do diagrama de Sankey do dashboard ADMIN (fluxo_service.sankey). Parâmetros:
+    desde/ate (AAAA-MM; default: últimos 12 meses), tipo_tramitacao, acao.
+    """
+    if not _somente_admin(request.user):
+        return JsonResponse({"erro": "Somente ADMIN."}, status=403)
+
+    hoje = timezone.localdate()
+    desde = _mes_do_parametro(request.GET.get("desde"))
+    if desde is None:
+        ano, mes = (hoje.year, hoje.month - 11) if hoje.month > 11 else (hoje.year - 1, hoje.month + 1)
+        desde = date(ano, mes, 1)
+    ate = _mes_do_parametro(request.GET.get("ate")) or hoje
+
+    # ✅ o agregado só muda a cada rodada do atualizar_fluxo
+    response = JsonResponse(fluxo_service.sankey(
+        desde=desde,
+        ate=ate,
+        tipo_tramitacao=request.GET.get("tipo_tramitacao") or "",
+        acao=request.GET.get("acao") or "",
+    ))
+    response["Cache-Control"] = "private, max-age=300"
+    return response
+
+
 # =============================================================================
 # CADASTROS (ADMIN)
 # =============================================================================
@@ -1253,14 +1566,40 @@ def depto_membro_toggle(request, pk: int, membro_id: int):
 # AJAX destinos (para atualizar o select conforme tipo/ação)
 # =============================================================================
 
+def _destinos_etag(request, pk: int):
+    """
+    ETag dos destinos: versão do catálogo de departamentos + setor de origem
+    do processo + filtros da tela. Não consulta o banco quando está em cache.
+    """
+    tipo = (request.GET.get("tipo") or "").strip()
+    acao = (request.GET.get("acao") or "").strip()
+    return versoes.etag(
+        "destinos",
+        versoes.versao_catalogo_departamentos(),
+        versoes.origem_atual_id(pk),
+        tipo,
+        acao,
+    )
+
+
+def _destinos_versao(processo_id: int) -> str:
+    """Token para a URL dos destinos: muda quando a origem ou o catálogo mudam."""
+    return versoes.etag(versoes.versao_catalogo_departamentos(), versoes.origem_atual_id(processo_id))
+
+
 @require_GET
 @login_required
+@cache_control(private=True, max_age=CATALOGO_MAX_AGE)
+@condition(etag_func=_destinos_etag)
 def destinos_departamento_lookup(request, pk: int):
     """
     Retorna destinos possíveis para o processo (pk),
     baseado em tipo_tramitacao + acao selecionados na tela.
+
+    ✅ Cache HTTP: responde 304 quando o ETag (catálogo + origem) não mudou.
+    A tela inclui a versão na URL (?v=...), então o max-age nunca serve lista velha.
     """
-    processo = get_object_or_404(Processo.objects.prefetch_related("movimentacoes"), pk=pk)
+    get_object_or_404(Processo.objects.only("id"), pk=pk)
 
     tipo = (request.GET.get("tipo") or "").strip()
     acao = (request.GET.get("acao") or "").strip()
@@ -1269,16 +1608,8 @@ def destinos_departamento_lookup(request, pk: int):
     if acao == MovimentacaoProcesso.Acao.ARQUIVADO:
         return JsonResponse({"results": []})
 
-    last = (
-        processo.movimentacoes
-        .select_related("departamento_origem", "departamento_destino")
-        .order_by("-registrado_em")
-        .first()
-    )
-    origem = (last.departamento_destino or last.departamento_origem) if last else None
-
-    if not origem:
-        origem = Departamento.objects.filter(eh_protocolo_geral=True, tipo=Departamento.Tipo.INTERNO, ativo=True).first()
+    origem_id = versoes.origem_atual_id(pk)
+    origem = Departamento.objects.filter(pk=origem_id).first() if origem_id else None
 
     if not origem:
         return JsonResponse({"results": []})
@@ -1304,5 +1635,5 @@ def destinos_departamento_lookup(request, pk: int):
 
     qs = qs.exclude(id=origem.id)
 
-    results = [{"id": d.id, "nome": d.nome} for d in qs.order_by("nome")]
+    results = [{"id": d_id, "nome": nome} for d_id, nome in qs.order_by("nome").values_list("id", "nome")]
     return JsonResponse({"results": results})
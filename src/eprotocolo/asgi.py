@@ -1,12 +1,15 @@
 import os
 import sys
 from pathlib import Path
-from django.core.wsgi import get_wsgi_application
+from django.core.asgi import get_asgi_application
 
-BASE_DIR = Path(__file__).resolve().parents[1]
+# Garante que /src/apps esteja no PYTHONPATH
+BASE_DIR = Path(__file__).resolve().parents[1]  # .../src
 APPS_DIR = BASE_DIR / "apps"
 if str(APPS_DIR) not in sys.path:
     sys.path.insert(0, str(APPS_DIR))
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eprotocolo.settings.prod')
-application = get_wsgi_application()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "eprotocolo.settings.prod")
+
+# ✅ ASGI de verdade (feed SSE da caixa de entrada). Ex.: uvicorn eprotocolo.asgi:application
+application = get_asgi_application()
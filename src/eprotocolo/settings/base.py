@@ -64,6 +64,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.db_router.ReplicaMiddleware",
     
     "core.middleware.IdleLogoutMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -85,6 +86,7 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 "core.context_processors.session_time_left",
                  "core.context_processors.caixa_entrada_counter",
+                "core.context_processors.caixa_entrada_sse",
             ],
         },
     },
@@ -118,6 +120,75 @@ DATABASES = {
     }
 }
 
+# Réplica de leitura (opcional): com DB_REPLICA_HOST, as views marcadas com
+# @leitura_na_replica leem dela (core.db_router). Depois de uma escrita, a sessão
+# fica no primário por REPLICA_JANELA_PRIMARIO segundos (lê o que acabou de gravar).
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST", "")
+if DB_REPLICA_HOST:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.getenv("DB_REPLICA_NAME", DB_NAME),
+        "USER": os.getenv("DB_REPLICA_USER", DB_USER),
+        "PASSWORD": os.getenv("DB_REPLICA_PASSWORD", DB_PASSWORD),
+        "HOST": DB_REPLICA_HOST,
+        "PORT": os.getenv("DB_REPLICA_PORT", DB_PORT),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+REPLICA_JANELA_PRIMARIO = int(os.getenv("REPLICA_JANELA_PRIMARIO", "15"))
+
+# -----------------------------------------------------------------------------
+# Cache
+# -----------------------------------------------------------------------------
+# FileBasedCache é compartilhado entre os workers do mesmo servidor e não exige
+# serviço extra. Para vários servidores, use Memcached/Redis via .env.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR / "cache")),
+        "TIMEOUT": 300,
+    }
+}
+
+# Cache-Control (segundos) dos endpoints de catálogo (destinos, lookup de pessoas)
+CATALOGO_CACHE_MAX_AGE = int(os.getenv("CATALOGO_CACHE_MAX_AGE", "300"))
+
+# -----------------------------------------------------------------------------
+# Caixa de entrada ao vivo (SSE) - exige servir com ASGI (eprotocolo.asgi)
+# -----------------------------------------------------------------------------
+CAIXA_ENTRADA_SSE = os.getenv("CAIXA_ENTRADA_SSE", "0") == "1"
+CAIXA_ENTRADA_SSE_INTERVALO = float(os.getenv("CAIXA_ENTRADA_SSE_INTERVALO", "3"))  # segundos por consulta
+CAIXA_ENTRADA_SSE_SOBREPOSICAO = int(os.getenv("CAIXA_ENTRADA_SSE_SOBREPOSICAO", "30"))  # segundos relidos (commit fora de ordem)
+
+# -----------------------------------------------------------------------------
+# Análises incrementais (permanência por setor, fluxo entre setores)
+# -----------------------------------------------------------------------------
+# Movimentações mais novas que isso ficam para a próxima rodada: precisa ser maior
+# que a transação mais longa que grava movimentações (commit fora da ordem do id).
+ANALISE_ATRASO_COMMIT = int(os.getenv("ANALISE_ATRASO_COMMIT", "300"))  # segundos
+
+# -----------------------------------------------------------------------------
+# Jobs em segundo plano (core.Job + manage.py run_worker)
+# -----------------------------------------------------------------------------
+JOBS_BACKOFF_BASE = int(os.getenv("JOBS_BACKOFF_BASE", "30"))  # segundos (dobra a cada tentativa)
+JOBS_BACKOFF_MAX = int(os.getenv("JOBS_BACKOFF_MAX", "3600"))
+JOBS_LEASE = int(os.getenv("JOBS_LEASE", "120"))  # segundos sem batimento do worker: job órfão volta para a fila
+
+# -----------------------------------------------------------------------------
+# Backups (manage.py backup_db --deposito / backup_deposito)
+# -----------------------------------------------------------------------------
+BACKUP_DEPOSITO = os.getenv("BACKUP_DEPOSITO", str(BASE_DIR / "backups" / "deposito"))
+# Retenção avô-pai-filho aplicada pelo "backup_deposito prune"
+BACKUP_RETER_DIARIOS = int(os.getenv("BACKUP_RETER_DIARIOS", "7"))
+BACKUP_RETER_SEMANAIS = int(os.getenv("BACKUP_RETER_SEMANAIS", "4"))
+BACKUP_RETER_MENSAIS = int(os.getenv("BACKUP_RETER_MENSAIS", "12"))
+# Limites do backup_db (0 = sem teto). nice/ionice valem para o mysqldump e para a compressão.
+BACKUP_LIMITE_LEITURA_MB = float(os.getenv("BACKUP_LIMITE_LEITURA_MB", "0"))  # MB/s lidos do dump
+BACKUP_LIMITE_ESCRITA_MB = float(os.getenv("BACKUP_LIMITE_ESCRITA_MB", "0"))  # MB/s gravados no disco
+BACKUP_NICE = int(os.getenv("BACKUP_NICE", "10"))
+BACKUP_IONICE = os.getenv("BACKUP_IONICE", "best-effort")  # best-effort | idle | off
+
 # -----------------------------------------------------------------------------
 # Password validation
 # -----------------------------------------------------------------------------
@@ -169,3 +240,8 @@ EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "1") == "1"
 EMAIL_USE_SSL = os.getenv("EMAIL_USE_SSL", "0") == "1"
 
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@eprotocolo.local")
+
+# Aviso por e-mail quando um processo chega à caixa de entrada do setor (outbox + run_worker)
+NOTIFICACOES_EMAIL_ATIVAS = os.getenv("NOTIFICACOES_EMAIL_ATIVAS", "1") == "1"
+NOTIFICACOES_EMAIL_ATRASO = int(os.getenv("NOTIFICACOES_EMAIL_ATRASO", "60"))  # segundos (janela do resumo)
+NOTIFICACOES_EMAIL_MAX_TENTATIVAS = int(os.getenv("NOTIFICACOES_EMAIL_MAX_TENTATIVAS", "5"))
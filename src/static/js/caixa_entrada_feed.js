@@ -0,0 +1,47 @@
+// Feed ao vivo da Caixa de Entrada (Server-Sent Events).
+// Atualiza o contador do menu e dispara "caixa:chegada" / "caixa:recebido" no document
+// para a página da caixa inserir/remover linhas sem recarregar.
+(function () {
+  const script = document.currentScript;
+  const url = script && script.dataset.url;
+  if (!url || !window.EventSource) return;
+
+  const badge = document.getElementById("caixa-entrada-badge");
+
+  function ajustarBadge(delta) {
+    if (!badge) return;
+    const atual = parseInt(badge.textContent || "0", 10) || 0;
+    const novo = Math.max(atual + delta, 0);
+    badge.textContent = String(novo);
+    badge.classList.toggle("d-none", novo === 0);
+  }
+
+  // o servidor relê uma janela curta (transações que comitam fora da ordem dos ids)
+  // e repete eventos na reconexão: cada id é tratado uma vez só
+  const vistos = new Set();
+  function primeiraVez(ev) {
+    if (vistos.has(ev.id)) return false;
+    vistos.add(ev.id);
+    if (vistos.size > 1000) vistos.delete(vistos.values().next().value);
+    return true;
+  }
+
+  const es = new EventSource(url);
+
+  es.addEventListener("chegada", (e) => {
+    const ev = JSON.parse(e.data);
+    if (!primeiraVez(ev)) return;
+    ajustarBadge(+1);
+    document.dispatchEvent(new CustomEvent("caixa:chegada", { detail: ev }));
+  });
+
+  es.addEventListener("recebido", (e) => {
+    const ev = JSON.parse(e.data);
+    if (!primeiraVez(ev)) return;
+    ajustarBadge(-1);
+    document.dispatchEvent(new CustomEvent("caixa:recebido", { detail: ev }));
+  });
+
+  // fecha antes de sair da página (evita conexão pendurada no servidor)
+  window.addEventListener("beforeunload", () => es.close());
+})();
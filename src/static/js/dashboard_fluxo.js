@@ -0,0 +1,59 @@
+// Diagrama de Sankey do fluxo entre setores (dashboard ADMIN).
+// Lê o JSON de data-url (nodes/links de fluxo_service.sankey) e desenha com o
+// Google Charts; sem a biblioteca (offline), mostra os links numa tabela.
+(function () {
+  const script = document.currentScript;
+  const url = script && script.dataset.url;
+  const alvo = document.getElementById("fluxo-sankey");
+  if (!url || !alvo) return;
+
+  function duracao(ms) {
+    if (ms == null) return "-";
+    const h = ms / 3600000;
+    return h >= 48 ? (h / 24).toFixed(1) + " d" : h.toFixed(1) + " h";
+  }
+
+  function tabela(dados, nomes) {
+    const linhas = dados.links.slice(0, 30).map((l) =>
+      `<tr><td>${nomes[l.source]}</td><td>${nomes[l.target]}</td>` +
+      `<td class="text-end">${l.value}</td><td class="text-end">${duracao(l.mediana_ms)}</td></tr>`
+    );
+    alvo.innerHTML =
+      '<table class="table table-sm mb-0"><thead><tr><th>Origem</th><th>Destino</th>' +
+      '<th class="text-end">Qtd</th><th class="text-end">Mediana</th></tr></thead><tbody>' +
+      linhas.join("") + "</tbody></table>";
+  }
+
+  function desenhar(dados) {
+    const nomes = {};
+    // o Sankey identifica nós pelo rótulo: origem e destino do mesmo setor precisam diferir
+    dados.nodes.forEach((n) => { nomes[n.id] = n.lado === "origem" ? n.nome : n.nome + " "; });
+    if (!dados.links.length) {
+      alvo.innerHTML = '<div class="text-muted p-3">Sem dados (rode atualizar_fluxo).</div>';
+      return;
+    }
+    if (!window.google || !google.charts) return tabela(dados, nomes);
+
+    google.charts.load("current", { packages: ["sankey"] });
+    google.charts.setOnLoadCallback(() => {
+      const tabelaDados = new google.visualization.DataTable();
+      tabelaDados.addColumn("string", "Origem");
+      tabelaDados.addColumn("string", "Destino");
+      tabelaDados.addColumn("number", "Qtd");
+      tabelaDados.addColumn({ type: "string", role: "tooltip" });
+      dados.links.forEach((l) => {
+        tabelaDados.addRow([
+          nomes[l.source], nomes[l.target], l.value,
+          `${nomes[l.source]} → ${nomes[l.target]}: ${l.value} (mediana ${duracao(l.mediana_ms)})`,
+        ]);
+      });
+      alvo.style.height = Math.max(300, dados.nodes.length * 24) + "px";
+      new google.visualization.Sankey(alvo).draw(tabelaDados, { sankey: { node: { labelPadding: 8 } } });
+    });
+  }
+
+  fetch(url, { credentials: "same-origin" })
+    .then((resp) => resp.ok ? resp.json() : Promise.reject(resp.status))
+    .then(desenhar)
+    .catch(() => { alvo.innerHTML = '<div class="text-muted p-3">Não foi possível carregar o fluxo.</div>'; });
+})();